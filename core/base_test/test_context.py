@@ -5,3 +5,4 @@ class TestContext(object):
     STARTED_DEVICES = []
     STARTED_PROCESSES = []
     BACKUP_FILES = {}
+    DEADLINE = None
@@ -10,9 +10,11 @@ from core.settings import Settings
 from core.utils.appium.appium_driver import AppiumDriver
 from core.utils.device.adb import Adb
 from core.utils.device.device_manager import DeviceManager
+from core.utils.device.emulator_pool import EmulatorPool
 from core.utils.file_utils import Folder, File
 from core.utils.gradle import Gradle
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
+from core.utils.wait import Wait, Deadline
 from core.utils.xcode import Xcode
 from products.nativescript.tns import Tns
 
@@ -35,8 +37,9 @@ class TnsTest(unittest.TestCase):
 
         # Kill processes
         Adb.restart()
-        Tns.kill()
-        Gradle.kill()
+        snapshot = ProcessSnapshot()
+        Tns.kill(snapshot=snapshot)
+        Gradle.kill(snapshot=snapshot)
         TnsTest.kill_emulators()
         TnsTest.__clean_backup_folder_and_dictionary()
         # Ensure log folders are create
@@ -57,20 +60,24 @@ class TnsTest(unittest.TestCase):
 
     def setUp(self):
         TestContext.TEST_NAME = self._testMethodName
+        TestContext.DEADLINE = Deadline(Settings.TEST_TIMEOUT) if Settings.TEST_TIMEOUT else None
         Log.test_start(test_name=TestContext.TEST_NAME)
-        Tns.kill()
-        Gradle.kill()
-        AppiumDriver.kill()
+        snapshot = ProcessSnapshot()
+        Tns.kill(snapshot=snapshot)
+        Gradle.kill(snapshot=snapshot)
+        AppiumDriver.kill(snapshot=snapshot)
         TnsTest.__clean_backup_folder_and_dictionary()
 
     def tearDown(self):
         # pylint: disable=no-member
+        TestContext.DEADLINE = None
 
         # Kill processes
-        Tns.kill()
-        AppiumDriver.kill()
-        Gradle.kill()
-        Process.kill_all_in_context()
+        snapshot = ProcessSnapshot()
+        Tns.kill(snapshot=snapshot)
+        AppiumDriver.kill(snapshot=snapshot)
+        Gradle.kill(snapshot=snapshot)
+        Process.kill_all_in_context(snapshot=snapshot)
         TnsTest.restore_files()
 
         # Get outcome
@@ -94,15 +101,21 @@ class TnsTest(unittest.TestCase):
         """
         Logic executed after all core_tests in class.
         """
-        Tns.kill()
+        snapshot = ProcessSnapshot()
+        Tns.kill(snapshot=snapshot)
         TnsTest.kill_emulators()
-        Process.kill_all_in_context()
-        Folder.clean(Settings.TEST_OUT_TEMP)
+        Process.kill_all_in_context(snapshot=snapshot)
+        Folder.clean(Settings.TEST_OUT_TEMP, background=True)
+        Wait.log_stats()
         Log.test_class_end(TestContext.CLASS_NAME)
 
     @staticmethod
     def kill_emulators():
-        DeviceManager.Emulator.stop()
+        if Settings.EMULATOR_POOL:
+            # Emulators keep running, next test class gets them with clean state.
+            EmulatorPool.release_all()
+        else:
+            DeviceManager.Emulator.stop()
         if Settings.HOST_OS is OSType.OSX:
             DeviceManager.Simulator.stop()
         TestContext.STARTED_DEVICES = []
@@ -0,0 +1,16 @@
+"""
+Folder copy strategy enum.
+"""
+from aenum import IntEnum
+
+
+class CopyStrategy(IntEnum):
+    _init_ = 'value string'
+
+    AUTO = 1, 'auto'
+    REFLINK = 2, 'reflink'
+    PARALLEL = 3, 'parallel'
+    COPYTREE = 4, 'copytree'
+
+    def __str__(self):
+        return self.string
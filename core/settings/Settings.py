@@ -58,12 +58,48 @@ TEST_OUT_LOGS = os.path.join(TEST_OUT_HOME, 'logs')
 TEST_OUT_IMAGES = os.path.join(TEST_OUT_HOME, 'images')
 TEST_OUT_TEMP = os.path.join(TEST_OUT_HOME, 'temp')
 
+# Folders cleaned in background are moved here before they are deleted (out of folders used by tests)
+TEST_TRASH_HOME = os.path.join(TEST_RUN_HOME, '.trash')
+
 ASSETS_HOME = os.path.join(TEST_RUN_HOME, 'assets')
 
 SSH_CLONE = os.environ.get('SSH_CLONE', False)
 
 BACKUP_FOLDER = os.path.join(TEST_RUN_HOME, "backup_folder")
 
+# Time budget (in seconds) shared by all waits in single test (0 means no budget)
+TEST_TIMEOUT = int(os.environ.get('TEST_TIMEOUT', 0))
+
+# Reuse apps created with same command and packages in same test run (see AppSnapshots)
+APP_SNAPSHOTS = os.environ.get('APP_SNAPSHOTS', 'true').lower() != 'false'
+
+# Execute adb commands via adb server protocol instead of spawning adb process (see AdbClient)
+ADB_CLIENT = os.environ.get('ADB_CLIENT', 'true').lower() != 'false'
+ADB_SERVER_PORT = int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037))
+
+# Keep emulators running between test classes and reset them with quickboot snapshot instead of cold boot
+EMULATOR_POOL = os.environ.get('EMULATOR_POOL', 'false').lower() == 'true'
+
+# Stream Android device logs in background (instead of dumping whole log on each read)
+LOG_STREAM = os.environ.get('LOG_STREAM', 'true').lower() != 'false'
+
+# Parallel test run (see run_sharded.py): index of the worker and count of workers
+WORKER = int(os.environ.get('TEST_WORKER', 0))
+WORKERS = int(os.environ.get('TEST_WORKERS', 1))
+
+# Max age (in seconds) of screenshot reused by consecutive device queries (0 means screenshot is never reused)
+SCREEN_CACHE_TTL = float(os.environ.get('SCREEN_CACHE_TTL', 1.0))
+
+# Max age (in seconds) of Android UI hierarchy dump reused by consecutive text queries (0 means it is never reused)
+UI_CACHE_TTL = float(os.environ.get('UI_CACHE_TTL', 1.0))
+
+# Cache of packed templates and runtimes shared by test runs (size in MB, 0 means cache is not used)
+ARTIFACT_CACHE_HOME = os.environ.get('ARTIFACT_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.tooling-qa-cache'))
+ARTIFACT_CACHE_SIZE = int(os.environ.get('ARTIFACT_CACHE_SIZE', 2048))
+
+# Durations of test classes measured in previous runs (used to split tests between parallel workers)
+TEST_DURATIONS = os.environ.get('TEST_DURATIONS', os.path.join(ARTIFACT_CACHE_HOME, 'test_durations.json'))
+
 
 def resolve_package(name, variable, default=str(ENV)):
     package = os.environ.get(variable, default)
@@ -190,8 +226,8 @@ class Emulators(object):
                               emu_id='emulator-5564')
     EMU_API_28 = EmulatorInfo(avd=os.environ.get('EMU_API_28', 'Emulator-Api28-Google'), os_version=9.0, port='5566',
                               emu_id='emulator-5566')
-    EMU_API_29 = EmulatorInfo(avd=os.environ.get('EMU_API_29', 'Emulator-Api29-Google'), os_version=10.0, port='5568',
-                              emu_id='emulator-5568')
+    EMU_API_29 = EmulatorInfo(avd=os.environ.get('EMU_API_29', 'Emulator-Api29-Google'), os_version=10.0, port='5572',
+                              emu_id='emulator-5572')
     EMU_API_23_64 = EmulatorInfo(avd=os.environ.get('EMU_API_23_64', 'Emulator-Api23-64'), os_version=6.0, port='5570',
                                  emu_id='emulator-5570')
 
@@ -200,6 +236,12 @@ class Emulators(object):
 
 Emulators.DEFAULT = resolve_default_emulator("EMULATOR_API_VERSION", Emulators.EMU_API_23)
 
+# Console ports of emulators detected by adb server (emulator uses console port and the next one for adb)
+EMULATOR_PORTS = range(5554, 5586, 2)
+
+# Number of emulator ports of each parallel worker (max number of emulators running at the same time in a worker)
+WORKER_EMULATORS = int(os.environ.get('TEST_WORKER_EMULATORS', 2))
+
 
 class Simulators(object):
     SIM_IOS10 = SimulatorInfo(name=os.environ.get('SIM_IOS10', 'iPhone7_10'), device_type='iPhone 7', sdk=10)
@@ -209,6 +251,44 @@ class Simulators(object):
     DEFAULT = SIM_IOS12
 
 
+def get_worker_ports(worker):
+    """
+    Get console ports of emulators of parallel worker (each worker has own block of `WORKER_EMULATORS` ports).
+    :param worker: Index of the worker.
+    :return: List of ports.
+    """
+    return list(EMULATOR_PORTS)[worker * WORKER_EMULATORS:(worker + 1) * WORKER_EMULATORS]
+
+
+def bind_devices_to_worker(worker):
+    """
+    Use devices of parallel worker: emulators get ports of the worker and simulators get names of the worker.
+    Emulators are spread over ports of the worker, so emulators used together (for example default emulator
+    and API 24 emulator) run on different ports. If port is taken by other emulator of the same test class
+    emulator is moved to free port of the worker when it is started (see `DeviceManager.Emulator.start`).
+    Objects are changed in place, so emulators selected by test modules (for example `Emulators.DEFAULT = ...`)
+    use worker devices as well.
+    :param worker: Index of the worker.
+    """
+    ports = get_worker_ports(worker)
+    assert ports, 'No emulator ports left for worker {0}.'.format(worker)
+    emulators = []
+    for emulator in vars(Emulators).values():
+        if isinstance(emulator, EmulatorInfo) and emulator not in emulators:
+            emulators.append(emulator)
+    for index, emulator in enumerate(sorted(emulators, key=lambda item: int(item.port))):
+        port = ports[index % len(ports)]
+        emulator.port = str(port)
+        emulator.emu_id = 'emulator-{0}'.format(port)
+    for simulator in vars(Simulators).values():
+        if isinstance(simulator, SimulatorInfo) and not simulator.name.endswith('_w{0}'.format(worker)):
+            simulator.name = '{0}_w{1}'.format(simulator.name, worker)
+
+
+if WORKERS > 1:
+    bind_devices_to_worker(WORKER)
+
+
 class AppName(object):
     DEFAULT = 'TestApp'
     APP_NAME = 'app'
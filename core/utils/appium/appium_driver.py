@@ -33,11 +33,12 @@ class AppiumDriver(object):
         self.__stop_server()
 
     @staticmethod
-    def kill():
+    def kill(snapshot=None):
         """
         Kill all instance of appium server.
+        :param snapshot: ProcessSnapshot object (if not specified new snapshot of process table is created).
         """
-        Process.kill(proc_name='node', proc_cmdline='appium')
+        Process.kill(proc_name='node', proc_cmdline='appium', snapshot=snapshot)
 
     def __start_server(self):
         Log.info("Starting appium server...")
@@ -0,0 +1,129 @@
+"""
+Inspect zip based archives (apk, aab, ipa) without extraction.
+Only central directory of the archive is read, content of entries is read on demand.
+"""
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+from core.utils.folder_size import SizeNode
+
+
+class ArchiveEntry(object):
+    def __init__(self, name, size, compressed_size, crc):
+        self.name = name
+        self.size = size
+        self.compressed_size = compressed_size
+        self.crc = crc
+
+
+class Archive(object):
+    # Indexes of opened archives: path -> (mtime, size, Archive)
+    __CACHE = {}
+    __LOCK = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = OrderedDict()
+        with zipfile.ZipFile(path, 'r') as archive:
+            for info in archive.infolist():
+                self.entries[info.filename] = ArchiveEntry(name=info.filename, size=info.file_size,
+                                                           compressed_size=info.compress_size, crc=info.CRC)
+
+    @staticmethod
+    def open(path):
+        """
+        Get index of archive (index is reused until archive file is modified).
+        :param path: Path to archive.
+        :return: Archive object.
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        with Archive.__LOCK:
+            cached = Archive.__CACHE.get(key)
+            if cached is not None and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                return cached[2]
+        archive = Archive(path=path)
+        with Archive.__LOCK:
+            Archive.__CACHE[key] = (stat.st_mtime, stat.st_size, archive)
+        return archive
+
+    @staticmethod
+    def __normalize(name):
+        # Zip entries always use forward slashes.
+        return name.replace('\\', '/')
+
+    def names(self, prefix=''):
+        """
+        Get names of entries.
+        :param prefix: Prefix of entry names, for example 'lib/x86/'.
+        """
+        prefix = Archive.__normalize(prefix)
+        return [name for name in self.entries if name.startswith(prefix)]
+
+    def exists(self, name):
+        """
+        Check if entry exists.
+        :param name: Full name of entry, for example 'lib/x86/libNativeScript.so' (folders end with '/').
+        """
+        name = Archive.__normalize(name)
+        if name in self.entries:
+            return True
+        # Archives may not contain entries for folders.
+        folder = name.rstrip('/') + '/'
+        return any(entry.startswith(folder) for entry in self.entries)
+
+    def contains(self, text):
+        """
+        Check if name of any entry contains text.
+        :param text: Text, for example 'x86/libNativeScript.so'.
+        """
+        text = Archive.__normalize(text)
+        return any(text in name for name in self.entries)
+
+    def get_size(self, prefix='', compressed=False):
+        """
+        Get total size of entries.
+        :param prefix: Folder in the archive, for example 'assets/app' (if empty size of all entries is returned).
+        :param compressed: If True return compressed size, otherwise size of extracted files.
+        """
+        prefix = Archive.__normalize(prefix).rstrip('/')
+        if prefix:
+            prefix += '/'
+        return sum(entry.compressed_size if compressed else entry.size
+                   for name, entry in self.entries.items() if name.startswith(prefix))
+
+    def get_size_tree(self, compressed=False):
+        """
+        Get size of all folders in the archive (same as `Folder.get_size_tree` of extracted archive).
+        :param compressed: If True use compressed size of entries, otherwise size of extracted files.
+        :return: SizeNode object.
+        """
+        root = SizeNode(path='')
+        for name, entry in self.entries.items():
+            if name.endswith('/'):
+                parts = name.rstrip('/').split('/')
+                size = None
+            else:
+                parts = name.split('/')[:-1]
+                size = entry.compressed_size if compressed else entry.size
+            node = root
+            for part in parts:
+                if part not in node.children:
+                    node.children[part] = SizeNode(path=node.path + part + '/')
+                node = node.children[part]
+            if size is not None:
+                node.files_size += size
+                node.files_count += 1
+        root.update_totals()
+        return root
+
+    def read(self, name):
+        """
+        Read content of single entry.
+        :param name: Full name of entry.
+        :return: Content as bytes.
+        """
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            return archive.read(Archive.__normalize(name))
@@ -0,0 +1,139 @@
+"""
+Persistent cache of build artifacts (packed templates, runtime packages) shared by test runs on the same host.
+Artifacts are stored by key derived from their origin (for example git commit or npm package version and integrity),
+so cached file is valid as long as the key is the same.
+"""
+import base64
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from core.log.log import Log
+from core.settings import Settings
+from core.utils.file_utils import Folder
+
+LOCK = threading.Lock()
+
+
+class ArtifactCache(object):
+    def __init__(self, folder=Settings.ARTIFACT_CACHE_HOME, max_size=Settings.ARTIFACT_CACHE_SIZE * 1024 * 1024):
+        """
+        :param folder: Cache folder.
+        :param max_size: Max size of cached files in bytes (least recently used are removed), 0 disables the cache.
+        """
+        self.folder = folder
+        self.max_size = max_size
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    @staticmethod
+    def key(*parts):
+        """
+        Get cache key.
+        :param parts: Strings that identify the artifact (for example repo url, commit and template name).
+        :return: Key (sha1 of the parts).
+        """
+        return hashlib.sha1('\n'.join([str(part) for part in parts]).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def integrity(path):
+        """
+        Get integrity of file in format used by npm (`sha512-<base64 digest>`).
+        :param path: Path to file.
+        """
+        digest = hashlib.sha512()
+        with open(path, 'rb') as artifact:
+            for chunk in iter(lambda: artifact.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return 'sha512-' + base64.b64encode(digest.digest()).decode('ascii')
+
+    def __paths(self, key):
+        return os.path.join(self.folder, key + '.bin'), os.path.join(self.folder, key + '.json')
+
+    def get(self, key, target):
+        """
+        Copy cached artifact to target.
+        :param key: Cache key.
+        :param target: Target file path.
+        :return: True if artifact is found in cache and copied, otherwise False.
+        """
+        if not self.enabled:
+            return False
+        data_file, meta_file = self.__paths(key)
+        try:
+            with open(meta_file) as meta:
+                info = json.load(meta)
+            if ArtifactCache.integrity(data_file) != info['integrity']:
+                Log.info('Cached {0} is corrupted.'.format(info['name']))
+                self.__remove(key)
+                return False
+            shutil.copy(data_file, target)
+            # Modification time of meta file is time of last use (used for eviction).
+            os.utime(meta_file, None)
+        except (IOError, OSError, ValueError, KeyError):
+            return False
+        Log.info('{0} restored from cache.'.format(info['name']))
+        return True
+
+    def put(self, key, source, name=None, integrity=None):
+        """
+        Store artifact in cache.
+        :param key: Cache key.
+        :param source: Path to the artifact.
+        :param name: Name of the artifact (used in logs).
+        :param integrity: Expected integrity (artifact is not cached if it does not match).
+        :return: True if artifact is stored.
+        """
+        if not self.enabled:
+            return False
+        actual_integrity = ArtifactCache.integrity(source)
+        if integrity is not None and integrity != actual_integrity:
+            Log.info('Integrity of {0} does not match {1}, it will not be cached.'.format(source, integrity))
+            return False
+        Folder.create(self.folder)
+        data_file, meta_file = self.__paths(key)
+        suffix = '.{0}.{1}.tmp'.format(os.getpid(), threading.current_thread().ident)
+
+        # Write temp files and rename them, so other test runs never see partially written artifact.
+        shutil.copy(source, data_file + suffix)
+        with open(meta_file + suffix, 'w') as meta:
+            json.dump({'name': name or os.path.basename(source), 'integrity': actual_integrity,
+                       'size': os.path.getsize(source), 'time': time.time()}, meta)
+        os.rename(data_file + suffix, data_file)
+        os.rename(meta_file + suffix, meta_file)
+        self.evict()
+        return True
+
+    def __remove(self, key):
+        for path in self.__paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def evict(self):
+        """
+        Remove least recently used artifacts until size of the cache is less than max size.
+        """
+        with LOCK:
+            entries = []
+            for item in os.listdir(self.folder):
+                if item.endswith('.json'):
+                    key = item[:-len('.json')]
+                    data_file, meta_file = self.__paths(key)
+                    try:
+                        entries.append((os.path.getmtime(meta_file), os.path.getsize(data_file), key))
+                    except OSError:
+                        pass
+            total = sum(entry[1] for entry in entries)
+            for _, size, key in sorted(entries):
+                if total <= self.max_size:
+                    break
+                Log.info('Remove {0} from cache ({1} bytes).'.format(key, size))
+                self.__remove(key)
+                total -= size
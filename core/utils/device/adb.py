@@ -1,25 +1,118 @@
 import logging
 import os
 import re
+import shlex
+import socket
+import struct
 import time
 
+import cv2
+import numpy
 from subprocess32 import TimeoutExpired
 
 from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
+from core.utils.device.adb_client import AdbClient, AdbError
+from core.utils.device.log_stream import LogStream
+from core.utils.device.ui_hierarchy import UiHierarchy
 from core.utils.file_utils import File
 from core.utils.process import Process
-from core.utils.run import run
+from core.utils.process_info import ProcessInfo
+from core.utils.run import run, run_output
 from core.utils.version import Version
+from core.utils.wait import Wait
 
 ANDROID_HOME = os.environ.get('ANDROID_HOME')
 ADB_PATH = os.path.join(ANDROID_HOME, 'platform-tools', 'adb')
 
+# Pixel formats of raw `screencap` output (RGBA_8888, RGBX_8888)
+SCREENCAP_FORMATS = (1, 2)
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Commands with these characters are executed by adb executable (they may contain host shell syntax)
+HOST_SHELL_CHARS = '|<>;&$`\\'
+
+# Line of `getprop` output, for example `[ro.product.model]: [Android SDK built for x86]`
+PROPERTY_LINE = re.compile(r'^\[([^\]]+)\]: \[(.*)\]$')
+
+# Device side wait for end of boot (device checks the property, host only waits for the command to exit)
+BOOT_COMPLETED_CHECK = 'while [ "$(getprop sys.boot_completed)" != "1" ]; do sleep 1; done; getprop sys.boot_completed'
+
+# Commands that change UI (cached UI hierarchy of the device is dropped)
+UI_COMMANDS = ('shell input', 'shell am ', 'shell monkey', 'install', 'uninstall')
+
 
 class Adb(object):
+    __AAPT = None
+    __CLIENT = None
+    # Log streams of devices and position of last `clear_logcat` in each stream
+    __LOG_STREAMS = {}
+    __LOG_CURSORS = {}
+    # Read-only system properties of devices (they do not change until device is restarted)
+    __PROPERTIES = {}
+    # Last UI hierarchy dump of devices
+    __UI_HIERARCHIES = {}
+    # Number of commands that changed UI of devices (screenshots captured before change are not reused)
+    __SCREEN_CHANGES = {}
+    # Devices that do not support raw `exec-out screencap` (PNG is used) or `exec-out` at all (screen is pulled)
+    __SCREENCAP_PNG = set()
+    __SCREENCAP_FALLBACK = set()
+
+    @staticmethod
+    def client():
+        """
+        Get client of adb server (None if it is disabled by settings).
+        """
+        if Adb.__CLIENT is None and Settings.ADB_CLIENT:
+            Adb.__CLIENT = AdbClient(port=Settings.ADB_SERVER_PORT)
+        return Adb.__CLIENT
+
+    @staticmethod
+    def __run_with_client(command, device_id, timeout, fail_safe, log_level):
+        # Only device shell commands without host shell syntax (pipes, redirects) are executed by the client.
+        command = command.strip()
+        service, _, args = command.partition(' ')
+        if service not in ('shell', 'logcat') or not args or any(char in args for char in HOST_SHELL_CHARS):
+            return None
+        client = Adb.client()
+        if client is None:
+            return None
+        try:
+            args = ' '.join(shlex.split(args))
+        except ValueError:
+            return None
+        if service == 'logcat':
+            args = 'logcat ' + args
+        cmd = '{0} -s {1} {2}'.format(ADB_PATH, device_id, command)
+        Log.log(level=log_level, msg='Execute command: ' + cmd)
+        start = time.time()
+        try:
+            exit_code, output = client.shell(serial=device_id, command=args, timeout=timeout)
+        except socket.timeout:
+            if not fail_safe:
+                raise TimeoutExpired(cmd, timeout)
+            Log.error('Command "{0}" timeout after {1} seconds.'.format(cmd, timeout))
+            return ProcessInfo(cmd=cmd, complete=False, duration=time.time() - start)
+        except (AdbError, socket.error) as error:
+            # Let adb executable handle (and report) errors like not started server, offline device
+            # or connection reset when emulator is stopped.
+            Log.debug('Failed to execute "{0}" via adb server: {1}'.format(args, error))
+            return None
+        output = output.strip()
+        Log.log(level=log_level, msg='OUTPUT: ' + os.linesep + output + os.linesep)
+        return ProcessInfo(cmd=cmd, exit_code=exit_code, output=output, stdout=output, complete=True,
+                           duration=time.time() - start)
+
     @staticmethod
     def run_adb_command(command, device_id=None, wait=True, timeout=60, fail_safe=False, log_level=logging.DEBUG):
+        if device_id is not None and command.strip().startswith(UI_COMMANDS):
+            Adb.invalidate_screen(device_id)
+        if device_id is not None and wait:
+            result = Adb.__run_with_client(command=command, device_id=device_id, timeout=timeout,
+                                           fail_safe=fail_safe, log_level=log_level)
+            if result is not None:
+                return result
         if device_id is None:
             command = '{0} {1}'.format(ADB_PATH, command)
         else:
@@ -45,49 +138,89 @@ class Adb(object):
                     devices.append(device_id)
         return devices
 
+    @staticmethod
+    def get_logcat_stream(device_id):
+        """
+        Get log stream of device (None if log is not streamed, log is streamed after first `clear_logcat`).
+        :param device_id: Device id.
+        :return: LogStream object.
+        """
+        return Adb.__LOG_STREAMS.get(device_id)
+
+    @staticmethod
+    def stop_logcat_streams():
+        """
+        Stop log streams of all devices.
+        """
+        for stream in Adb.__LOG_STREAMS.values():
+            stream.stop()
+        Adb.__LOG_STREAMS.clear()
+        Adb.__LOG_CURSORS.clear()
+
     @staticmethod
     def get_logcat(device_id):
         """
-        Dump the log and then exit (don't block).
+        Get the log (since last `clear_logcat` if log is streamed, otherwise dump the log and then exit).
         :param device_id: Device id.
         """
-        # sometimes command timeout. Very often on api29. Add a retry that don't wait the process to finish.
-        try:
-            result = Adb.run_adb_command(command='logcat -d', device_id=device_id, wait=True).output
-        except TimeoutExpired:
-            Log.info('get_logcat timeout! Retrying...')
-            command_result = Adb.run_adb_command(command='logcat -d', device_id=device_id, wait=False)
-            time.sleep(15)
-            result = File.read(command_result.log_file)
-            try:
-                os.kill(command_result.pid, 0)
-            except OSError:
-                Log.info('Process already killed...')
-        return result
+        stream = Adb.get_logcat_stream(device_id)
+        if stream is not None:
+            return stream.get_text(since=Adb.__LOG_CURSORS.get(device_id, 0))
+        return Adb.run_adb_command(command='logcat -d', device_id=device_id, wait=True, fail_safe=True).output
 
     @staticmethod
     def clear_logcat(device_id):
         """
-        Clear (flush) the entire log.
+        Clear the log.
+        When log is streamed only position of the stream is remembered,
+        otherwise the log is flushed and streaming starts (if enabled by settings).
         :param device_id: Device id.
         """
-        Adb.run_adb_command(command='logcat -c', device_id=device_id, wait=True)
+        stream = Adb.get_logcat_stream(device_id)
+        if stream is not None and stream.running:
+            Adb.__LOG_CURSORS[device_id] = stream.cursor
+        else:
+            Adb.run_adb_command(command='logcat -c', device_id=device_id, wait=True)
+            if Settings.LOG_STREAM:
+                stream = LogStream(device_id=device_id, adb_path=ADB_PATH, client=Adb.client())
+                stream.start()
+                Adb.__LOG_STREAMS[device_id] = stream
+                Adb.__LOG_CURSORS[device_id] = 0
         Log.info("The logcat on {0} is cleared.".format(device_id))
 
+    @staticmethod
+    def wait_for_logcat(device_id, text, timeout=30):
+        """
+        Wait until text is available in the log (since last `clear_logcat`).
+        :param device_id: Device id.
+        :param text: Text to be searched in the log.
+        :param timeout: Timeout in seconds.
+        :return: True if text found in the log.
+        """
+        stream = Adb.get_logcat_stream(device_id)
+        if stream is not None:
+            return stream.wait_for(text=text, timeout=timeout, since=Adb.__LOG_CURSORS.get(device_id, 0))
+        return Wait.until(lambda: text in Adb.get_logcat(device_id), timeout=timeout, period=1)
+
     @staticmethod
     def __find_aapt():
         """
         Find aapt tool under $ANDROID_HOME/build-tools
         :return: Path to appt.
         """
-        aapt_executable = 'aapt'
-        if Settings.HOST_OS is OSType.WINDOWS:
-            aapt_executable += '.exe'
-        base_path = os.path.join(ANDROID_HOME, 'build-tools')
-        return File.find(base_path=base_path, file_name=aapt_executable, exact_match=True)
+        if Adb.__AAPT is None or not File.exists(Adb.__AAPT):
+            aapt_executable = 'aapt'
+            if Settings.HOST_OS is OSType.WINDOWS:
+                aapt_executable += '.exe'
+            base_path = os.path.join(ANDROID_HOME, 'build-tools')
+            Adb.__AAPT = File.find(base_path=base_path, file_name=aapt_executable, exact_match=True)
+        return Adb.__AAPT
 
     @staticmethod
     def restart():
+        if Settings.WORKERS > 1:
+            Log.info('Adb server is shared by parallel workers, do not restart it.')
+            return
         Log.info("Restart adb.")
         Adb.run_adb_command('kill-server')
         Process.kill(proc_name='adb')
@@ -126,18 +259,93 @@ class Adb(object):
         :param check_interval: Sleep specified time before check again.
         :return: True if device is ready before timeout, otherwise - False.
         """
-        booted = False
-        start_time = time.time()
-        end_time = start_time + timeout
-        while not booted:
-            time.sleep(check_interval)
-            booted = Adb.is_running(device_id=device_id)
-            if (booted is True) or (time.time() > end_time):
-                break
-        return booted
+        end_time = time.time() + timeout
+        if not Adb.wait_for_boot_completed(device_id=device_id, timeout=timeout):
+            return False
+        # Boot is completed, window manager is ready in a moment.
+        return Wait.until(lambda: Adb.is_running(device_id=device_id), timeout=max(end_time - time.time(), 1),
+                          period=1)
+
+    @staticmethod
+    def wait_for_boot_completed(device_id, timeout=250):
+        """
+        Wait until device is connected and `sys.boot_completed` property is set.
+        :param device_id: Device identifier.
+        :param timeout: Timeout in seconds.
+        :return: True if boot is completed before timeout, otherwise - False.
+        """
+        end_time = time.time() + timeout
+        Adb.run_adb_command(command='wait-for-device', device_id=device_id, timeout=timeout, fail_safe=True)
+        client = Adb.client()
+        while time.time() < end_time:
+            remaining = end_time - time.time()
+            if client is not None:
+                try:
+                    exit_code, output = client.shell(serial=device_id, command=BOOT_COMPLETED_CHECK,
+                                                     timeout=remaining)
+                    if exit_code is not None and output.strip() == '1':
+                        return True
+                    # Connection is closed by adbd while booting (empty output and no exit code), check again.
+                    Log.debug('Boot check of {0} interrupted (exit code: {1}).'.format(device_id, exit_code))
+                    time.sleep(1)
+                    continue
+                except socket.timeout:
+                    return False
+                except (AdbError, socket.error) as error:
+                    Log.debug('Failed to check boot of {0} via adb server: {1}'.format(device_id, error))
+            command = '{0} -s {1} shell \'{2}\''.format(ADB_PATH, device_id, BOOT_COMPLETED_CHECK)
+            result = run(cmd=command, timeout=remaining, fail_safe=True)
+            if result.output.strip().endswith('1'):
+                return True
+            if not result.complete:
+                return False
+            # Device is disconnected while booting (for example emulator is restarted).
+            time.sleep(1)
+        return False
+
+    @staticmethod
+    def save_snapshot(device_id, name):
+        """
+        Save emulator state as quickboot snapshot.
+        :param device_id: Emulator identifier.
+        :param name: Snapshot name.
+        :return: True if snapshot is saved.
+        """
+        result = Adb.run_adb_command(command='emu avd snapshot save {0}'.format(name), device_id=device_id,
+                                     timeout=120, fail_safe=True)
+        return result.complete and 'OK' in result.output and 'KO' not in result.output
+
+    @staticmethod
+    def load_snapshot(device_id, name):
+        """
+        Restore emulator state from quickboot snapshot.
+        :param device_id: Emulator identifier.
+        :param name: Snapshot name.
+        :return: True if snapshot is loaded and device is ready.
+        """
+        result = Adb.run_adb_command(command='emu avd snapshot load {0}'.format(name), device_id=device_id,
+                                     timeout=120, fail_safe=True)
+        Adb.invalidate_screen(device_id)
+        if not result.complete or 'OK' not in result.output or 'KO' in result.output:
+            return False
+        return Adb.wait_for_boot_completed(device_id=device_id, timeout=60)
+
+    @staticmethod
+    def get_packages(device_id, third_party=True):
+        """
+        Get installed packages.
+        :param device_id: Device identifier.
+        :param third_party: If True only packages installed by user are listed.
+        :return: Set of package names.
+        """
+        command = 'shell pm list packages{0}'.format(' -3' if third_party else '')
+        output = Adb.run_adb_command(command=command, device_id=device_id, wait=True, fail_safe=True).output
+        return set(line.strip()[len('package:'):] for line in output.splitlines()
+                   if line.strip().startswith('package:'))
 
     @staticmethod
     def reboot(device_id):
+        Adb.forget_properties(device_id=device_id)
         Adb.run_adb_command(command='reboot', device_id=device_id)
         Adb.wait_until_boot(device_id=device_id)
 
@@ -151,10 +359,36 @@ class Adb(object):
 
     @staticmethod
     def pull(device_id, source, target):
+        client = Adb.client()
+        if client is not None:
+            try:
+                size = client.pull(serial=device_id, remote=source, local=target)
+                return ProcessInfo(cmd='pull {0} {1}'.format(source, target), exit_code=0,
+                                   output='{0}: 1 file pulled. ({1} bytes)'.format(source, size))
+            except (AdbError, socket.error) as error:
+                Log.debug('Failed to pull {0} from {1} via adb server: {2}'.format(source, device_id, error))
+                File.delete(path=target)
         return Adb.run_adb_command(command='pull {0} {1}'.format(source, target), device_id=device_id)
 
     @staticmethod
     def get_page_source(device_id):
+        """
+        Dump UI hierarchy.
+        :param device_id: Device id.
+        :return: UI hierarchy as xml (empty string if dump failed).
+        """
+        # Dump to tty, so xml is received in memory without writing, pulling and deleting a file.
+        output = Adb.exec_out(command='uiautomator dump /dev/tty', device_id=device_id)
+        if output is not None:
+            output = output.decode('utf-8', 'replace')
+            start = output.find('<?xml')
+            end = output.rfind('</hierarchy>')
+            if start >= 0 and end > start:
+                return output[start:end + len('</hierarchy>')]
+        return Adb.__dump_page_source(device_id)
+
+    @staticmethod
+    def __dump_page_source(device_id):
         temp_file = os.path.join(Settings.TEST_OUT_TEMP, 'window_dump.xml')
         File.delete(temp_file)
         Adb.run_adb_command(command='shell rm /sdcard/window_dump.xml', device_id=device_id)
@@ -174,6 +408,50 @@ class Adb(object):
             # In such cases return empty string.
             return ''
 
+    @staticmethod
+    def get_ui_hierarchy(device_id, max_age=None):
+        """
+        Get UI hierarchy of device (dump is reused by queries until it is too old or UI is changed by adb command).
+        :param device_id: Device id.
+        :param max_age: Max age of reused dump in seconds (default is `Settings.UI_CACHE_TTL`).
+        :return: UiHierarchy object.
+        """
+        if max_age is None:
+            max_age = Settings.UI_CACHE_TTL
+        hierarchy = Adb.__UI_HIERARCHIES.get(device_id)
+        if hierarchy is None or hierarchy.age >= max_age:
+            hierarchy = UiHierarchy(xml=Adb.get_page_source(device_id), captured_at=time.time())
+            Adb.__UI_HIERARCHIES[device_id] = hierarchy
+        return hierarchy
+
+    @staticmethod
+    def invalidate_ui_hierarchy(device_id=None):
+        """
+        Drop cached UI hierarchy of device (of all devices if device_id is not specified).
+        :param device_id: Device id.
+        """
+        if device_id is None:
+            Adb.__UI_HIERARCHIES.clear()
+        else:
+            Adb.__UI_HIERARCHIES.pop(device_id, None)
+
+    @staticmethod
+    def invalidate_screen(device_id):
+        """
+        Drop cached UI hierarchy and screenshots of device (called after commands that change UI).
+        :param device_id: Device id.
+        """
+        Adb.__SCREEN_CHANGES[device_id] = Adb.__SCREEN_CHANGES.get(device_id, 0) + 1
+        Adb.invalidate_ui_hierarchy(device_id)
+
+    @staticmethod
+    def get_screen_changes(device_id):
+        """
+        Get number of UI changes of device (screenshot is outdated if number changed since it was captured).
+        :param device_id: Device id.
+        """
+        return Adb.__SCREEN_CHANGES.get(device_id, 0)
+
     # noinspection PyPep8Naming
     @staticmethod
     def is_text_visible(device_id, text, case_sensitive=False):
@@ -204,32 +482,98 @@ class Adb(object):
         else:
             assert False, 'Element with text ' + text + ' not found!'
 
-    # noinspection PyPep8Naming
     @staticmethod
     def get_element_by_text(device_id, text, case_sensitive=False):
-        import xml.etree.ElementTree as ET
-        page_source = Adb.get_page_source(device_id)
-        if page_source != '':
-            xml = ET.ElementTree(ET.fromstring(page_source))
-            elements = xml.findall(".//node[@text]")
-            if elements:
-                for element in elements:
-                    if case_sensitive:
-                        if text in element.attrib['text']:
-                            return element
-                    else:
-                        if text.lower() in element.attrib['text'].lower():
-                            return element
-        return None
+        return Adb.get_ui_hierarchy(device_id).find(text=text, case_sensitive=case_sensitive)
+
+    @staticmethod
+    def exec_out(command, device_id, timeout=60):
+        """
+        Execute command on device and get its binary output (without pty, so output is not modified).
+        :param command: Command, for example 'screencap -p'.
+        :param device_id: Device id.
+        :param timeout: Timeout in seconds.
+        :return: Output as bytes (None if command failed).
+        """
+        client = Adb.client()
+        if client is not None:
+            try:
+                return client.exec_out(serial=device_id, command=command, timeout=timeout)
+            except (AdbError, socket.error) as error:
+                Log.debug('Failed to execute "{0}" on {1} via adb server: {2}'.format(command, device_id, error))
+        args = [ADB_PATH, '-s', device_id, 'exec-out'] + command.split(' ')
+        try:
+            exit_code, output = run_output(args=args, timeout=timeout)
+        except (TimeoutExpired, OSError) as error:
+            Log.debug('Failed to execute "{0}" on {1}: {2}'.format(command, device_id, error))
+            return None
+        return output if exit_code == 0 else None
+
+    @staticmethod
+    def decode_screencap(data):
+        """
+        Decode raw output of `screencap` (header with width, height and pixel format followed by RGBA pixels).
+        :param data: Output of `screencap` as bytes.
+        :return: Image as opencv object (numpy array with BGR channels), None if format is not supported.
+        """
+        if data is None or len(data) < 12:
+            return None
+        width, height, pixel_format = struct.unpack('<III', data[:12])
+        # Header is 12 bytes (16 bytes with color space since Android 9).
+        header = len(data) - width * height * 4
+        if pixel_format not in SCREENCAP_FORMATS or header not in (12, 16):
+            return None
+        pixels = numpy.frombuffer(data, dtype=numpy.uint8, offset=header).reshape(height, width, 4)
+        return numpy.ascontiguousarray(pixels[:, :, 2::-1])
+
+    @staticmethod
+    def get_screen_image(device_id):
+        """
+        Get screen of device in memory (single `exec-out screencap`, nothing is written to device or host disk).
+        :param device_id: Device id.
+        :return: Image as opencv object (numpy array with BGR channels), None if device does not support it
+        or capture failed.
+        """
+        # Device is switched to slower capture only when its output is not supported (not on timeouts or errors).
+        if device_id in Adb.__SCREENCAP_FALLBACK:
+            return None
+        if not Adb.__can_exec_out(device_id):
+            Adb.__SCREENCAP_FALLBACK.add(device_id)
+            return None
+        image = None
+        if device_id not in Adb.__SCREENCAP_PNG:
+            # Raw pixels are not encoded on device, so it is much faster than PNG (but transfer is bigger).
+            data = Adb.exec_out(command='screencap', device_id=device_id)
+            if data is None:
+                return None
+            image = Adb.decode_screencap(data)
+            if image is None:
+                Log.debug('Raw screenshots of {0} are not supported, use PNG.'.format(device_id))
+                Adb.__SCREENCAP_PNG.add(device_id)
+        if image is None:
+            png = Adb.exec_out(command='screencap -p', device_id=device_id)
+            if png is None:
+                return None
+            if png.startswith(PNG_SIGNATURE):
+                image = cv2.imdecode(numpy.frombuffer(png, dtype=numpy.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                Log.debug('In-memory screenshots are not supported by {0}.'.format(device_id))
+                Adb.__SCREENCAP_FALLBACK.add(device_id)
+        return image
 
     @staticmethod
     def get_screen(device_id, file_path):
         File.delete(path=file_path)
-        if Settings.HOST_OS == OSType.WINDOWS and 'emulator' in device_id:
-            Adb.run_adb_command(command='exec-out screencap -p > ' + file_path,
-                                device_id=device_id,
-                                log_level=logging.DEBUG)
+        png = None
+        if device_id not in Adb.__SCREENCAP_FALLBACK and Adb.__can_exec_out(device_id):
+            png = Adb.exec_out(command='screencap -p', device_id=device_id)
+        if png is not None and png.startswith(PNG_SIGNATURE):
+            with open(file_path, 'wb') as image_file:
+                image_file.write(png)
         else:
+            # Devices without `exec-out` (or with broken output) save the screen on device and pull it.
+            if png is not None:
+                Adb.__SCREENCAP_FALLBACK.add(device_id)
             Adb.run_adb_command(command='shell rm /sdcard/image.png', device_id=device_id)
             Adb.run_adb_command(command='shell screencap -p /sdcard/image.png', device_id=device_id)
             result = Adb.run_adb_command(command='pull /sdcard/image.png {0}'.format(file_path), device_id=device_id)
@@ -241,6 +585,14 @@ class Adb(object):
         else:
             raise Exception('Failed to get screen of {0}.'.format(device_id))
 
+    @staticmethod
+    def __can_exec_out(device_id):
+        # `exec-out` is supported since Android 5.0 (API 21), unknown version is tried.
+        try:
+            return int(Adb.get_property(device_id=device_id, name='ro.build.version.sdk')) >= 21
+        except ValueError:
+            return True
+
     @staticmethod
     def get_device_version(device_id):
         result = Adb.run_adb_command(command='shell getprop ro.build.version.release', device_id=device_id)
@@ -263,6 +615,17 @@ class Adb(object):
         :param device_id: Device id.
         :param time_out: command timeout interval.
         """
+        Adb.invalidate_screen(device_id)
+        client = Adb.client()
+        if client is not None:
+            try:
+                output = client.install(serial=device_id, apk_path=apk_path, timeout=time_out)
+                if 'Success' in output:
+                    Log.info('{0} installed successfully on {1}.'.format(apk_path, device_id))
+                    return
+                Log.debug('Failed to install {0} via adb server. Output: {1}'.format(apk_path, output))
+            except (AdbError, socket.error) as error:
+                Log.debug('Failed to install {0} via adb server: {1}'.format(apk_path, error))
         command = '-s {0} install -r {1}'.format(device_id, apk_path)
         result = Adb.run_adb_command(command=command, timeout=time_out, wait=True)
         # Retry to install the app. Recently too many attempts failed from first time.
@@ -311,14 +674,11 @@ class Adb(object):
         :param timeout: Timeout in seconds.
         :return: True if path exists, false if path does not exists
         """
-        t_end = time.time() + timeout
-        found = False
-        while time.time() < t_end:
+        def exists():
             files = Adb.__list_path(device_id=device_id, package_id=package_id, path=file_name)
-            if 'No such file or directory' not in files:
-                found = True
-                break
-        return found
+            return 'No such file or directory' not in files
+
+        return bool(Wait.poll(exists, timeout=timeout, period=0.5, backoff=1.5, max_period=3))
 
     @staticmethod
     def start_application(device_id, app_id):
@@ -361,8 +721,75 @@ class Adb(object):
         Get device version
         :param device_id: Device identifier as float.
         """
-        result = Adb.run_adb_command(command='shell getprop ro.build.version.release', wait=True, device_id=device_id)
-        return Version.get(result.output)
+        return Version.get(Adb.get_property(device_id=device_id, name='ro.build.version.release'))
+
+    @staticmethod
+    def get_properties(device_id):
+        """
+        Get all system properties of device (single `getprop` call).
+        :param device_id: Device identifier.
+        :return: Dict of property values by names (empty if device is not available).
+        """
+        output = Adb.run_adb_command(command='shell getprop', device_id=device_id, wait=True, fail_safe=True).output
+        properties = Adb.parse_properties(output)
+        read_only = dict((name, value) for name, value in properties.items() if name.startswith('ro.'))
+        if read_only:
+            Adb.__PROPERTIES[device_id] = read_only
+        return properties
+
+    @staticmethod
+    def parse_properties(output):
+        """
+        Parse output of `getprop`.
+        :param output: Output of `getprop`.
+        :return: Dict of property values by names.
+        """
+        properties = {}
+        for line in (output or '').splitlines():
+            match = PROPERTY_LINE.match(line.strip())
+            if match:
+                properties[match.group(1)] = match.group(2)
+        return properties
+
+    @staticmethod
+    def get_property(device_id, name):
+        """
+        Get system property of device (read-only properties are read once per device).
+        :param device_id: Device identifier.
+        :param name: Property name, for example `ro.product.model`.
+        :return: Property value (empty string if property is not set).
+        """
+        if name.startswith('ro.'):
+            properties = Adb.__PROPERTIES.get(device_id)
+            if properties is None:
+                Adb.get_properties(device_id=device_id)
+                properties = Adb.__PROPERTIES.get(device_id, {})
+            return properties.get(name, '')
+        return Adb.get_properties(device_id=device_id).get(name, '')
+
+    @staticmethod
+    def get_abi(device_id):
+        """
+        Get primary ABI of device, for example `x86` or `arm64-v8a`.
+        :param device_id: Device identifier.
+        """
+        return Adb.get_property(device_id=device_id, name='ro.product.cpu.abi')
+
+    @staticmethod
+    def forget_properties(device_id=None):
+        """
+        Drop cached system properties and screen capture methods of device (of all devices if device_id
+        is not specified). Call it when device is restarted or other emulator is started with same id.
+        :param device_id: Device identifier.
+        """
+        if device_id is None:
+            Adb.__PROPERTIES.clear()
+            Adb.__SCREENCAP_PNG.clear()
+            Adb.__SCREENCAP_FALLBACK.clear()
+        else:
+            Adb.__PROPERTIES.pop(device_id, None)
+            Adb.__SCREENCAP_PNG.discard(device_id)
+            Adb.__SCREENCAP_FALLBACK.discard(device_id)
 
     @staticmethod
     def get_active_services(device_id, service_name=""):
@@ -0,0 +1,339 @@
+"""
+Client of adb server (adb host protocol over TCP), so adb commands do not spawn `adb` process.
+
+Protocol: https://android.googlesource.com/platform/packages/modules/adb/+/refs/heads/master/OVERVIEW.TXT
+Each request is `<4 hex digits length><payload>` and the server answers `OKAY` or `FAIL<4 hex digits length><error>`.
+Connection switched to a device service (shell, exec) is closed when the service ends,
+but connection in sync mode (push, pull, stat) can serve many requests, so sync connections are pooled per device.
+"""
+import os
+import socket
+import struct
+import threading
+import time
+
+from core.log.log import Log
+
+# Max size of DATA packet in sync mode
+SYNC_DATA_MAX = 64 * 1024
+
+# Printed after shell command to get its exit code (legacy shell protocol does not report it)
+EXIT_CODE_MARKER = 'ADB_CLIENT_EXIT_CODE:'
+
+
+class AdbError(Exception):
+    pass
+
+
+class AdbSyncError(AdbError):
+    """
+    Request in sync mode failed (connection can still be used).
+    """
+
+
+class AdbStream(object):
+    def __init__(self, sock):
+        self.__sock = sock
+
+    def __iter__(self):
+        buffer = b''
+        try:
+            while True:
+                try:
+                    chunk = self.__sock.recv(SYNC_DATA_MAX)
+                except (socket.error, OSError):
+                    # Stream is closed.
+                    break
+                if not chunk:
+                    break
+                buffer += chunk
+                lines = buffer.split(b'\n')
+                buffer = lines.pop()
+                for line in lines:
+                    yield line.rstrip(b'\r').decode('utf-8', 'replace')
+            if buffer:
+                yield buffer.rstrip(b'\r').decode('utf-8', 'replace')
+        finally:
+            self.__sock.close()
+
+    def close(self):
+        """
+        Stop reading (can be called from other thread, blocked reader is released).
+        """
+        try:
+            self.__sock.shutdown(socket.SHUT_RDWR)
+        except (socket.error, OSError):
+            pass
+        self.__sock.close()
+
+
+class AdbClient(object):
+    def __init__(self, host='127.0.0.1', port=5037, timeout=60):
+        """
+        :param host: Host of adb server.
+        :param port: Port of adb server.
+        :param timeout: Default timeout of socket operations in seconds.
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.__sync_pool = {}
+        self.__lock = threading.Lock()
+
+    def __connect(self, timeout=None):
+        try:
+            return socket.create_connection((self.host, self.port), timeout=timeout or self.timeout)
+        except (socket.error, OSError) as error:
+            raise AdbError('Failed to connect adb server at {0}:{1}: {2}'.format(self.host, self.port, error))
+
+    @staticmethod
+    def __read(sock, size):
+        data = b''
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise AdbError('Connection closed by adb server.')
+            data += chunk
+        return data
+
+    @staticmethod
+    def __read_all(sock):
+        chunks = []
+        while True:
+            chunk = sock.recv(SYNC_DATA_MAX)
+            if not chunk:
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    @staticmethod
+    def __request(sock, payload):
+        payload = payload.encode('utf-8')
+        sock.sendall('{0:04x}'.format(len(payload)).encode('ascii') + payload)
+        status = AdbClient.__read(sock, 4)
+        if status == b'FAIL':
+            length = int(AdbClient.__read(sock, 4), 16)
+            raise AdbError(AdbClient.__read(sock, length).decode('utf-8', 'replace'))
+        if status != b'OKAY':
+            raise AdbError('Unexpected response of adb server: {0}'.format(status))
+
+    def __query(self, payload):
+        # Host request with length prefixed response, for example `host:version`.
+        sock = self.__connect()
+        try:
+            AdbClient.__request(sock, payload)
+            length = int(AdbClient.__read(sock, 4), 16)
+            return AdbClient.__read(sock, length).decode('utf-8')
+        finally:
+            sock.close()
+
+    def __open(self, serial, service, timeout=None):
+        sock = self.__connect(timeout=timeout)
+        try:
+            AdbClient.__request(sock, 'host:transport:{0}'.format(serial))
+            AdbClient.__request(sock, service)
+        except (AdbError, socket.error, OSError):
+            sock.close()
+            raise
+        return sock
+
+    def version(self):
+        return int(self.__query('host:version'), 16)
+
+    def devices(self):
+        """
+        Get devices connected to adb server.
+        :return: List of tuples (serial, state).
+        """
+        devices = []
+        for line in self.__query('host:devices').splitlines():
+            if '\t' in line:
+                serial, state = line.split('\t', 1)
+                devices.append((serial, state.strip()))
+        return devices
+
+    def shell(self, serial, command, timeout=None):
+        """
+        Execute shell command on device.
+        :param serial: Device serial.
+        :param command: Shell command.
+        :param timeout: Timeout in seconds (socket.timeout is raised on timeout).
+        :return: Tuple (exit code, output as text).
+        """
+        service = 'shell:{0}; echo {1}$?'.format(command, EXIT_CODE_MARKER)
+        sock = self.__open(serial=serial, service=service, timeout=timeout)
+        try:
+            output = AdbClient.__read_all(sock).decode('utf-8', 'replace').replace('\r\n', '\n')
+        finally:
+            sock.close()
+        exit_code = None
+        position = output.rfind(EXIT_CODE_MARKER)
+        if position >= 0:
+            try:
+                exit_code = int(output[position + len(EXIT_CODE_MARKER):].strip())
+            except ValueError:
+                pass
+            output = output[:position]
+        return exit_code, output
+
+    def exec_out(self, serial, command, timeout=None):
+        """
+        Execute command on device without pty (binary output is not modified).
+        :param serial: Device serial.
+        :param command: Command.
+        :param timeout: Timeout in seconds (socket.timeout is raised on timeout).
+        :return: Output as bytes.
+        """
+        sock = self.__open(serial=serial, service='exec:{0}'.format(command), timeout=timeout)
+        try:
+            return AdbClient.__read_all(sock)
+        finally:
+            sock.close()
+
+    def stream(self, serial, command):
+        """
+        Execute shell command on device and read its output while it is running.
+        :param serial: Device serial.
+        :param command: Shell command, for example `logcat -v threadtime`.
+        :return: AdbStream object (iterate it to get output lines, close it to stop the command).
+        """
+        sock = self.__open(serial=serial, service='shell:{0}'.format(command))
+        sock.settimeout(None)
+        return AdbStream(sock)
+
+    def logcat(self, serial, args='-d'):
+        """
+        Get device log.
+        :param serial: Device serial.
+        :param args: Logcat arguments (default dumps the log and exits).
+        :return: Log as text.
+        """
+        return self.shell(serial=serial, command='logcat {0}'.format(args))[1]
+
+    def __acquire_sync(self, serial):
+        with self.__lock:
+            idle = self.__sync_pool.get(serial)
+            if idle:
+                return idle.pop()
+        return self.__open(serial=serial, service='sync:')
+
+    def __release_sync(self, serial, sock):
+        with self.__lock:
+            self.__sync_pool.setdefault(serial, []).append(sock)
+
+    def __sync(self, serial, action):
+        sock = self.__acquire_sync(serial)
+        try:
+            result = action(sock)
+        except AdbSyncError:
+            self.__release_sync(serial, sock)
+            raise
+        except Exception:
+            sock.close()
+            raise
+        self.__release_sync(serial, sock)
+        return result
+
+    @staticmethod
+    def __sync_request(sock, request_id, payload):
+        if not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+        sock.sendall(request_id + struct.pack('<I', len(payload)) + payload)
+
+    @staticmethod
+    def __sync_response(sock):
+        response_id = AdbClient.__read(sock, 4)
+        length = struct.unpack('<I', AdbClient.__read(sock, 4))[0]
+        if response_id == b'FAIL':
+            raise AdbSyncError(AdbClient.__read(sock, length).decode('utf-8', 'replace'))
+        return response_id, length
+
+    def stat(self, serial, path):
+        """
+        Get mode, size and modification time of file on device.
+        :param serial: Device serial.
+        :param path: Path on device.
+        :return: Tuple (mode, size, mtime), mode is 0 if file does not exist.
+        """
+        def action(sock):
+            AdbClient.__sync_request(sock, b'STAT', path)
+            response = AdbClient.__read(sock, 16)
+            if response[:4] != b'STAT':
+                raise AdbError('Unexpected response of STAT: {0}'.format(response[:4]))
+            return struct.unpack('<III', response[4:])
+
+        return self.__sync(serial, action)
+
+    def pull(self, serial, remote, local):
+        """
+        Copy file from device.
+        :param serial: Device serial.
+        :param remote: Path on device.
+        :param local: Path on host.
+        :return: Size of the file.
+        """
+        def action(sock):
+            AdbClient.__sync_request(sock, b'RECV', remote)
+            size = 0
+            with open(local, 'wb') as local_file:
+                while True:
+                    response_id, length = AdbClient.__sync_response(sock)
+                    if response_id == b'DONE':
+                        return size
+                    if response_id != b'DATA':
+                        raise AdbError('Unexpected response of RECV: {0}'.format(response_id))
+                    local_file.write(AdbClient.__read(sock, length))
+                    size += length
+
+        return self.__sync(serial, action)
+
+    def push(self, serial, local, remote, mode=0o644):
+        """
+        Copy file to device.
+        :param serial: Device serial.
+        :param local: Path on host.
+        :param remote: Path on device.
+        :param mode: File mode on device.
+        """
+        def action(sock):
+            AdbClient.__sync_request(sock, b'SEND', '{0},{1}'.format(remote, 0o100000 | mode))
+            with open(local, 'rb') as local_file:
+                for chunk in iter(lambda: local_file.read(SYNC_DATA_MAX), b''):
+                    AdbClient.__sync_request(sock, b'DATA', chunk)
+            sock.sendall(b'DONE' + struct.pack('<I', int(time.time())))
+            response_id, _ = AdbClient.__sync_response(sock)
+            if response_id != b'OKAY':
+                raise AdbError('Unexpected response of SEND: {0}'.format(response_id))
+
+        self.__sync(serial, action)
+
+    def install(self, serial, apk_path, reinstall=True, timeout=None):
+        """
+        Install application (apk is pushed to device and installed with package manager).
+        :param serial: Device serial.
+        :param apk_path: Path to apk on host.
+        :param reinstall: If True keep data of installed app (`pm install -r`).
+        :param timeout: Timeout in seconds.
+        :return: Output of package manager.
+        """
+        remote = '/data/local/tmp/{0}'.format(os.path.basename(apk_path))
+        self.push(serial=serial, local=apk_path, remote=remote)
+        try:
+            command = 'pm install {0}"{1}"'.format('-r ' if reinstall else '', remote)
+            return self.shell(serial=serial, command=command, timeout=timeout)[1]
+        finally:
+            self.shell(serial=serial, command='rm -f "{0}"'.format(remote))
+
+    def close(self):
+        """
+        Close pooled connections.
+        """
+        with self.__lock:
+            for connections in self.__sync_pool.values():
+                for sock in connections:
+                    try:
+                        AdbClient.__sync_request(sock, b'QUIT', b'')
+                        sock.close()
+                    except (socket.error, OSError):
+                        pass
+            self.__sync_pool.clear()
+        Log.debug('Connections to adb server at {0}:{1} closed.'.format(self.host, self.port))
@@ -2,6 +2,7 @@
 import logging
 import os
 import time
+import uuid
 
 from core.enums.device_type import DeviceType
 from core.enums.os_type import OSType
@@ -9,10 +10,11 @@ from core.log.log import Log
 from core.settings import Settings
 from core.utils.device.adb import Adb
 from core.utils.device.idevice import IDevice
+from core.utils.device.screen_frame import ScreenFrame
+from core.utils.device.screen_stream import ScreenStream, STREAM_FRAMES
 from core.utils.device.simctl import Simctl
 from core.utils.file_utils import File, Folder
 from core.utils.image_utils import ImageUtils
-from core.utils.run import run
 from core.utils.wait import Wait
 
 if Settings.HOST_OS is OSType.OSX:
@@ -20,6 +22,9 @@ if Settings.HOST_OS is OSType.OSX:
 
 
 class Device(object):
+    # Changed when screens of all devices might be changed (for example when app files are synced)
+    __SCREEN_EPOCH = 0
+
     # noinspection PyShadowingBuiltins
     def __init__(self, id, name, type, model, version):
         self.id = id
@@ -27,18 +32,17 @@ class Device(object):
         self.version = version
         self.model = model
         self.name = name
+        self.__frame = None
+        self.__stream = None
 
         if type is DeviceType.IOS:
-            type = run(cmd="ideviceinfo | grep ProductType").output
+            type = IDevice.get_product_type(device_id=self.id)
             type = type.replace(',', '')
-            type = type.replace('ProductType:', '').strip(' ')
             self.name = type
         if type is DeviceType.SIM:
             self.model = name
         if type is DeviceType.EMU:
-            cmd = 'shell getprop ro.product.model'
-            model = Adb.run_adb_command(command=cmd, wait=True, device_id=self.id).output
-            self.model = model.strip('\n\r')
+            self.model = Adb.get_property(device_id=self.id, name='ro.product.model')
         else:
             self.name = name
 
@@ -47,7 +51,11 @@ class Device(object):
 
     def are_texts_visible(self, texts):
         is_list = isinstance(texts, list)
-        if is_list:
+        if is_list and (self.type is DeviceType.EMU or self.type is DeviceType.ANDROID):
+            # All texts are searched in single dump of UI hierarchy.
+            hierarchy = Adb.get_ui_hierarchy(self.id)
+            return all(hierarchy.find(text=text) is not None for text in texts)
+        elif is_list:
             all_texts_visible = True
             for text in texts:
                 is_visible = self.is_text_visible(text)
@@ -76,13 +84,7 @@ class Device(object):
         return is_visible
 
     def get_text(self):
-        img_name = "actual_{0}_{1}.png".format(self.id, time.time())
-        actual_image_path = os.path.join(Settings.TEST_OUT_IMAGES, img_name)
-        File.delete(actual_image_path)
-        self.get_screen(path=actual_image_path, log_level=logging.DEBUG)
-        text = ImageUtils.get_text(image_path=actual_image_path)
-        File.delete(path=actual_image_path)
-        return text
+        return self.get_frame().text
 
     def wait_for_text(self, text, timeout=60, retry_delay=1, case_sensitive=False):
         """
@@ -92,18 +94,17 @@ class Device(object):
         :param retry_delay: Retry interval in seconds.
         :param case_sensitive: Should text be case sensitive.
         """
-        t_end = time.time() + timeout
-        found = False
         error_msg = '{0} NOT found on {1}.'.format(text, self.name)
         found_msg = '{0} found on {1}.'.format(text, self.name)
-        while time.time() < t_end:
+
+        def is_visible():
             if self.is_text_visible(text=text, case_sensitive=case_sensitive):
-                found = True
                 Log.info(found_msg)
-                break
-            else:
-                Log.info(error_msg + ' Waiting ...')
-                time.sleep(retry_delay)
+                return True
+            Log.info(error_msg + ' Waiting ...')
+            return False
+
+        found = Wait.until(is_visible, timeout=timeout, period=retry_delay)
         if not found:
             text = self.get_text()
             Log.info('Current text: {0}{1}'.format(os.linesep, text))
@@ -140,38 +141,135 @@ class Device(object):
             Log.error(message)
             raise Exception(message)
 
-    def screen_match(self, expected_image, tolerance=0.1, timeout=30):
+    def get_frame(self, max_age=Settings.SCREEN_CACHE_TTL):
+        """
+        Get screenshot of the device.
+        Screenshot is reused by consecutive queries until it is older than max age or screen is invalidated.
+        :param max_age: Max age of reused screenshot in seconds (0 always captures new screenshot).
+        :return: ScreenFrame object.
+        """
+        epoch = self.get_screen_epoch()
+        if self.__stream is not None:
+            frame = self.__stream.latest()
+            if frame is not None and frame.epoch == epoch and frame.age < max_age:
+                return frame
+        frame = self.__frame
+        if frame is not None and frame.epoch == epoch and frame.age < max_age:
+            return frame
+        frame = self.capture_frame()
+        self.invalidate_screen()
+        self.__frame = frame
+        return frame
+
+    def capture_frame(self):
+        """
+        Capture new screenshot of the device (screenshot is not cached).
+        :return: ScreenFrame object.
+        """
+        captured_at = time.time()
+        epoch = self.get_screen_epoch()
+        file_name = 'screen_{0}_{1}.png'.format(int(captured_at * 1000), uuid.uuid4().hex[:8])
+        image_path = os.path.join(Settings.TEST_OUT_IMAGES, self.name, file_name)
+        image = None
+        if self.type is DeviceType.EMU or self.type is DeviceType.ANDROID:
+            image = Adb.get_screen_image(device_id=self.id)
+        if image is None:
+            self.get_screen(image_path, log_level=logging.DEBUG)
+        return ScreenFrame(path=image_path, epoch=epoch, captured_at=captured_at, image=image)
+
+    def get_screen_epoch(self):
+        """
+        Get screen epoch of the device (screenshots captured in other epoch are outdated).
+        Screen is changed by sync of app files (all devices) or by UI commands executed with Adb (single device).
+        """
+        if self.type is DeviceType.EMU or self.type is DeviceType.ANDROID:
+            return Device.__SCREEN_EPOCH, Adb.get_screen_changes(self.id)
+        return Device.__SCREEN_EPOCH, 0
+
+    def start_screen_stream(self, video=True, max_frames=STREAM_FRAMES):
+        """
+        Capture screen continuously, visual waits check each new frame instead of taking screenshots periodically.
+        :param video: If True record video when device supports it, otherwise capture screenshots in a loop.
+        :param max_frames: Number of frames kept in memory.
+        """
+        if self.__stream is None:
+            self.__stream = ScreenStream(device=self, max_frames=max_frames, video=video)
+            self.__stream.start()
+
+    def stop_screen_stream(self):
+        if self.__stream is not None:
+            self.__stream.stop()
+            self.__stream = None
+
+    def wait_for_screen(self, condition, timeout=30, since=None, period=1):
+        """
+        Wait until screen satisfies condition.
+        :param condition: Function that accepts ScreenFrame object.
+        :param timeout: Timeout in seconds.
+        :param since: Check only screens captured after this time, for example time when app files are changed
+        (used only when screen stream is started).
+        :param period: Time between screenshots (used only when screen stream is not started).
+        :return: ScreenFrame that satisfies the condition (None if not found before timeout).
+        When screen stream is started `frame.time - since` is latency of the change.
+        """
+        if self.__stream is not None:
+            return self.__stream.wait_for(condition=condition, timeout=timeout, since=since)
+
+        def check():
+            frame = self.get_frame(max_age=0)
+            return frame if condition(frame) else None
+
+        return Wait.poll(check, timeout=timeout, period=period)
+
+    def invalidate_screen(self):
+        """
+        Drop cached screenshot of the device (call it after actions that change the screen).
+        """
+        if self.__frame is not None:
+            self.__frame.delete()
+            self.__frame = None
+        if self.type is DeviceType.EMU or self.type is DeviceType.ANDROID:
+            Adb.invalidate_ui_hierarchy(self.id)
+
+    @staticmethod
+    def invalidate_screens():
+        """
+        Drop cached screenshots of all devices (for example after app files are changed).
+        """
+        Device.__SCREEN_EPOCH += 1
+        Adb.invalidate_ui_hierarchy()
+
+    def screen_match(self, expected_image, tolerance=0.1, timeout=30, region=None, ignore=None):
         """
         Verify screen match expected image.
         :param expected_image: Name of expected image.
         :param tolerance: Tolerance in percents.
         :param timeout: Timeout in seconds.
+        :param region: Compare only pixels in region (left, top, right, bottom).
+        :param ignore: List of regions (left, top, right, bottom) that are not compared.
         """
 
         if File.exists(expected_image):
-            match = False
             error_msg = 'Screen of {0} does NOT match {1}.'.format(self.name, expected_image)
-            t_end = time.time() + timeout
-            diff_image = None
-            while time.time() < t_end:
-                actual_image = expected_image.replace('.png', '_actual.png')
-                self.get_screen(path=actual_image, log_level=logging.DEBUG)
-                result = ImageUtils.image_match(actual_image=actual_image,
-                                                expected_image=expected_image,
-                                                tolerance=tolerance)
-                if result[0]:
-                    Log.info('Screen of {0} matches {1}.'.format(self.name, expected_image))
-                    match = True
-                    break
-                else:
-                    diff_image = result[2]
-                    error_msg += ' Diff is {0} %.'.format(result[1])
-                    Log.info(error_msg)
-                    time.sleep(3)
-            if not match:
-                if diff_image is not None:
-                    diff_image_path = expected_image.replace('.png', '_diff.png')
-                    diff_image.save(diff_image_path)
+            actual_image = expected_image.replace('.png', '_actual.png')
+            last = {}
+
+            def matches(frame):
+                last['frame'] = frame
+                last['result'] = ImageUtils.image_match(actual_image=frame.image, expected_image=expected_image,
+                                                        tolerance=tolerance, region=region, ignore=ignore)
+                if not last['result'][0]:
+                    Log.info(error_msg + ' Diff is {0} %.'.format(last['result'][1]))
+                return last['result'][0]
+
+            match = self.wait_for_screen(condition=matches, timeout=timeout, period=3) is not None
+            if last:
+                File.copy(source=last['frame'].path, target=actual_image)
+            if match:
+                Log.info('Screen of {0} matches {1}.'.format(self.name, expected_image))
+            elif last:
+                error_msg += ' Diff is {0} %.'.format(last['result'][1])
+                last['result'][2].save(expected_image.replace('.png', '_diff.png'))
             assert match, error_msg
         else:
             Log.info('Expected image not found!')
@@ -181,43 +279,38 @@ class Device(object):
             assert False, "Expected image not found!"
 
     def get_pixels_by_color(self, color):
-        image_path = os.path.join(Settings.TEST_OUT_IMAGES, self.name,
-                                  'screen_{0}.png'.format(int(time.time() * 1000)))
-        self.get_screen(image_path, log_level=logging.DEBUG)
-        result = ImageUtils.get_pixels_by_color(image_path, color)
-        File.delete(path=image_path)
-        return result
+        return self.get_frame().colors.get_pixels_by_color(color=color)
+
+    def get_pixels_by_colors(self, colors):
+        return self.get_frame().colors.get_pixels_by_colors(colors=colors)
 
     # noinspection PyShadowingBuiltins
     def wait_for_color(self, color, pixel_count, delta=10, timeout=30):
-        found = False
-        t_end = time.time() + timeout
-        err_msg = ''
-        while time.time() < t_end:
-            count = self.get_pixels_by_color(color=color)
-            msg = '{0} pixels of type {1} found on {2}'.format(count, str(color), self.name)
-            err_msg = msg + ' Expected count: {0}'.format(pixel_count)
-            min_count = pixel_count - int(pixel_count * delta / 100)
-            max_count = pixel_count + int(pixel_count * delta / 100)
-            if min_count <= count <= max_count:
-                Log.info(msg)
-                found = True
-                break
-            else:
-                Log.info(err_msg)
-                time.sleep(1)
-        assert found, err_msg
+        min_count = pixel_count - int(pixel_count * delta / 100)
+        max_count = pixel_count + int(pixel_count * delta / 100)
+        messages = []
+
+        def has_color(frame):
+            count = frame.colors.get_pixels_by_color(color=color)
+            messages.append('{0} pixels of type {1} found on {2}'.format(count, str(color), self.name))
+            found = min_count <= count <= max_count
+            Log.info(messages[-1] if found else messages[-1] + ' Expected count: {0}'.format(pixel_count))
+            return found
+
+        found = self.wait_for_screen(condition=has_color, timeout=timeout) is not None
+        message = messages[-1] if messages else 'No screen of {0} captured.'.format(self.name)
+        assert found, message + ' Expected count: {0}'.format(pixel_count)
 
     def get_main_color(self):
-        image_path = os.path.join(Settings.TEST_OUT_IMAGES, self.name, 'screen_{0}.png'.format(int(time.time() * 1000)))
-        self.get_screen(image_path, log_level=logging.DEBUG)
-        result = ImageUtils.get_main_color(image_path)
-        File.delete(path=image_path)
-        return result
+        return self.get_frame().colors.get_main_color()
 
     # noinspection PyUnresolvedReferences
     def wait_for_main_color(self, color, timeout=60):
-        result = Wait.until(lambda: (self.get_main_color() == color).all(), timeout=timeout)
+        if self.__stream is not None:
+            result = self.wait_for_screen(lambda screen: (screen.colors.get_main_color() == color).all(),
+                                          timeout=timeout) is not None
+        else:
+            result = Wait.until(lambda: (self.get_main_color() == color).all(), timeout=timeout)
         if result:
             Log.info('Main color is: ' + str(color))
         assert result, "Expected main color: " + str(color) + os.linesep + \
@@ -231,6 +324,7 @@ class Device(object):
             SimAuto.click(self, text=text)
         else:
             raise NotImplementedError('Click not implemented for iOS devices.')
+        self.invalidate_screen()
         Log.info('Click on "{0}" text.'.format(text))
 
     def clear_log(self):
@@ -263,4 +357,6 @@ class Device(object):
         :param timeout: Timeout in seconds.
         :return: True if text found in device logs.
         """
+        if self.type is DeviceType.EMU or self.type is DeviceType.ANDROID:
+            return Adb.wait_for_logcat(device_id=self.id, text=text, timeout=timeout)
         return Wait.until(lambda: text in self.get_log(), timeout=timeout, period=1)
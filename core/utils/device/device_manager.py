@@ -1,33 +1,50 @@
 import os
+from multiprocessing.pool import ThreadPool
 
 from core.base_test.test_context import TestContext
 from core.enums.device_type import DeviceType
+from core.enums.os_type import OSType
 from core.log.log import Log
+from core.settings import Settings
 from core.utils.device.adb import Adb, ANDROID_HOME
 from core.utils.device.device import Device
+from core.utils.device.emulator_pool import EmulatorPool
 from core.utils.device.idevice import IDevice
 from core.utils.device.simctl import Simctl
 from core.utils.file_utils import Folder
 from core.utils.java import Java
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
 from core.utils.run import run
+from core.utils.wait import Wait
+
+# Max number of devices queried in parallel
+DISCOVERY_WORKERS = 8
 
 
 class DeviceManager(object):
     @staticmethod
     def get_devices(device_type=any):
-        devices = []
-        # Get Android devices
+        def get_android_device(device_id):
+            version = Adb.get_version(device_id=device_id)
+            return Device(id=device_id, name=device_id, type=DeviceType.ANDROID, version=version, model=None)
+
+        def get_ios_device(device_id):
+            return Device(id=device_id, name=device_id, type=DeviceType.IOS, version=None, model=None)
+
+        # Devices are queried in parallel (each device answers slowly, but devices do not block each other).
+        jobs = []
         if device_type is DeviceType.ANDROID or device_type is any:
-            for device_id in Adb.get_ids(include_emulators=False):
-                version = Adb.get_version(device_id=device_id)
-                device = Device(id=device_id, name=device_id, type=DeviceType.ANDROID, version=version, model=None)
-                devices.append(device)
-        # Get iOS devices
+            jobs.extend([(get_android_device, device_id) for device_id in Adb.get_ids(include_emulators=False)])
         if device_type is DeviceType.IOS or device_type is any:
-            for device_id in IDevice.get_devices():
-                device = Device(id=device_id, name=device_id, type=DeviceType.IOS, version=None, model=None)
-                devices.append(device)
+            jobs.extend([(get_ios_device, device_id) for device_id in IDevice.get_devices()])
+        devices = []
+        if jobs:
+            pool = ThreadPool(processes=min(DISCOVERY_WORKERS, len(jobs)))
+            try:
+                devices = pool.map(lambda job: job[0](job[1]), jobs)
+            finally:
+                pool.close()
+                pool.join()
 
         for device in devices:
             TestContext.STARTED_DEVICES.append(device)
@@ -49,16 +66,18 @@ class DeviceManager(object):
             Stop all running emulators.
             """
             Log.info('Stop all running emulators...')
-            Process.kill_by_commandline('qemu')
-            Process.kill_by_commandline('emulator64')
-
-            Process.kill('emulator64-arm')
-            Process.kill('emulator64-x86')
-            Process.kill('emulator-arm')
-            Process.kill('emulator-x86')
-            Process.kill('qemu-system-arm')
-            Process.kill('qemu-system-i386')
-            Process.kill('qemu-system-i38')
+            Adb.stop_logcat_streams()
+            Adb.forget_properties()
+            EmulatorPool.remove()
+            snapshot = ProcessSnapshot()
+            processes = snapshot.find_by_commandline('qemu')
+            processes.extend(snapshot.find_by_commandline('emulator64'))
+            for name in ['emulator64-arm', 'emulator64-x86', 'emulator-arm', 'emulator-x86', 'qemu-system-arm',
+                         'qemu-system-i386', 'qemu-system-i38']:
+                if Settings.HOST_OS is OSType.WINDOWS:
+                    name += '.exe'
+                processes.extend(snapshot.find_by_name(proc_name=name))
+            Process.kill_trees(processes=processes)
 
         @staticmethod
         def start(emulator):
@@ -76,20 +95,52 @@ class DeviceManager(object):
                 options = '-port {0} -no-snapshot-save -no-boot-anim -no-audio -snapshot {1}'.format(emulator.port,
                                                                                                      snapshot_name)
 
+            if Settings.WORKERS > 1:
+                # Same avd can run in more workers only if its files are not changed.
+                options += ' -read-only'
+                DeviceManager.Emulator.__free_port(emulator)
+
             command = '{0} @{1} {2}'.format(emulator_path, emulator.avd, options)
             Log.info('Booting {0} with cmd:'.format(emulator.avd))
             Log.info(command)
+            Adb.forget_properties(device_id=emulator.emu_id)
             run(cmd=command, wait=False, register=False)
             booted = Adb.wait_until_boot(device_id=emulator.emu_id)
             if booted:
                 Log.info('{0} is up and running!'.format(emulator.avd))
                 device = Device(id=emulator.emu_id, model=emulator.model, name=emulator.avd, type=DeviceType.EMU,
                                 version=emulator.os_version)
+                if Settings.EMULATOR_POOL:
+                    device = EmulatorPool.add(emulator=emulator, device=device)
                 TestContext.STARTED_DEVICES.append(device)
                 return device
             else:
                 raise Exception('Failed to boot {0}!'.format(emulator.avd))
 
+        @staticmethod
+        def __free_port(emulator):
+            """
+            Free port of emulator in parallel worker (emulators of the worker share few ports).
+            Emulators started by current test class keep running, emulator gets other port of the worker instead.
+            :param emulator: EmulatorInfo object.
+            """
+            used = [getattr(device, 'id', None) for device in TestContext.STARTED_DEVICES]
+            if emulator.emu_id in used:
+                ports = [port for port in Settings.get_worker_ports(Settings.WORKER)
+                         if 'emulator-{0}'.format(port) not in used]
+                if not ports:
+                    raise Exception('No free emulator port for {0}, increase TEST_WORKER_EMULATORS.'.format(
+                        emulator.avd))
+                emulator.port = str(ports[0])
+                emulator.emu_id = 'emulator-{0}'.format(ports[0])
+
+            # Emulator left by previous test class of the worker might run on the port.
+            if emulator.emu_id in Adb.get_ids(include_emulators=True):
+                Log.info('Stop {0} to free port {1}.'.format(emulator.emu_id, emulator.port))
+                EmulatorPool.remove(emulator_id=emulator.emu_id)
+                Adb.run_adb_command(command='emu kill', device_id=emulator.emu_id, fail_safe=True)
+                Wait.until(lambda: emulator.emu_id not in Adb.get_ids(include_emulators=True), timeout=30)
+
         @staticmethod
         def is_available(avd_name):
             if Java.version() > 1.8:
@@ -119,6 +170,11 @@ class DeviceManager(object):
 
         @staticmethod
         def ensure_available(emulator, force_start=False):
+            if Settings.EMULATOR_POOL and not force_start:
+                device = EmulatorPool.lease(emulator)
+                if device is not None:
+                    TestContext.STARTED_DEVICES.append(device)
+                    return device
             if DeviceManager.Emulator.is_running(emulator=emulator) and not force_start:
                 return emulator
             elif DeviceManager.Emulator.is_available(avd_name=emulator.avd):
@@ -145,12 +201,18 @@ class DeviceManager(object):
             Stop running simulators (by default stop all simulators)
             :param sim_id: Device identifier (Simulator ID)
             """
-            if sim_id == 'booted':
+            if sim_id == 'booted' and Settings.WORKERS > 1:
+                # Simulators of other parallel workers keep running.
+                for device in TestContext.STARTED_DEVICES:
+                    if device.type is DeviceType.SIM:
+                        DeviceManager.Simulator.stop(sim_id=device.id)
+            elif sim_id == 'booted':
                 Log.info('Stop all running simulators.')
-                Process.kill('Simulator')
-                Process.kill('tail')
-                Process.kill('launchd_sim')
-                Process.kill_by_commandline('CoreSimulator')
+                snapshot = ProcessSnapshot()
+                Process.kill('Simulator', snapshot=snapshot)
+                Process.kill('tail', snapshot=snapshot)
+                Process.kill('launchd_sim', snapshot=snapshot)
+                Process.kill_by_commandline('CoreSimulator', snapshot=snapshot)
             else:
                 Log.info('Stop simulator with id ' + sim_id)
                 run(cmd='xcrun simctl shutdown {0}'.format(sim_id), timeout=60)
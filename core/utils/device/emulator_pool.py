@@ -0,0 +1,117 @@
+"""
+Pool of running emulators shared by test classes (used when `Settings.EMULATOR_POOL` is enabled).
+
+Emulator is booted once, its clean state is saved as quickboot snapshot and the snapshot is loaded when emulator
+is leased again (seconds instead of cold boot). If snapshot can not be saved or loaded, apps installed after
+the emulator was added to the pool are uninstalled instead.
+"""
+from core.log.log import Log
+from core.utils.device.adb import Adb
+
+# Name of quickboot snapshot with clean state of pooled emulator
+POOL_SNAPSHOT = 'pool_clean'
+
+
+class PooledEmulator(object):
+    def __init__(self, emulator, device):
+        """
+        :param emulator: EmulatorInfo object.
+        :param device: Device object of running emulator.
+        """
+        self.emulator = emulator
+        self.device = device
+        self.leased = False
+        self.used = False
+        self.snapshot = False
+        self.packages = set()
+
+
+class EmulatorPool(object):
+    # Pooled emulators by emulator id
+    __EMULATORS = {}
+
+    @staticmethod
+    def add(emulator, device):
+        """
+        Add booted emulator to the pool (clean state is saved) and lease it.
+        :param emulator: EmulatorInfo object.
+        :param device: Device object of running emulator.
+        :return: Device object.
+        """
+        pooled = PooledEmulator(emulator=emulator, device=device)
+        pooled.packages = Adb.get_packages(device_id=device.id)
+        pooled.snapshot = Adb.save_snapshot(device_id=device.id, name=POOL_SNAPSHOT)
+        if not pooled.snapshot:
+            Log.info('Failed to save snapshot of {0}, apps will be uninstalled to reset it.'.format(emulator.avd))
+        EmulatorPool.__EMULATORS[device.id] = pooled
+        return EmulatorPool.__lease(pooled)
+
+    @staticmethod
+    def lease(emulator):
+        """
+        Lease pooled emulator (state is reset if emulator was used by other test class).
+        :param emulator: EmulatorInfo object.
+        :return: Device object (None if emulator is not in the pool or its state can not be reset).
+        """
+        pooled = EmulatorPool.__EMULATORS.get(emulator.emu_id)
+        if pooled is None or pooled.emulator.avd != emulator.avd:
+            return None
+        if pooled.leased:
+            # Leased by other test class that did not release it, reset it anyway.
+            Log.debug('{0} is not released.'.format(emulator.avd))
+        if not Adb.is_running(device_id=pooled.device.id):
+            Log.info('Pooled {0} is not running.'.format(emulator.avd))
+            EmulatorPool.remove(emulator_id=pooled.device.id)
+            return None
+        if pooled.used and not EmulatorPool.__reset(pooled):
+            Log.info('Failed to reset state of {0}.'.format(emulator.avd))
+            EmulatorPool.remove(emulator_id=pooled.device.id)
+            return None
+        return EmulatorPool.__lease(pooled)
+
+    @staticmethod
+    def release(device):
+        """
+        Release leased emulator (it keeps running and can be leased again).
+        :param device: Device object.
+        """
+        pooled = EmulatorPool.__EMULATORS.get(device.id)
+        if pooled is not None:
+            pooled.leased = False
+
+    @staticmethod
+    def release_all():
+        for pooled in EmulatorPool.__EMULATORS.values():
+            pooled.leased = False
+
+    @staticmethod
+    def remove(emulator_id=None):
+        """
+        Remove emulator from the pool (all emulators if emulator_id is not specified), for example when it is stopped.
+        :param emulator_id: Emulator identifier.
+        """
+        if emulator_id is None:
+            EmulatorPool.__EMULATORS.clear()
+        else:
+            EmulatorPool.__EMULATORS.pop(emulator_id, None)
+
+    @staticmethod
+    def __lease(pooled):
+        pooled.leased = True
+        pooled.used = True
+        Log.info('{0} leased from emulator pool.'.format(pooled.emulator.avd))
+        return pooled.device
+
+    @staticmethod
+    def __reset(pooled):
+        device_id = pooled.device.id
+        if pooled.snapshot:
+            if Adb.load_snapshot(device_id=device_id, name=POOL_SNAPSHOT):
+                Log.info('{0} restored from snapshot.'.format(pooled.emulator.avd))
+                return True
+            pooled.snapshot = False
+            Log.info('Failed to load snapshot of {0}, uninstall apps instead.'.format(pooled.emulator.avd))
+        for app_id in sorted(Adb.get_packages(device_id=device_id) - pooled.packages):
+            Adb.uninstall(app_id=app_id, device_id=device_id, assert_success=False)
+        Adb.open_home(device_id=device_id)
+        return not Adb.get_packages(device_id=device_id) - pooled.packages
@@ -6,6 +6,8 @@ from core.utils.run import run
 
 
 class IDevice(object):
+    # Product types of devices (for example `iPhone10,1`)
+    __PRODUCT_TYPES = {}
 
     @staticmethod
     def get_devices():
@@ -14,9 +16,9 @@ class IDevice(object):
         """
         device_ids = list()
         output = run(cmd='idevice_id --list', timeout=60).output
+        known_devices = run(cmd='instruments -s', timeout=30).output.splitlines()
         for line in output.splitlines():
-            command = 'instruments -s | grep {0}'.format(line)
-            check_connected = run(cmd=command, timeout=30).output
+            check_connected = '\n'.join([device for device in known_devices if line in device])
             if 'null' not in check_connected:
                 device_ids.append(line)
             else:
@@ -24,6 +26,18 @@ class IDevice(object):
                 Log.error(message)
         return device_ids
 
+    @staticmethod
+    def get_product_type(device_id):
+        """
+        Get product type of iOS real device (it is read once per device).
+        :param device_id: Device identifier.
+        :return: Product type, for example `iPhone10,1`.
+        """
+        if device_id not in IDevice.__PRODUCT_TYPES:
+            output = run(cmd='ideviceinfo -u {0} -k ProductType'.format(device_id), timeout=60).output
+            IDevice.__PRODUCT_TYPES[device_id] = output.replace('ProductType:', '').strip()
+        return IDevice.__PRODUCT_TYPES[device_id]
+
     @staticmethod
     def get_screen(device_id, file_path):
         """
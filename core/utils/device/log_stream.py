@@ -0,0 +1,218 @@
+"""
+Incremental reader of Android device log.
+
+Single `logcat -v threadtime` process (or adb server connection) per device streams the log into ring buffer of lines.
+Lines get increasing sequence numbers (cursor), so readers get only lines added after their cursor
+and clearing the log is just a move of the cursor (device log is not flushed).
+"""
+import collections
+import re
+import shlex
+import subprocess
+import threading
+import time
+
+import psutil
+
+from core.base_test.test_context import TestContext
+from core.log.log import Log
+from core.utils.device.adb_client import AdbError
+from core.utils.log_tail import StringMatcher
+
+# Number of log lines kept in memory
+STREAM_LINES = 100000
+
+# Time of `threadtime` log line, for example `05-29 14:20:31.337`
+LINE_TIME = re.compile(r'^(\d\d-\d\d \d\d:\d\d:\d\d\.\d\d\d) ')
+
+
+class ProcessStream(object):
+    """
+    Output lines of `adb logcat` process (used when adb server client is not available).
+    """
+
+    def __init__(self, args):
+        self.__process = psutil.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    def __iter__(self):
+        for line in iter(self.__process.stdout.readline, b''):
+            yield line.rstrip(b'\r\n').decode('utf-8', 'replace')
+        self.__process.wait()
+
+    def close(self):
+        try:
+            self.__process.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+class LogStream(object):
+    def __init__(self, device_id, adb_path, client=None, args='', max_lines=STREAM_LINES):
+        """
+        :param device_id: Device id.
+        :param adb_path: Path to adb executable (used when client is not specified or can not connect the device).
+        :param client: AdbClient object.
+        :param args: Additional logcat arguments (filters), for example `--pid=1234` or `JS:V *:S`.
+        :param max_lines: Number of lines kept in memory.
+        """
+        self.device_id = device_id
+        self.adb_path = adb_path
+        self.client = client
+        self.args = args
+        self.lines = collections.deque(maxlen=max_lines)
+        self.__cursor = 0
+        self.__last_time = None
+        self.__last_lines = collections.Counter()
+        self.__replay = None
+        self.__running = False
+        self.__source = None
+        self.__thread = None
+        self.__condition = threading.Condition()
+
+    @property
+    def running(self):
+        return self.__running
+
+    @property
+    def cursor(self):
+        """
+        Sequence number of last line in the log (lines added later have greater numbers).
+        """
+        with self.__condition:
+            return self.__cursor
+
+    def start(self):
+        if self.__running:
+            return
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run, name='LogStream-{0}'.format(self.device_id))
+        self.__thread.daemon = True
+        self.__thread.start()
+        Log.debug('Log stream of {0} started.'.format(self.device_id))
+
+    def stop(self):
+        if not self.__running:
+            return
+        self.__running = False
+        self.__close_source()
+        self.__thread.join(timeout=10)
+        with self.__condition:
+            self.__condition.notify_all()
+        Log.debug('Log stream of {0} stopped ({1} lines read).'.format(self.device_id, self.__cursor))
+
+    def read(self, since=0):
+        """
+        Get lines added after cursor.
+        :param since: Cursor (lines older than lines kept in memory are not returned).
+        :return: Tuple (list of lines, new cursor).
+        """
+        with self.__condition:
+            count = min(self.__cursor - since, len(self.lines))
+            if count <= 0:
+                return [], self.__cursor
+            return list(self.lines)[-count:], self.__cursor
+
+    def get_text(self, since=0):
+        """
+        Get log added after cursor.
+        :param since: Cursor.
+        :return: Log as text.
+        """
+        return '\n'.join(self.read(since=since)[0])
+
+    def wait_for(self, text, timeout=30, since=0):
+        """
+        Wait until text is available in the log (only new lines are scanned, waiting ends as soon as line arrives).
+        :param text: Text to be searched in the log.
+        :param timeout: Timeout in seconds.
+        :param since: Cursor (search only lines added after it).
+        :return: True if text found in the log.
+        """
+        deadline = TestContext.DEADLINE
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        end_time = time.time() + timeout
+        matcher = StringMatcher([text])
+        position = since
+        while True:
+            lines, position = self.read(since=position)
+            if lines:
+                if matcher.scan('\n'.join(lines) + '\n'):
+                    return True
+                continue
+            with self.__condition:
+                remaining = end_time - time.time()
+                if remaining <= 0 or not self.__running:
+                    return False
+                if self.__cursor == position:
+                    self.__condition.wait(remaining)
+
+    def __add(self, line):
+        match = LINE_TIME.match(line)
+        line_time = match.group(1) if match else None
+        if self.__replay is not None:
+            # After reconnect the log is read again from time of the last line, skip lines that are already read
+            # until the stream passes them (out of order and repeated lines are accepted again after that).
+            if self.__is_replayed(line=line, line_time=line_time):
+                return
+            self.__replay = None
+        if line_time is not None:
+            if self.__last_time is None or line_time > self.__last_time:
+                self.__last_time = line_time
+                self.__last_lines = collections.Counter()
+            if line_time == self.__last_time:
+                self.__last_lines[line] += 1
+        with self.__condition:
+            self.__cursor += 1
+            self.lines.append(line)
+            self.__condition.notify_all()
+
+    def __is_replayed(self, line, line_time):
+        if line_time is None:
+            # Buffer headers like `--------- beginning of main`.
+            return True
+        if line_time < self.__last_time:
+            return True
+        if line_time == self.__last_time and self.__replay[line] > 0:
+            self.__replay[line] -= 1
+            return True
+        return False
+
+    def __open_source(self):
+        command = 'logcat -v threadtime'
+        if self.__last_time is not None:
+            command += " -T '{0}'".format(self.__last_time)
+        if self.args:
+            command += ' ' + self.args
+        if self.client is not None:
+            try:
+                return self.client.stream(serial=self.device_id, command=command)
+            except AdbError as error:
+                Log.debug('Failed to stream log of {0} via adb server: {1}'.format(self.device_id, error))
+        return ProcessStream([self.adb_path, '-s', self.device_id] + shlex.split(command))
+
+    def __close_source(self):
+        source = self.__source
+        if source is not None:
+            source.close()
+
+    def __run(self):
+        while self.__running:
+            try:
+                if self.__last_time is not None:
+                    self.__replay = collections.Counter(self.__last_lines)
+                self.__source = self.__open_source()
+                if not self.__running:
+                    self.__close_source()
+                for line in self.__source:
+                    if not self.__running:
+                        break
+                    self.__add(line)
+            except Exception as error:  # pylint: disable=broad-except
+                Log.debug('Failed to read log of {0}: {1}'.format(self.device_id, error))
+            finally:
+                self.__close_source()
+                self.__source = None
+            if self.__running:
+                # Device is rebooted or disconnected, continue from time of the last line.
+                time.sleep(1)
@@ -0,0 +1,82 @@
+"""
+Screenshot of device screen shared by consecutive queries (image is decoded and analyzed only once).
+"""
+import os
+import time
+
+from core.utils.file_utils import File, Folder
+from core.utils.image_colors import ImageColors
+from core.utils.image_utils import ImageUtils
+
+
+class ScreenFrame(object):
+    def __init__(self, path, epoch, captured_at, image=None):
+        """
+        :param path: Path to screenshot (screenshot captured in memory is saved there on first use of the path).
+        :param epoch: Screen epoch of the device when screenshot was captured.
+        :param captured_at: Time when capture started.
+        :param image: Screenshot captured in memory as opencv object.
+        """
+        self.__path = path
+        self.__saved = image is None
+        self.epoch = epoch
+        self.time = captured_at
+        self.__image = image
+        self.__colors = None
+        self.__text = None
+
+    @property
+    def age(self):
+        return time.time() - self.time
+
+    @property
+    def path(self):
+        """
+        Path to screenshot file.
+        """
+        if not self.__saved:
+            Folder.create(os.path.dirname(self.__path))
+            ImageUtils.write_image(image=self.__image, image_path=self.__path)
+            self.__saved = True
+        return self.__path
+
+    @property
+    def image(self):
+        """
+        Screenshot as opencv object (numpy array with BGR channels).
+        """
+        self.load()
+        return self.__image
+
+    def load(self):
+        """
+        Decode screenshot file (after that the file can be deleted, it is saved again if path is used).
+        :return: ScreenFrame object.
+        """
+        if self.__image is None:
+            self.__image = ImageUtils.read_image(image_path=self.path)
+        return self
+
+    @property
+    def colors(self):
+        """
+        Color statistics of the screenshot (ImageColors object).
+        """
+        if self.__colors is None:
+            self.__colors = ImageColors(self.image)
+        return self.__colors
+
+    @property
+    def text(self):
+        """
+        Text on the screenshot (OCR).
+        """
+        if self.__text is None:
+            self.__text = ImageUtils.get_text(image_path=self.path)
+        return self.__text
+
+    def delete(self):
+        if self.__saved:
+            File.delete(path=self.__path)
+            # Decoded image can be saved again if path is used later.
+            self.__saved = self.__image is None
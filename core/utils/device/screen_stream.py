@@ -0,0 +1,170 @@
+"""
+Continuous capture of device screen into ring buffer of frames (used by visual waits when streaming is enabled).
+
+Android devices stream `screenrecord` h264 output decoded by OpenCV (new frame is received as soon as screen changes).
+Other devices (or Android devices where recording fails) capture screenshots in a loop.
+"""
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+import cv2
+import psutil
+
+from core.enums.device_type import DeviceType
+from core.enums.os_type import OSType
+from core.log.log import Log
+from core.settings import Settings
+from core.utils.device.adb import ADB_PATH
+from core.utils.device.screen_frame import ScreenFrame
+from core.utils.process import Process
+
+# Number of frames kept in memory
+STREAM_FRAMES = 30
+
+# Max time of single `screenrecord` session (it is restarted when time limit is reached)
+RECORD_TIME_LIMIT = 180
+
+
+class ScreenStream(object):
+    def __init__(self, device, max_frames=STREAM_FRAMES, video=True):
+        """
+        :param device: Device object.
+        :param max_frames: Number of frames kept in memory.
+        :param video: If True use video recording when device supports it, otherwise capture screenshots in a loop.
+        """
+        self.device = device
+        self.video = video
+        self.frames = collections.deque(maxlen=max_frames)
+        self.backend = None
+        self.__sequence = 0
+        self.__running = False
+        self.__process = None
+        self.__thread = None
+        self.__condition = threading.Condition()
+
+    @property
+    def running(self):
+        return self.__running
+
+    def start(self):
+        if self.__running:
+            return
+        self.__running = True
+        self.__thread = threading.Thread(target=self.__run, name='ScreenStream-{0}'.format(self.device.id))
+        self.__thread.daemon = True
+        self.__thread.start()
+        Log.info('Screen stream of {0} started.'.format(self.device.name))
+
+    def stop(self):
+        if not self.__running:
+            return
+        self.__running = False
+        self.__stop_process()
+        self.__thread.join(timeout=10)
+        with self.__condition:
+            self.__condition.notify_all()
+            for _, frame in self.frames:
+                frame.delete()
+            self.frames.clear()
+        Log.info('Screen stream of {0} stopped ({1} frames captured).'.format(self.device.name, self.__sequence))
+
+    def latest(self):
+        """
+        Get last captured frame.
+        :return: ScreenFrame object (None if no frame is captured yet).
+        """
+        with self.__condition:
+            return self.frames[-1][1] if self.frames else None
+
+    def wait_for(self, condition, timeout=30, since=None):
+        """
+        Wait until condition is satisfied for a frame (each new frame is checked as soon as it is captured).
+        :param condition: Function that accepts ScreenFrame object.
+        :param timeout: Timeout in seconds.
+        :param since: Check only frames captured after this time (by default last frame and all new frames).
+        :return: First ScreenFrame that satisfies the condition (None if not found before timeout).
+        """
+        end_time = time.time() + timeout
+        with self.__condition:
+            last_sequence = self.frames[-1][0] - 1 if self.frames and since is None else 0
+        while True:
+            with self.__condition:
+                pending = [(sequence, frame) for sequence, frame in self.frames
+                           if sequence > last_sequence and (since is None or frame.time >= since)]
+                if not pending:
+                    remaining = end_time - time.time()
+                    if remaining <= 0 or not self.__running:
+                        return None
+                    self.__condition.wait(remaining)
+                    continue
+            for sequence, frame in pending:
+                last_sequence = sequence
+                if condition(frame):
+                    return frame
+
+    def __add(self, frame):
+        with self.__condition:
+            self.__sequence += 1
+            if len(self.frames) == self.frames.maxlen:
+                self.frames[0][1].delete()
+            self.frames.append((self.__sequence, frame))
+            self.__condition.notify_all()
+
+    def __frame_path(self, captured_at):
+        file_name = 'stream_{0}_{1}.png'.format(int(captured_at * 1000), uuid.uuid4().hex[:8])
+        return os.path.join(Settings.TEST_OUT_IMAGES, self.device.name, file_name)
+
+    def __run(self):
+        can_record = self.video and Settings.HOST_OS != OSType.WINDOWS and \
+            self.device.type in (DeviceType.EMU, DeviceType.ANDROID)
+        while self.__running and can_record:
+            self.backend = 'screenrecord'
+            if self.__record() == 0 and self.__running:
+                Log.info('Failed to record screen of {0}, capture screenshots instead.'.format(self.device.name))
+                can_record = False
+        while self.__running:
+            self.backend = 'screenshot'
+            try:
+                # Decode the frame here, so it does not depend on the file that is deleted when frame is dropped.
+                self.__add(self.device.capture_frame().load())
+            except Exception as error:  # pylint: disable=broad-except
+                Log.debug('Failed to capture screen of {0}: {1}'.format(self.device.name, error))
+                time.sleep(1)
+
+    def __record(self):
+        # OpenCV can not read from python streams, so h264 stream is passed via named pipe.
+        folder = tempfile.mkdtemp()
+        fifo = os.path.join(folder, 'screen.h264')
+        os.mkfifo(fifo)
+        cmd = '"{0}" -s {1} exec-out screenrecord --output-format=h264 --time-limit {2} - > "{3}"' \
+            .format(ADB_PATH, self.device.id, RECORD_TIME_LIMIT, fifo)
+        frames = 0
+        try:
+            self.__process = psutil.Popen(cmd, shell=True)
+            capture = cv2.VideoCapture(fifo)
+            while self.__running:
+                # Epoch before the frame is received, so frame that shows screen before a change is outdated.
+                epoch = self.device.get_screen_epoch()
+                ok, image = capture.read()
+                if not ok:
+                    break
+                captured_at = time.time()
+                self.__add(ScreenFrame(path=self.__frame_path(captured_at), epoch=epoch, captured_at=captured_at,
+                                       image=image))
+                frames += 1
+            capture.release()
+        finally:
+            self.__stop_process()
+            shutil.rmtree(folder, ignore_errors=True)
+        return frames
+
+    def __stop_process(self):
+        process = self.__process
+        if process is not None:
+            Process.kill_trees(processes=[process], timeout=2)
+            self.__process = None
@@ -1,12 +1,12 @@
 import json
 import os
-import time
 
 from core.log.log import Log
 from core.utils.file_utils import File
 from core.utils.process import Process
 from core.utils.run import run
 from core.utils.version import Version
+from core.utils.wait import Wait
 
 
 class Simctl(object):
@@ -98,15 +98,7 @@ class Simctl(object):
         :param timeout: Timeout until device is ready (in seconds).
         :return: SimulatorInfo object with defined id, otherwise - False.
         """
-        booted = False
-        start_time = time.time()
-        end_time = start_time + timeout
-        while not booted:
-            time.sleep(2)
-            booted = Simctl.is_running(simulator_info)
-            if booted or time.time() > end_time:
-                return booted
-        return booted
+        return Wait.poll(lambda: Simctl.is_running(simulator_info), timeout=timeout, period=2)
 
     @staticmethod
     def is_available(simulator_info):
@@ -0,0 +1,83 @@
+"""
+Snapshot of Android UI hierarchy (`uiautomator dump`) shared by consecutive text queries.
+
+XML is parsed once and texts of nodes are indexed, so checks of many texts cost single dump of the hierarchy.
+"""
+import re
+import time
+import xml.etree.ElementTree as ET
+
+from core.log.log import Log
+
+BOUNDS = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+
+class UiHierarchy(object):
+    def __init__(self, xml, captured_at=None):
+        """
+        :param xml: Output of `uiautomator dump` as text or UTF-8 bytes (empty string if dump failed).
+        :param captured_at: Time when dump started.
+        """
+        self.xml = xml
+        self.time = time.time() if captured_at is None else captured_at
+        self.nodes = []
+        self.by_text = {}
+        self.by_folded_text = {}
+        if xml:
+            # Parse UTF-8 bytes, on Python 2 ElementTree can not parse unicode with non ASCII characters.
+            data = xml if isinstance(xml, bytes) else xml.encode('utf-8')
+            try:
+                self.nodes = [node for node in ET.fromstring(data).iter('node') if 'text' in node.attrib]
+            except ET.ParseError as error:
+                Log.debug('Failed to parse UI hierarchy: {0}'.format(error))
+        for node in self.nodes:
+            text = node.attrib['text']
+            self.by_text.setdefault(text, []).append(node)
+            self.by_folded_text.setdefault(text.lower(), []).append(node)
+        # All texts in one string, so missing text is detected without iterating nodes.
+        self.__texts = '\n'.join(self.by_text)
+        self.__folded_texts = self.__texts.lower()
+
+    @property
+    def age(self):
+        return time.time() - self.time
+
+    def find(self, text, case_sensitive=False, exact=False):
+        """
+        Find first node (in document order) with text.
+        :param text: Text.
+        :param case_sensitive: Should text be case sensitive.
+        :param exact: If True text of node should be equal to text, otherwise text of node should contain text.
+        :return: Node as ElementTree element (None if not found).
+        """
+        nodes = self.find_all(text=text, case_sensitive=case_sensitive, exact=exact)
+        return nodes[0] if nodes else None
+
+    def find_all(self, text, case_sensitive=False, exact=False):
+        """
+        Find nodes with text.
+        :param text: Text.
+        :param case_sensitive: Should text be case sensitive.
+        :param exact: If True text of node should be equal to text, otherwise text of node should contain text.
+        :return: List of nodes as ElementTree elements (document order).
+        """
+        if not case_sensitive:
+            text = text.lower()
+        if exact:
+            index = self.by_text if case_sensitive else self.by_folded_text
+            return list(index.get(text, []))
+        if text not in (self.__texts if case_sensitive else self.__folded_texts):
+            return []
+        if case_sensitive:
+            return [node for node in self.nodes if text in node.attrib['text']]
+        return [node for node in self.nodes if text in node.attrib['text'].lower()]
+
+    @staticmethod
+    def get_bounds(node):
+        """
+        Get bounds of node.
+        :param node: Node as ElementTree element.
+        :return: Tuple (left, top, right, bottom), None if node has no bounds.
+        """
+        match = BOUNDS.search(node.attrib.get('bounds', ''))
+        return tuple(int(value) for value in match.groups()) if match else None
@@ -0,0 +1,116 @@
+"""
+Breadth-first file system search (folders closest to root are listed first, so search can stop early).
+"""
+import fnmatch
+import os
+import re
+import threading
+
+from core.enums.os_type import OSType
+from core.settings import Settings
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # noinspection PyUnresolvedReferences,PyPackageRequirements
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# Folders skipped by default (use `prune=()` to search everything)
+SEARCH_PRUNE = ('node_modules', '.git')
+
+
+class FileSearch(object):
+    # Cached content of folders: (path, follow_links) -> (mtime, folders, files)
+    __INDEX = {}
+    __LOCK = threading.Lock()
+
+    @staticmethod
+    def __list(path, follow_links):
+        # Same as os.walk: symlinks to folders are not files, they are searched only if follow_links is True.
+        folders = []
+        files = []
+        if scandir is not None:
+            for entry in scandir(path):
+                try:
+                    is_dir = entry.is_dir()
+                    is_link = entry.is_symlink()
+                except OSError:
+                    is_dir = is_link = False
+                if not is_dir:
+                    files.append(entry.name)
+                elif follow_links or not is_link:
+                    folders.append(entry.name)
+        else:
+            for name in os.listdir(path):
+                item = os.path.join(path, name)
+                if not os.path.isdir(item):
+                    files.append(name)
+                elif follow_links or not os.path.islink(item):
+                    folders.append(name)
+        return folders, files
+
+    @staticmethod
+    def __list_indexed(path, follow_links):
+        # Content of a folder changes only when its modification time changes.
+        mtime = os.stat(path).st_mtime
+        key = (path, follow_links)
+        cached = FileSearch.__INDEX.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        folders, files = FileSearch.__list(path=path, follow_links=follow_links)
+        with FileSearch.__LOCK:
+            FileSearch.__INDEX[key] = (mtime, folders, files)
+        return folders, files
+
+    @staticmethod
+    def clear_index():
+        with FileSearch.__LOCK:
+            FileSearch.__INDEX.clear()
+
+    @staticmethod
+    def walk(base_path, prune=SEARCH_PRUNE, follow_links=False, use_index=False):
+        """
+        Walk folder tree level by level.
+        :param base_path: Base path.
+        :param prune: Names of folders that are not searched.
+        :param follow_links: If True search in symlinked folders.
+        :param use_index: If True content of folders is cached and reused while folder modification time is same.
+        :return: Generator of tuples (depth, folder path, list of file names), depth of base_path is 0.
+        """
+        pending = [(base_path, 0)]
+        visited = set()
+        while pending:
+            level = []
+            for path, depth in pending:
+                if follow_links:
+                    # Avoid infinite loops caused by symlinks to parent folders.
+                    real_path = os.path.realpath(path)
+                    if real_path in visited:
+                        continue
+                    visited.add(real_path)
+                try:
+                    if use_index:
+                        folders, files = FileSearch.__list_indexed(path=path, follow_links=follow_links)
+                    else:
+                        folders, files = FileSearch.__list(path=path, follow_links=follow_links)
+                except OSError:
+                    continue
+                yield depth, path, files
+                for folder in folders:
+                    if folder not in prune:
+                        level.append((os.path.join(path, folder), depth + 1))
+            pending = level
+
+    @staticmethod
+    def glob_matcher(pattern):
+        """
+        Get function that match file names against glob pattern (pattern is compiled only once).
+        :param pattern: Glob pattern, for example '*.aar'.
+        """
+        # Same as fnmatch.fnmatch, file names are case insensitive on Windows.
+        flags = re.IGNORECASE if Settings.HOST_OS == OSType.WINDOWS else 0
+        regex = re.compile(fnmatch.translate(pattern), flags)
+        return lambda name: regex.match(name) is not None
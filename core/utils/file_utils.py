@@ -6,26 +6,106 @@ File and Folder utils.
 # pylint: disable=broad-except
 # pylint: disable=no-name-in-module
 # pylint: disable=import-error
+import atexit
+import ctypes
+import ctypes.util
 import errno
-import fnmatch
 import os
 import shutil
 import stat
 import tarfile
+import threading
+import time
+import uuid
 import zipfile
+from multiprocessing.pool import ThreadPool
 
 from core.base_test.test_context import TestContext
+from core.enums.copy_strategy import CopyStrategy
 from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
+from core.utils.archive import Archive
+from core.utils.file_search import FileSearch, SEARCH_PRUNE
+from core.utils.folder_size import FolderSize
 from core.utils.process import Process
 
+if Settings.PYTHON_VERSION < 3:
+    # noinspection PyUnresolvedReferences,PyPep8Naming
+    import Queue as queue
+else:
+    import queue
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+libc = None
+if Settings.HOST_OS == OSType.OSX:
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.clonefile.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+    except (OSError, AttributeError):
+        libc = None
+
+# ioctl that clones file on Linux (see `man ioctl_ficlone`)
+FICLONE = 0x40049409
+
+# Number of files copied at the same time
+COPY_WORKERS = 8
+
+# Folders cleaned in background are moved to `Settings.TEST_TRASH_HOME` with this prefix before they are deleted
+TRASH_PREFIX = '.trash-'
+
+# Number of threads deleting content of a folder cleaned in background
+REAPER_WORKERS = 8
+
+# Folders that can be hard linked on copy when caller never modifies the copy or the source in place
+# (pass it as `link_folders` of `Folder.copy`, files are not linked by default)
+LINK_FOLDERS = ('node_modules',)
+
+
+class CopyStats(object):
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.files = 0
+        self.size = 0
+        self.duration = 0
+        self.methods = {}
+
+    def add(self, method, size):
+        self.files += 1
+        self.size += size
+        self.methods[method] = self.methods.get(method, 0) + 1
+
+    def __str__(self):
+        duration = max(self.duration, 0.001)
+        methods = ', '.join('{0} {1}'.format(count, method) for method, count in sorted(self.methods.items()))
+        return 'Copied {0} files ({1:.1f} MB) in {2:.2f}s: {3:.1f} MB/s, {4:.0f} files/s ({5}).'.format(
+            self.files, self.size / 1024.0 / 1024.0, duration, self.size / 1024.0 / 1024.0 / duration,
+            self.files / duration, methods or 'no files')
+
 
 # noinspection PyBroadException
 class Folder(object):
+    __TRASH = queue.Queue()
+    __REAPER = None
+    __REAPER_LOCK = threading.Lock()
+
     @staticmethod
-    def clean(folder):
-        if Folder.exists(folder=folder):
+    def clean(folder, background=False):
+        """
+        Delete folder.
+        :param folder: Folder path.
+        :param background: If True folder is renamed and deleted in background thread (use `drain()` to wait).
+        """
+        if os.path.islink(folder):
+            # Linked folder (for example project folder linked in home of parallel worker), keep the target.
+            os.remove(folder)
+        elif Folder.exists(folder=folder):
+            if background and Folder.__move_to_trash(folder=folder):
+                return
             Log.debug("Clean folder: " + folder)
             try:
                 shutil.rmtree(folder)
@@ -46,6 +126,84 @@ class Folder(object):
                     Process.kill_by_handle(folder)
                     os.system('rm -rf {0}'.format(folder))
 
+    @staticmethod
+    def __move_to_trash(folder):
+        folder = os.path.abspath(folder)
+        trash_home = os.path.abspath(Settings.TEST_TRASH_HOME)
+        if folder == trash_home or folder.startswith(trash_home + os.sep):
+            return False
+        # Trash is out of the folder that contained cleaned folder, so size and content of that folder
+        # (for example app folder) do not include trash that is not deleted yet.
+        name = '{0}{1}-{2}'.format(TRASH_PREFIX, os.path.basename(folder), uuid.uuid4().hex[:8])
+        trash = os.path.join(trash_home, name)
+        try:
+            Folder.create(trash_home)
+            os.rename(folder, trash)
+        except OSError as error:
+            # For example folder is on other file system, it is deleted in foreground.
+            Log.debug('Failed to move {0} to trash: {1}'.format(folder, error))
+            return False
+        Log.debug('Move folder to trash: ' + folder)
+        Folder.__add_to_trash(trash)
+        return True
+
+    @staticmethod
+    def __add_to_trash(path):
+        with Folder.__REAPER_LOCK:
+            if Folder.__REAPER is None:
+                Folder.__REAPER = threading.Thread(target=Folder.__reap, name='FolderReaper')
+                Folder.__REAPER.daemon = True
+                Folder.__REAPER.start()
+                atexit.register(Folder.drain)
+        Folder.__TRASH.put(path)
+
+    @staticmethod
+    def __reap():
+        while True:
+            path = Folder.__TRASH.get()
+            try:
+                Folder.__delete_tree(path)
+            except Exception as error:
+                Log.debug('Failed to delete {0}: {1}'.format(path, error))
+            finally:
+                Folder.__TRASH.task_done()
+
+    @staticmethod
+    def __delete_tree(path):
+        # Top level items are deleted in parallel (for example packages in node_modules).
+        def delete(item):
+            if os.path.isdir(item) and not os.path.islink(item):
+                Folder.clean(item)
+            else:
+                os.remove(item)
+
+        pool = ThreadPool(processes=REAPER_WORKERS)
+        try:
+            pool.map(delete, [os.path.join(path, item) for item in os.listdir(path)])
+        finally:
+            pool.close()
+            pool.join()
+        Folder.clean(path)
+
+    @staticmethod
+    def empty_trash(folder=Settings.TEST_TRASH_HOME):
+        """
+        Delete in background trash left by previous runs (for example when process is killed).
+        :param folder: Trash folder.
+        """
+        if Folder.exists(folder=folder):
+            for item in os.listdir(folder):
+                if item.startswith(TRASH_PREFIX):
+                    Folder.__add_to_trash(os.path.join(folder, item))
+
+    @staticmethod
+    def drain():
+        """
+        Wait until all folders cleaned in background are deleted.
+        """
+        if Folder.__REAPER is not None:
+            Folder.__TRASH.join()
+
     @staticmethod
     def exists(folder):
         return os.path.isdir(folder)
@@ -61,16 +219,24 @@ class Folder(object):
             try:
                 os.makedirs(folder)
             except OSError:
-                raise
+                # Folder might be created by other thread at the same time (for example logs folder by `run_many`).
+                if not os.path.isdir(folder):
+                    raise
 
     @staticmethod
-    def copy(source, target, clean_target=True, only_files=False):
+    def copy(source, target, clean_target=True, only_files=False, strategy=CopyStrategy.AUTO,
+             link_folders=()):
         """
         Copy folders.
         :param source: Source folder.
         :param target: Target folder.
         :param clean_target: If True clean target folder before copy.
         :param only_files: If True only the files from source folder are copied to target folder.
+        :param strategy: CopyStrategy. AUTO clones files (reflink) if file system supports it,
+        otherwise copies files in parallel (and hard links files in `link_folders`).
+        :param link_folders: Files inside folders with these names are hard linked when files can not be cloned
+        (for example `LINK_FOLDERS`, use it only when neither source nor target is modified in place).
+        :return: CopyStats object (None if only_files=True or source is file).
         """
         if clean_target:
             Folder.clean(folder=target)
@@ -81,28 +247,123 @@ class Folder(object):
             for f in files:
                 f_path = os.path.join(source, f)
                 File.copy(f_path, target)
+        elif not os.path.isdir(source):
+            shutil.copy(source, target)
+        elif strategy == CopyStrategy.COPYTREE:
+            shutil.copytree(source, target)
         else:
-            try:
-                shutil.copytree(source, target)
-            except OSError as exc:
-                if exc.errno == errno.ENOTDIR:
-                    shutil.copy(source, target)
-                else:
-                    raise
+            return Folder.__copy_tree(source=source, target=target, strategy=strategy, link_folders=link_folders)
+        return None
+
+    @staticmethod
+    def __copy_tree(source, target, strategy, link_folders):
+        stats = CopyStats(strategy=strategy)
+        start = time.time()
+
+        # Create folders and collect files (symlinks are followed, same as shutil.copytree does).
+        folders = []
+        jobs = []
+        for root, dirs, files in os.walk(source, followlinks=True):
+            relative = os.path.relpath(root, source)
+            target_root = target if relative == os.curdir else os.path.join(target, relative)
+            os.makedirs(target_root)
+            folders.append((root, target_root))
+            parts = [] if relative == os.curdir else relative.split(os.sep)
+            link = any(part in link_folders for part in parts)
+            for name in files:
+                jobs.append((os.path.join(root, name), os.path.join(target_root, name), link))
+
+        clone = strategy in (CopyStrategy.AUTO, CopyStrategy.REFLINK) and Folder.__can_clone(jobs)
+        if strategy == CopyStrategy.REFLINK and not clone:
+            raise OSError(errno.EOPNOTSUPP, 'File system does not support reflink', source)
+
+        def copy_file(job):
+            src, dst, hard_link = job
+            # Clone is as fast as hard link and the copy is independent, so links are used only without clone.
+            if hard_link and not clone:
+                try:
+                    os.link(src, dst)
+                    return 'linked', os.path.getsize(dst)
+                except (OSError, AttributeError):
+                    pass
+            if clone:
+                try:
+                    Folder.__clone_file(src, dst)
+                    shutil.copystat(src, dst)
+                    return 'cloned', os.path.getsize(dst)
+                except OSError:
+                    pass
+            shutil.copy2(src, dst)
+            return 'copied', os.path.getsize(dst)
+
+        pool = ThreadPool(processes=COPY_WORKERS)
+        try:
+            results = pool.map(copy_file, jobs, chunksize=64)
+        finally:
+            pool.close()
+            pool.join()
+        for method, size in results:
+            stats.add(method=method, size=size)
+
+        # Folders are updated after files, otherwise copy of the files changes their modification time.
+        for src, dst in reversed(folders):
+            shutil.copystat(src, dst)
+
+        stats.duration = time.time() - start
+        Log.info(str(stats))
+        return stats
 
     @staticmethod
-    def get_size(folder):
+    def __clone_file(source, target):
+        if Settings.HOST_OS == OSType.OSX:
+            if libc.clonefile(source.encode('utf-8'), target.encode('utf-8'), 0) != 0:
+                raise OSError(ctypes.get_errno(), 'clonefile failed', source)
+        else:
+            with open(source, 'rb') as src, open(target, 'wb') as dst:
+                try:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                except (IOError, OSError):
+                    dst.close()
+                    os.remove(target)
+                    raise OSError(errno.EOPNOTSUPP, 'reflink failed', source)
+
+    @staticmethod
+    def __can_clone(jobs):
+        # Try to clone first file (reflink works only on some file systems, like btrfs, xfs and apfs).
+        if Settings.HOST_OS == OSType.LINUX:
+            if fcntl is None:
+                return False
+        elif Settings.HOST_OS != OSType.OSX or libc is None:
+            return False
+        for src, dst, link in jobs:
+            if not link:
+                try:
+                    Folder.__clone_file(src, dst)
+                    os.remove(dst)
+                    return True
+                except OSError:
+                    return False
+        return False
+
+    @staticmethod
+    def get_size(folder, use_cache=False):
         """
         Get folder size in bytes.
         :param folder: Folder path.
+        :param use_cache: If True reuse size of folders that are not modified since previous call.
         :return: Size in bytes.
         """
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(folder):
-            for file_name in filenames:
-                file_path = os.path.join(dirpath, file_name)
-                total_size += os.path.getsize(file_path)
-        return total_size
+        return FolderSize.get_tree(folder=folder, use_cache=use_cache).size
+
+    @staticmethod
+    def get_size_tree(folder, use_cache=False):
+        """
+        Get size of folder and all its sub folders in single scan.
+        :param folder: Folder path.
+        :param use_cache: If True reuse size of folders that are not modified since previous call.
+        :return: SizeNode object (use `get('sub/folder').size` to get size of sub folder).
+        """
+        return FolderSize.get_tree(folder=folder, use_cache=use_cache)
 
 
 # noinspection PyBroadException,PyArgumentList, PyUnresolvedReferences
@@ -213,60 +474,75 @@ class File(object):
             raise IOError('Error: %s file not found' % path)
 
     @staticmethod
-    def find(base_path, file_name, exact_match=False, match_index=0):
+    def find(base_path, file_name, exact_match=False, match_index=0, prune=SEARCH_PRUNE, use_index=False):
         """
         Find file in path.
         :param base_path: Base path.
         :param file_name: File/folder name.
         :param exact_match: If True it will match exact file/folder name
         :param match_index: Index of match (all matches are sorted by path len, 0 will return closest to root)
+        :param prune: Names of folders that are not searched.
+        :param use_index: If True reuse content of folders listed by previous searches (if they are not modified).
         :return: Path to file.
         """
+        if exact_match:
+            def is_match(name):
+                return name == file_name
+        else:
+            def is_match(name):
+                return file_name in name
+
+        # Folders are listed level by level, so search stops when no file on next levels can have shorter path.
         matches = []
-        for root, dirs, files in os.walk(base_path, followlinks=True):
+        for depth, root, files in FileSearch.walk(base_path=base_path, prune=prune, follow_links=True,
+                                                  use_index=use_index):
+            min_length = len(os.path.join(base_path, '')) + 2 * depth + len(file_name)
+            if 0 <= match_index < len([match for match in matches if len(match) <= min_length]):
+                break
             for current_file in files:
-                if exact_match:
-                    if file_name == current_file:
-                        matches.append(os.path.join(root, current_file))
-                else:
-                    if file_name in current_file:
-                        matches.append(os.path.join(root, current_file))
+                if is_match(current_file):
+                    matches.append(os.path.join(root, current_file))
         matches.sort(key=lambda s: len(s))
         return matches[match_index]
 
     @staticmethod
-    def pattern_exists(directory, pattern):
+    def pattern_exists(directory, pattern, prune=SEARCH_PRUNE, use_index=False):
         """
         Check if file pattern exist at location.
         :param directory: Base directory.
         :param pattern: File pattern, for example: '*.aar' or '*.android.js'.
+        :param prune: Names of folders that are not searched.
+        :param use_index: If True reuse content of folders listed by previous searches (if they are not modified).
         :return: True if exists, False if does not exist.
         """
-        found = False
-        for root, dirs, files in os.walk(directory):
+        is_match = FileSearch.glob_matcher(pattern)
+        for depth, root, files in FileSearch.walk(base_path=directory, prune=prune, use_index=use_index):
             for basename in files:
-                if fnmatch.fnmatch(basename, pattern):
+                if is_match(basename):
                     filename = os.path.join(root, basename)
                     Log.info(pattern + " exists: " + filename)
-                    found = True
-        return found
+                    return True
+        return False
 
     @staticmethod
-    def find_by_extension(folder, extension):
+    def find_by_extension(folder, extension, prune=SEARCH_PRUNE, use_index=False):
         """
         Find by file extension recursively.
         :param folder: Base folder where search is done.
         :param extension: File extension.
-        :return: List of found files.
+        :param prune: Names of folders that are not searched.
+        :param use_index: If True reuse content of folders listed by previous searches (if they are not modified).
+        :return: List of found files (files closest to root first).
         """
         matches = []
         if '.' not in extension:
             extension = '.' + extension
-        for root, dirs, files in os.walk(folder):
+        for depth, root, files in FileSearch.walk(base_path=folder, prune=prune, use_index=use_index):
             for f in files:
                 if f.endswith(extension):
-                    Log.debug('File with {0} extension found: {1}'.format(extension, os.path.abspath(f)))
-                    matches.append(os.path.join(root, f))
+                    path = os.path.join(root, f)
+                    Log.debug('File with {0} extension found: {1}'.format(extension, os.path.abspath(path)))
+                    matches.append(path)
         return matches
 
     @staticmethod
@@ -329,11 +605,7 @@ class File(object):
 
     @staticmethod
     def is_file_in_zip(zip_file, file_name_to_check):
-        files_list = File.get_files_names_in_zip(zip_file)
-        for current_file in files_list:
-            if file_name_to_check in str(current_file.filename):
-                return True
-        return False
+        return Archive.open(zip_file).contains(file_name_to_check)
 
     @staticmethod
     def download(file_name, url, destination_dir=Settings.TEST_RUN_HOME):
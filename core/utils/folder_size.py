@@ -0,0 +1,161 @@
+"""
+Size of folder trees (total size of each folder in the tree is calculated in single scan).
+"""
+import os
+import threading
+from multiprocessing.pool import ThreadPool
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # noinspection PyUnresolvedReferences,PyPackageRequirements
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+# Number of threads scanning subtrees
+SIZE_WORKERS = 8
+
+
+class SizeNode(object):
+    def __init__(self, path):
+        self.path = path
+        self.files_size = 0
+        self.files_count = 0
+        self.children = {}
+        self.size = 0
+        self.count = 0
+
+    def get(self, relative_path):
+        """
+        Get node of sub folder.
+        :param relative_path: Path relative to this node, for example 'assets/app'.
+        :return: SizeNode object (None if folder does not exist).
+        """
+        node = self
+        for part in relative_path.replace('\\', '/').split('/'):
+            if part in ('', os.curdir):
+                continue
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def breakdown(self):
+        """
+        Get size of sub folders and of files directly in this folder.
+        :return: List of tuples (name, size) sorted by size, files are reported as '<files>'.
+        """
+        items = [(name, child.size) for name, child in self.children.items()]
+        if self.files_count:
+            items.append(('<files>', self.files_size))
+        return sorted(items, key=lambda item: item[1], reverse=True)
+
+    def update_totals(self):
+        self.size = self.files_size
+        self.count = self.files_count
+        for child in self.children.values():
+            child.update_totals()
+            self.size += child.size
+            self.count += child.count
+
+
+class FolderSize(object):
+    # Content of scanned folders: path -> (mtime, files size, files count, sub folders)
+    __CACHE = {}
+    __LOCK = threading.Lock()
+
+    @staticmethod
+    def __scan_folder(path, use_cache):
+        mtime = None
+        if use_cache:
+            # Size of files in folder is reused while folder modification time is same.
+            mtime = os.stat(path).st_mtime
+            cached = FolderSize.__CACHE.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1], cached[2], cached[3]
+        files_size = 0
+        files_count = 0
+        folders = []
+        if scandir is not None:
+            for entry in scandir(path):
+                # Same as os.walk + os.path.getsize: symlinks to folders are skipped, symlinks to files are followed.
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            folders.append(entry.name)
+                    else:
+                        files_size += entry.stat().st_size
+                        files_count += 1
+                except OSError:
+                    # Broken symlink.
+                    pass
+        else:
+            for name in os.listdir(path):
+                item = os.path.join(path, name)
+                try:
+                    if os.path.isdir(item):
+                        if not os.path.islink(item):
+                            folders.append(name)
+                    else:
+                        files_size += os.path.getsize(item)
+                        files_count += 1
+                except OSError:
+                    pass
+        if use_cache:
+            with FolderSize.__LOCK:
+                FolderSize.__CACHE[path] = (mtime, files_size, files_count, folders)
+        return files_size, files_count, folders
+
+    @staticmethod
+    def __scan_node(node, use_cache):
+        try:
+            node.files_size, node.files_count, folders = FolderSize.__scan_folder(path=node.path, use_cache=use_cache)
+        except OSError:
+            # Folder is deleted or not accessible (os.walk ignores such folders as well).
+            return []
+        for name in folders:
+            node.children[name] = SizeNode(path=os.path.join(node.path, name))
+        return list(node.children.values())
+
+    @staticmethod
+    def __scan_subtree(node, use_cache):
+        pending = [node]
+        while pending:
+            pending.extend(FolderSize.__scan_node(node=pending.pop(), use_cache=use_cache))
+        return node
+
+    @staticmethod
+    def get_tree(folder, use_cache=False, workers=SIZE_WORKERS):
+        """
+        Get size of folder and all its sub folders.
+        :param folder: Folder path.
+        :param use_cache: If True reuse results of previous scans for folders with same modification time
+        (use it only for trees where files are not modified in place).
+        :param workers: Number of threads scanning subtrees.
+        :return: SizeNode object.
+        """
+        root = SizeNode(path=folder)
+
+        # Scan first levels until there are enough subtrees for all workers, then scan subtrees in parallel.
+        frontier = [root]
+        while frontier and len(frontier) < workers * 4:
+            level = []
+            for node in frontier:
+                level.extend(FolderSize.__scan_node(node=node, use_cache=use_cache))
+            frontier = level
+        if frontier:
+            pool = ThreadPool(processes=workers)
+            try:
+                pool.map(lambda node: FolderSize.__scan_subtree(node=node, use_cache=use_cache), frontier)
+            finally:
+                pool.close()
+                pool.join()
+        root.update_totals()
+        return root
+
+    @staticmethod
+    def clear_cache():
+        with FolderSize.__LOCK:
+            FolderSize.__CACHE.clear()
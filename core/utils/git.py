@@ -33,6 +33,20 @@ class Git(object):
         assert "fatal" not in result.output, "Failed to clone: " + repo_url
         assert result.exit_code == 0, "Failed to clone: " + repo_url
 
+    @staticmethod
+    def get_remote_commit(repo_url, branch='master'):
+        """
+        Get last commit of branch without cloning the repo.
+        :param repo_url: HTTPs url of the repo.
+        :param branch: Branch.
+        :return: Commit SHA (None if it can not be resolved).
+        """
+        repo_url = get_repo_url(repo_url=repo_url, ssh_clone=Settings.SSH_CLONE)
+        result = run(cmd='git ls-remote {0} refs/heads/{1}'.format(repo_url, branch), timeout=60, fail_safe=True)
+        if result.exit_code != 0 or not result.stdout.strip():
+            return None
+        return result.stdout.split()[0]
+
     @staticmethod
     def clean_repo_changes(local_folder):
         """
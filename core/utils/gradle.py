@@ -7,19 +7,24 @@ import os
 from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
 from core.utils.run import run
 
 
 class Gradle(object):
     @staticmethod
-    def kill():
+    def kill(snapshot=None):
+        """
+        Kill gradle processes (including gradle daemons).
+        :param snapshot: ProcessSnapshot object (if not specified new snapshot of process table is created).
+        """
         Log.info("Kill gradle processes.")
+        snapshot = snapshot or ProcessSnapshot()
         if Settings.HOST_OS is OSType.WINDOWS:
-            Process.kill(proc_name='java.exe', proc_cmdline='gradle')
+            processes = snapshot.find_by_name(proc_name='java.exe', proc_cmdline='gradle')
         else:
-            command = "ps -ef  | grep '.gradle/wrapper' | grep -v grep | awk '{ print $2 }' | xargs kill -9"
-            run(cmd=command)
+            processes = snapshot.find_by_commandline(commandline='.gradle/wrapper')
+        Process.kill_trees(processes=processes)
 
     @staticmethod
     def cache_clean():
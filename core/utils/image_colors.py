@@ -0,0 +1,88 @@
+"""
+Color statistics of images.
+
+Each pixel is packed into single uint32 (blue << 16 | green << 8 | red), so colors are counted with `numpy.bincount`
+in linear time instead of sorting all pixels with `numpy.unique`.
+Order of packed values is the order of (blue, green, red) tuples, same as the order of `numpy.unique` results.
+
+Notes: OpenCV color order is:
+0 - blue
+1 - green
+2 - red
+"""
+import numpy
+
+# Colors are counted in buckets by 12 high bits of packed color (blue and 4 bits of green).
+BUCKET_BITS = 12
+
+
+class ImageColors(object):
+    def __init__(self, img):
+        """
+        :param img: Image as opencv object (numpy array with BGR channels).
+        """
+        pixels = img.reshape(-1, img.shape[-1])[:, :3].astype(numpy.uint32)
+        self.packed = (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+        self.__main_color = None
+
+    @staticmethod
+    def __unpack(value):
+        return numpy.array([(value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF], dtype=numpy.uint8)
+
+    def get_pixels_by_color(self, color, rdb_tolerance=25):
+        """
+        Get count of pixels of specific color.
+        :param color: Color as numpy array (BGR). Example: numpy.array([255, 217, 141])
+        :param rdb_tolerance: Colors with diff of each rgb value less than tolerance are treated as the color.
+        :return: Count of pixels of the most common color that match the color.
+        """
+        # Colors within tolerance are a cube with side 2 * tolerance - 1, count each color in the cube.
+        side = 2 * rdb_tolerance - 1
+        if side <= 0:
+            return 0
+        low = [int(channel) - rdb_tolerance + 1 for channel in color[:3]]
+        offsets = [((self.packed >> shift) & 0xFF).astype(numpy.int32) - start
+                   for shift, start in zip((16, 8, 0), low)]
+        mask = (offsets[0] >= 0) & (offsets[0] < side)
+        mask &= (offsets[1] >= 0) & (offsets[1] < side)
+        mask &= (offsets[2] >= 0) & (offsets[2] < side)
+        if not mask.any():
+            return 0
+        index = (offsets[0][mask] * side + offsets[1][mask]) * side + offsets[2][mask]
+        return int(numpy.bincount(index, minlength=side ** 3).max())
+
+    def get_pixels_by_colors(self, colors, rdb_tolerance=25):
+        """
+        Get count of pixels for multiple colors.
+        :param colors: List of colors as numpy arrays (BGR).
+        :param rdb_tolerance: Colors with diff of each rgb value less than tolerance are treated as the color.
+        :return: List of counts (same order as colors).
+        """
+        return [self.get_pixels_by_color(color=color, rdb_tolerance=rdb_tolerance) for color in colors]
+
+    def get_main_color(self):
+        """
+        Get the most common color (if more colors have same count the lowest BGR value is returned).
+        :return: Color as numpy array (BGR).
+        """
+        if self.__main_color is None and self.packed.size:
+            # Count colors bucket by bucket (buckets with most pixels first),
+            # no color in a bucket can be more common than count of pixels in the bucket.
+            low_bits = 24 - BUCKET_BITS
+            buckets = self.packed >> low_bits
+            bucket_counts = numpy.bincount(buckets, minlength=1 << BUCKET_BITS)
+            best_count = 0
+            best_value = None
+            for bucket in numpy.argsort(-bucket_counts, kind='stable'):
+                if bucket_counts[bucket] < best_count or bucket_counts[bucket] == 0:
+                    break
+                values = self.packed[buckets == bucket] & ((1 << low_bits) - 1)
+                counts = numpy.bincount(values, minlength=1 << low_bits)
+                low_value = int(counts.argmax())
+                value = (int(bucket) << low_bits) | low_value
+                count = int(counts[low_value])
+                if count > best_count or (count == best_count and value < best_value):
+                    best_count = count
+                    best_value = value
+            self.__main_color = ImageColors.__unpack(best_value)
+        return self.__main_color
@@ -16,47 +16,66 @@ import pytesseract
 from PIL import Image
 
 from core.settings import Settings
+from core.utils.image_colors import ImageColors
 
 
 class ImageUtils(object):
     @staticmethod
-    def image_match(actual_image, expected_image, tolerance=0.05):
+    def __load_rgb(image):
+        if isinstance(image, numpy.ndarray):
+            # Opencv object (BGR channels).
+            return Image.fromarray(numpy.ascontiguousarray(image[:, :, 2::-1]))
+        image = Image.open(image)
+        # Multi-channel images are compared as they are, other modes (palette, grayscale) are converted to RGB.
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        return image
+
+    @staticmethod
+    def image_match(actual_image, expected_image, tolerance=0.05, region=None, ignore=None):
         """
         Compare two images.
-        :param actual_image: Path to actual image.
-        :param expected_image: Path to expected image.
+        Pixels are different if diff of sums of their rgb values is more than 30 (first 40 rows are not compared).
+        :param actual_image: Path to actual image (or image as opencv object).
+        :param expected_image: Path to expected image (or image as opencv object).
         :param tolerance: Tolerance in percents.
+        :param region: Compare only pixels in region (left, top, right, bottom), diff % is relative to region size.
+        :param ignore: List of regions (left, top, right, bottom) that are not compared.
         :return: match (boolean value), diff_percent (diff %), diff_image (diff image)
         """
-        # pylint: disable=too-many-instance-attributes
-        actual_image = Image.open(actual_image)
-        actual_pixels = actual_image.load()
-        expected_image = Image.open(expected_image)
-        expected_pixels = expected_image.load()
+        actual_image = ImageUtils.__load_rgb(actual_image)
+        expected_image = ImageUtils.__load_rgb(expected_image)
         width, height = expected_image.size
 
-        total_pixels = width * height
-        diff_pixels = 0
-        match = False
-        diff_image = actual_image.copy()
-        for x in range(0, width):
-            for y in range(40, height):
-                actual_pixel = actual_pixels[x, y]
-                expected_pixel = expected_pixels[x, y]
-                if actual_pixel != expected_pixel:
-                    actual_r = actual_pixel[0]
-                    actual_g = actual_pixel[1]
-                    actual_b = actual_pixel[2]
-                    expected_r = expected_pixel[0]
-                    expected_g = expected_pixel[1]
-                    expected_b = expected_pixel[2]
-                    if abs(actual_r + actual_g + actual_b - expected_r - expected_g - expected_b) > 30:
-                        diff_pixels += 1
-                        diff_image.load()[x, y] = (255, 0, 0)
+        # Sum of rgb values of each pixel (int32, so sums are not truncated).
+        actual_pixels = numpy.asarray(actual_image)[:height, :width, :3]
+        expected_pixels = numpy.asarray(expected_image)[:, :, :3]
+        if actual_pixels.shape != expected_pixels.shape:
+            raise ValueError('Actual image {0} is smaller than expected image {1}.'.format(actual_image.size,
+                                                                                           expected_image.size))
+        delta = actual_pixels.sum(axis=2, dtype=numpy.int32) - expected_pixels.sum(axis=2, dtype=numpy.int32)
+        diff_mask = numpy.abs(delta) > 30
+        diff_mask[:40, :] = False
 
+        total_pixels = width * height
+        if region is not None:
+            left, top, right, bottom = region
+            region_mask = numpy.zeros(diff_mask.shape, dtype=bool)
+            region_mask[top:bottom, left:right] = True
+            diff_mask &= region_mask
+            total_pixels = max(int(region_mask.sum()), 1)
+        for left, top, right, bottom in ignore or []:
+            diff_mask[top:bottom, left:right] = False
+
+        diff_pixels = int(numpy.count_nonzero(diff_mask))
         diff_percent = 100 * float(diff_pixels) / total_pixels
-        if diff_percent < tolerance:
-            match = True
+        match = diff_percent < tolerance
+
+        # Mark different pixels with red color (alpha channel is set to 255).
+        diff_array = numpy.array(actual_image)
+        red = (255, 0, 0, 255)[:diff_array.shape[2]]
+        diff_array[:height, :width][diff_mask] = red
+        diff_image = Image.fromarray(diff_array)
 
         return match, diff_percent, diff_image
 
@@ -69,6 +88,15 @@ class ImageUtils(object):
         """
         return cv2.imread(image_path)
 
+    @staticmethod
+    def write_image(image, image_path):
+        """
+        Save opencv object to file.
+        :param image: Image as opencv object.
+        :param image_path: Image path (format is detected by extension).
+        """
+        assert cv2.imwrite(image_path, image), 'Failed to save image at {0}'.format(image_path)
+
     @staticmethod
     def get_pixels_by_color(image_path, color, rdb_tolerance=25):
         """
@@ -79,29 +107,24 @@ class ImageUtils(object):
         :return: Count of pixels.
         """
         img = ImageUtils.read_image(image_path=image_path)
-        colors, counts = numpy.unique(img.reshape(-1, 3), axis=0, return_counts=True)
-        max_count = 0
-        for n_color, count in zip(colors, counts):
-            # noinspection PyUnresolvedReferences
-            b_diff = abs(n_color[0] - color[0])
-            g_diff = abs(n_color[1] - color[1])
-            r_diff = abs(n_color[2] - color[2])
-            if b_diff < rdb_tolerance and g_diff < rdb_tolerance and r_diff < rdb_tolerance:
-                if count > max_count:
-                    max_count = count
-        return max_count
+        return ImageColors(img).get_pixels_by_color(color=color, rdb_tolerance=rdb_tolerance)
+
+    @staticmethod
+    def get_pixels_by_colors(image_path, colors, rdb_tolerance=25):
+        """
+        Get count of pixels for multiple colors (image is read and processed only once).
+        :param image_path: Image path.
+        :param colors: List of colors as numpy arrays.
+        :param rdb_tolerance If diff of sums of rgb values is less then specified count pixels will be counted as equal.
+        :return: List of counts (same order as colors).
+        """
+        img = ImageUtils.read_image(image_path=image_path)
+        return ImageColors(img).get_pixels_by_colors(colors=colors, rdb_tolerance=rdb_tolerance)
 
     @staticmethod
     def get_main_color(image_path):
         img = ImageUtils.read_image(image_path=image_path)
-        colors, counts = numpy.unique(img.reshape(-1, 3), axis=0, return_counts=True)
-        max_count = 0
-        main_color = None
-        for color, count in zip(colors, counts):
-            if count > max_count:
-                max_count = count
-                main_color = color
-        return main_color
+        return ImageColors(img).get_main_color()
 
     @staticmethod
     def get_text(image_path, use_cv2=True):
@@ -0,0 +1,137 @@
+"""
+Incremental readers for growing log files.
+"""
+import codecs
+import os
+import re
+
+from core.log.log import Log
+
+
+class StringMatcher(object):
+    """
+    Find set of strings in text in single pass.
+    Text can be passed in chunks, strings split between two chunks are found as well.
+    """
+
+    def __init__(self, strings):
+        self.strings = set(strings)
+        patterns = sorted([re.escape(item) for item in self.strings if item], key=len, reverse=True)
+        self.regex = re.compile('(?=(?:{0}))'.format('|'.join(patterns))) if patterns else None
+        self.by_first_char = {}
+        for item in self.strings:
+            if item:
+                self.by_first_char.setdefault(item[0], []).append(item)
+        self.carry_len = max([len(item) for item in self.strings] + [1]) - 1
+        self.carry = ''
+
+    def scan(self, text):
+        """
+        Scan next chunk of text.
+        :param text: Text appended after the previous chunk.
+        :return: Set of strings found in the text (or at the boundary with previous chunk).
+        """
+        found = set([item for item in self.strings if not item])
+        if self.regex is not None:
+            window = self.carry + text
+            for match in self.regex.finditer(window):
+                position = match.start()
+                for item in self.by_first_char[window[position]]:
+                    if window.startswith(item, position):
+                        found.add(item)
+            self.carry = window[len(window) - self.carry_len:] if self.carry_len else ''
+        return found
+
+
+class LogTail(object):
+    """
+    Read log file incrementally (only bytes appended since the previous read are read).
+    Position of the log that is already verified is tracked in memory (instead of writing marker in the log).
+    """
+    __TAILS = {}
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.verified = 0
+        self.inode = None
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
+    @staticmethod
+    def get(path):
+        """
+        Get tail of log file (same object is returned for same path).
+        :param path: Path to log file.
+        :return: LogTail object.
+        """
+        key = os.path.abspath(path)
+        if key not in LogTail.__TAILS:
+            LogTail.__TAILS[key] = LogTail(path=key)
+        return LogTail.__TAILS[key]
+
+    @staticmethod
+    def reset(path=None):
+        """
+        Forget state of log file (or of all log files if path is not specified).
+        """
+        if path is None:
+            LogTail.__TAILS.clear()
+        else:
+            LogTail.__TAILS.pop(os.path.abspath(path), None)
+
+    def __check_rotation(self, stat):
+        # Start from beginning if file is replaced or truncated.
+        if (self.inode is not None and stat.st_ino != self.inode) or stat.st_size < self.offset:
+            Log.debug('Log file {0} is truncated or replaced. Read it from the beginning.'.format(self.path))
+            self.offset = 0
+            self.verified = 0
+            self.decoder.reset()
+        self.inode = stat.st_ino
+
+    def size(self):
+        """
+        Get current size of log file (0 if file does not exist).
+        """
+        try:
+            return os.stat(self.path).st_size
+        except OSError:
+            return 0
+
+    def read(self):
+        """
+        Read text appended since previous read.
+        :return: New text (empty string if nothing is appended).
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return ''
+        self.__check_rotation(stat)
+        if stat.st_size == self.offset:
+            return ''
+        with open(self.path, 'rb') as log:
+            log.seek(self.offset)
+            data = log.read(stat.st_size - self.offset)
+        self.offset += len(data)
+        return self.decoder.decode(data)
+
+    def rewind(self):
+        """
+        Move read position to the end of verified part of the log.
+        """
+        self.offset = self.verified
+        self.decoder.reset()
+
+    def read_unverified(self):
+        """
+        Read part of the log that is not verified yet.
+        :return: Text.
+        """
+        self.rewind()
+        return self.read()
+
+    def mark_verified(self):
+        """
+        Mark text read so far as verified.
+        """
+        self.verified = self.offset
@@ -1,10 +1,12 @@
 """
 A wrapper around npm commands.
 """
+import json
 import os
 
 from core.log.log import Log
 from core.settings import Settings
+from core.utils.artifact_cache import ArtifactCache
 from core.utils.file_utils import File
 from core.utils.run import run
 from core.utils.version import Version
@@ -31,14 +33,48 @@ class Npm(object):
 
     @staticmethod
     def download(package, output_file):
-        output = Npm.run_npm_command('view {0} dist.tarball -s'.format(package))
-        assert '.tgz' in output, 'Failed to find tarball of {0} package.'.format(package)
-        npm_package = output.split('/')[-1].split('\n')[0]
-        src_file = os.path.join(Settings.TEST_SUT_HOME, npm_package)
+        """
+        Download npm package (from artifact cache if same tarball is already downloaded).
+        :param package: Package (name, name@version or name@tag).
+        :param output_file: Path to output file.
+        """
+        tarball, integrity = Npm.__get_dist(package=package)
+        assert '.tgz' in tarball, 'Failed to find tarball of {0} package.'.format(package)
+        npm_package = tarball.split('/')[-1]
         File.delete(path=output_file)
-        Npm.run_npm_command('pack ' + output, folder=Settings.TEST_SUT_HOME)
+
+        cache = ArtifactCache()
+        key = ArtifactCache.key('npm', tarball, integrity)
+        if cache.get(key=key, target=output_file):
+            return
+
+        src_file = os.path.join(Settings.TEST_SUT_HOME, npm_package)
+        Npm.run_npm_command('pack ' + tarball, folder=Settings.TEST_SUT_HOME)
         File.copy(source=src_file, target=output_file)
         File.delete(src_file)
+        cache.put(key=key, source=output_file, name=npm_package, integrity=integrity)
+
+    @staticmethod
+    def __get_dist(package):
+        """
+        Get tarball url and integrity of npm package.
+        :param package: Package (name, name@version or name@tag).
+        :return: Tuple (tarball url, integrity), integrity is None if it is not known.
+        """
+        # Only stdout is parsed, warnings and notices of npm are printed on stderr.
+        command = 'npm view {0} dist.tarball dist.integrity --json -s'.format(package)
+        Log.info(command + " (at " + Settings.TEST_RUN_HOME + ").")
+        result = run(cmd=command, cwd=Settings.TEST_RUN_HOME, wait=True, timeout=300)
+        try:
+            info = json.loads(result.stdout)
+            if isinstance(info, list):
+                info = info[0]
+            return info.get('dist.tarball', ''), info.get('dist.integrity', None)
+        except (ValueError, AttributeError, IndexError):
+            Log.debug('Failed to parse dist info of {0}: {1}'.format(package, result.output))
+        # Unexpected output (for example old npm), get only tarball url as before.
+        output = Npm.run_npm_command('view {0} dist.tarball -s'.format(package))
+        return output.split('\n')[0].strip(), None
 
     @staticmethod
     def pack(folder, output_file):
@@ -0,0 +1,150 @@
+# pylint: disable=broad-except
+"""
+Execute dependent stages in parallel (independent stages run at the same time on a thread pool).
+"""
+import sys
+import time
+import traceback
+from multiprocessing.pool import ThreadPool
+
+from core.log.log import Log
+from core.settings import Settings
+
+if Settings.PYTHON_VERSION < 3:
+    # noinspection PyUnresolvedReferences,PyPep8Naming
+    import Queue as queue
+else:
+    import queue
+
+
+class StageStatus(object):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    PASSED = 'passed'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+
+
+class Stage(object):
+    def __init__(self, name, action, depends=None, kwargs=None):
+        self.name = name
+        self.action = action
+        self.depends = list(depends or [])
+        self.kwargs = kwargs or {}
+        self.status = StageStatus.PENDING
+        self.start_time = None
+        self.end_time = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+
+class Pipeline(object):
+    """
+    Stages are started as soon as all stages they depend on pass.
+    If a stage fails no new stages are started, running stages are waited and the error is raised.
+    """
+
+    def __init__(self, name='Pipeline', workers=4):
+        self.name = name
+        self.workers = workers
+        self.stages = []
+        self.start_time = None
+        self.end_time = None
+
+    def add(self, name, action, depends=None, **kwargs):
+        """
+        Add stage.
+        :param name: Unique name of the stage.
+        :param action: Function executed by the stage.
+        :param depends: List of names of stages that should pass before this stage is started.
+        :param kwargs: Arguments passed to the action.
+        :return: Stage object.
+        """
+        names = [stage.name for stage in self.stages]
+        if name in names:
+            raise KeyError('Stage "{0}" already exists.'.format(name))
+        for dependency in depends or []:
+            if dependency not in names:
+                raise KeyError('Stage "{0}" depends on unknown stage "{1}".'.format(name, dependency))
+        stage = Stage(name=name, action=action, depends=depends, kwargs=kwargs)
+        self.stages.append(stage)
+        return stage
+
+    def get(self, name):
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError('Stage "{0}" not found.'.format(name))
+
+    @staticmethod
+    def __execute(stage, completed):
+        stage.start_time = time.time()
+        try:
+            stage.action(**stage.kwargs)
+            stage.status = StageStatus.PASSED
+        except Exception:
+            stage.error = sys.exc_info()[1]
+            stage.status = StageStatus.FAILED
+            Log.error('Stage "{0}" failed:\n{1}'.format(stage.name, traceback.format_exc()))
+        stage.end_time = time.time()
+        completed.put(stage)
+
+    def __is_ready(self, stage):
+        return all(self.get(name).status == StageStatus.PASSED for name in stage.depends)
+
+    def run(self):
+        """
+        Execute all stages and log timing report.
+        """
+        Log.info('Execute {0} ({1} stages, {2} workers).'.format(self.name, len(self.stages), self.workers))
+        self.start_time = time.time()
+        completed = queue.Queue()
+        pool = ThreadPool(processes=self.workers)
+        running = 0
+        failed = None
+        try:
+            while True:
+                if failed is None:
+                    for stage in self.stages:
+                        if stage.status == StageStatus.PENDING and self.__is_ready(stage):
+                            stage.status = StageStatus.RUNNING
+                            running += 1
+                            pool.apply_async(Pipeline.__execute, (stage, completed))
+                if running == 0:
+                    break
+                stage = completed.get()
+                running -= 1
+                Log.info('Stage "{0}" {1} in {2:.1f}s.'.format(stage.name, stage.status, stage.duration))
+                if stage.status == StageStatus.FAILED and failed is None:
+                    failed = stage
+        finally:
+            pool.close()
+            pool.join()
+            self.end_time = time.time()
+
+        for stage in self.stages:
+            if stage.status == StageStatus.PENDING:
+                stage.status = StageStatus.SKIPPED
+        self.report()
+        if failed is not None:
+            raise failed.error
+
+    def report(self):
+        """
+        Log duration of each stage (in order of start) and total time.
+        """
+        Log.info('{0} timing report:'.format(self.name))
+        started = [stage for stage in self.stages if stage.start_time is not None]
+        for stage in sorted(started, key=lambda item: item.start_time):
+            Log.info('  {0:<40} {1:<8} start +{2:6.1f}s duration {3:6.1f}s'.format(
+                stage.name, stage.status, stage.start_time - self.start_time, stage.duration))
+        for stage in self.stages:
+            if stage.start_time is None:
+                Log.info('  {0:<40} {1}'.format(stage.name, stage.status))
+        total = sum(stage.duration for stage in started)
+        Log.info('  Total {0:.1f}s (sum of stages {1:.1f}s).'.format(self.end_time - self.start_time, total))
@@ -2,7 +2,6 @@
 # pylint: disable=broad-except
 import logging
 import os
-import time
 
 import psutil
 
@@ -10,6 +9,152 @@ from core.base_test.test_context import TestContext
 from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
+from core.utils.wait import Wait
+
+
+# noinspection PyBroadException
+class ProcessSnapshot(object):
+    """
+    Snapshot of process table.
+    Process table is walked once, name and commandline of all processes are indexed in memory.
+    Listening ports and open files are collected on first query (they are expensive to get).
+    When tests are executed by parallel workers only processes started in home of the worker are listed,
+    so workers do not kill processes of each other.
+    """
+
+    def __init__(self):
+        self.processes = []
+        self.by_name = {}
+        self.commandlines = []
+        self.__ports = None
+        self.__open_files = None
+        self.__groups = None
+        scope = Settings.TEST_RUN_HOME if Settings.WORKERS > 1 else None
+        attrs = ['name', 'cmdline', 'cwd'] if scope else ['name', 'cmdline']
+        for proc in psutil.process_iter(attrs=attrs, ad_value=None):
+            if scope and not ProcessSnapshot.__in_folder(proc.info.get('cwd'), scope):
+                continue
+            name = proc.info.get('name')
+            cmdline = proc.info.get('cmdline')
+            self.processes.append(proc)
+            if name is not None:
+                self.by_name.setdefault(str(name), []).append(proc)
+            if cmdline is not None:
+                cmdline = str(cmdline)
+                if Settings.HOST_OS == OSType.WINDOWS:
+                    cmdline = cmdline.replace('\\\\', '\\')
+                self.commandlines.append((cmdline, proc))
+
+    @staticmethod
+    def __in_folder(path, folder):
+        if path is None:
+            return False
+        path = os.path.normcase(os.path.abspath(path))
+        folder = os.path.normcase(os.path.abspath(folder))
+        return path == folder or path.startswith(folder + os.sep)
+
+    def find_by_name(self, proc_name, proc_cmdline=None, exact_match=True):
+        """
+        Find processes by name.
+        :param proc_name: Process name.
+        :param proc_cmdline: If specified only processes that contains it in commandline are returned.
+        :param exact_match: If False processes that contains proc_name in the name are returned.
+        :return: List of psutil.Process objects.
+        """
+        if exact_match:
+            result = list(self.by_name.get(proc_name, []))
+        else:
+            result = [proc for name in self.by_name if proc_name in name for proc in self.by_name[name]]
+        if proc_cmdline is not None:
+            matches = set([proc.pid for proc in self.find_by_commandline(proc_cmdline)])
+            result = [proc for proc in result if proc.pid in matches]
+        return result
+
+    def find_by_commandline(self, commandline):
+        """
+        Find processes by commandline.
+        :param commandline: Sub string of process commandline.
+        :return: List of psutil.Process objects.
+        """
+        return [proc for cmdline, proc in self.commandlines if commandline in cmdline]
+
+    def find_by_port(self, port):
+        """
+        Find processes with connection on port.
+        :param port: Local port.
+        :return: List of psutil.Process objects.
+        """
+        if self.__ports is None:
+            self.__ports = {}
+            procs = dict([(proc.pid, proc) for proc in self.processes])
+            try:
+                connections = [(connection.pid, connection) for connection in psutil.net_connections(kind='inet')]
+            except psutil.AccessDenied:
+                # On macOS all connections are available only for root, so get connections of each process
+                connections = []
+                for proc in self.processes:
+                    try:
+                        connections.extend([(proc.pid, connection) for connection in proc.connections(kind='inet')])
+                    except Exception:
+                        continue
+            for pid, connection in connections:
+                if pid in procs and connection.laddr:
+                    self.__ports.setdefault(connection.laddr[1], set()).add(pid)
+            self.__ports = dict([(key, [procs[pid] for pid in pids]) for key, pids in self.__ports.items()])
+        return list(self.__ports.get(port, []))
+
+    def find_by_open_file(self, file_path):
+        """
+        Find processes with open handle to file.
+        :param file_path: Sub string of file path (usually path to file or folder).
+        :return: List of psutil.Process objects.
+        """
+        if self.__open_files is None:
+            self.__open_files = []
+            for proc in self.processes:
+                try:
+                    self.__open_files.extend([(item.path, proc) for item in proc.open_files()])
+                except Exception:
+                    continue
+        result = []
+        for path, proc in self.__open_files:
+            if file_path in path and proc not in result:
+                result.append(proc)
+        return result
+
+    def find_by_group(self, pgids):
+        """
+        Find processes by process group (posix only).
+        :param pgids: List of process group ids.
+        :return: List of psutil.Process objects.
+        """
+        if self.__groups is None:
+            self.__groups = {}
+            if Settings.HOST_OS != OSType.WINDOWS:
+                for proc in self.processes:
+                    try:
+                        self.__groups.setdefault(os.getpgid(proc.pid), []).append(proc)
+                    except OSError:
+                        continue
+        return [proc for pgid in pgids for proc in self.__groups.get(pgid, [])]
+
+    @staticmethod
+    def kill(processes, reason=''):
+        """
+        Kill processes.
+        :param processes: List of psutil.Process objects.
+        :param reason: Description logged for each killed process.
+        :return: True if at least one process is killed.
+        """
+        result = False
+        for proc in processes:
+            try:
+                proc.kill()
+                Log.log(level=logging.DEBUG, msg="Process {0} has been killed.".format(reason or proc.pid))
+                result = True
+            except psutil.Error:
+                continue
+        return result
 
 
 # noinspection PyBroadException,PyUnusedLocal
@@ -23,43 +168,32 @@ class Process(object):
             return False
 
     @staticmethod
-    def is_running_by_name(proc_name):
+    def is_running_by_name(proc_name, snapshot=None):
         """
         Check if process is running.
         """
-        result = False
-        for proc in psutil.process_iter():
-            if proc_name in str(proc):
-                result = True
-                break
-        return result
+        snapshot = snapshot or ProcessSnapshot()
+        return bool(snapshot.find_by_name(proc_name=proc_name, exact_match=False))
 
     @staticmethod
-    def is_running_by_commandline(commandline):
+    def is_running_by_commandline(commandline, snapshot=None):
         """
         Check if process with specified commandline is running.
         """
-        proc = Process.get_proc_by_commandline(commandline=commandline)
+        proc = Process.get_proc_by_commandline(commandline=commandline, snapshot=snapshot)
         return bool(proc is not None)
 
     @staticmethod
-    def get_proc_by_commandline(commandline):
+    def get_proc_by_commandline(commandline, snapshot=None):
         """
         Get process by commandline.
         :param commandline: Sub string of process commandline.
+        :param snapshot: ProcessSnapshot object (if not specified new snapshot of process table is created).
         :return: Process.
         """
-        result = None
-        for proc in psutil.process_iter():
-            cmdline = ""
-            try:
-                cmdline = str(proc.cmdline())
-            except Exception:
-                continue
-            if commandline in cmdline:
-                result = proc
-                break
-        return result
+        snapshot = snapshot or ProcessSnapshot()
+        processes = snapshot.find_by_commandline(commandline=commandline)
+        return processes[0] if processes else None
 
     @staticmethod
     def wait_until_running(proc_name, timeout=60):
@@ -69,76 +203,84 @@ class Process(object):
         :param timeout: Timeout in seconds.
         :return: True if running, false if not running.
         """
-        running = False
-        end_time = time.time() + timeout
-        while not running:
-            time.sleep(5)
-            running = Process.is_running_by_name(proc_name)
-            if running:
-                running = True
-                break
-            if (running is False) and (time.time() > end_time):
-                error = "{0} not running in {1} seconds.", proc_name, timeout
-                raise Exception(error)
+        running = Wait.poll(lambda: Process.is_running_by_name(proc_name), timeout=timeout, period=0.5, backoff=1.5,
+                            max_period=5)
+        if not running:
+            raise Exception('{0} not running in {1} seconds.'.format(proc_name, timeout))
         return running
 
     @staticmethod
-    def kill(proc_name, proc_cmdline=None):
+    def kill(proc_name, proc_cmdline=None, snapshot=None):
         if Settings.HOST_OS is OSType.WINDOWS:
             proc_name += ".exe"
-        result = False
-        for proc in psutil.process_iter():
-            name = ""
-            cmdline = ""
+        snapshot = snapshot or ProcessSnapshot()
+        processes = snapshot.find_by_name(proc_name=proc_name, proc_cmdline=proc_cmdline)
+        return ProcessSnapshot.kill(processes=processes, reason=proc_name)
+
+    @staticmethod
+    def kill_by_commandline(cmdline, snapshot=None):
+        snapshot = snapshot or ProcessSnapshot()
+        processes = snapshot.find_by_commandline(commandline=cmdline)
+        return ProcessSnapshot.kill(processes=processes, reason=cmdline)
+
+    @staticmethod
+    def kill_by_port(port, snapshot=None):
+        snapshot = snapshot or ProcessSnapshot()
+        processes = snapshot.find_by_port(port=port)
+        if processes:
+            Log.info('Kill processes listening on port {0}.'.format(str(port)))
+        for proc in processes:
             try:
-                name = str(proc.name())
-                cmdline = str(proc.cmdline())
-            except Exception:
+                Log.debug('Kill process: ' + ''.join(proc.cmdline()))
+            except psutil.Error:
                 continue
-            if proc_name == name:
-                if Settings.HOST_OS == OSType.WINDOWS:
-                    cmdline = cmdline.replace('\\\\', '\\')
-                if (proc_cmdline is None) or (proc_cmdline is not None and proc_cmdline in cmdline):
-                    try:
-                        proc.kill()
-                        Log.log(level=logging.DEBUG, msg="Process {0} has been killed.".format(proc_name))
-                        result = True
-                    except psutil.NoSuchProcess:
-                        continue
-        return result
+        ProcessSnapshot.kill(processes=processes)
 
     @staticmethod
-    def kill_by_commandline(cmdline):
-        result = False
-        for proc in psutil.process_iter():
-            cmd = ""
+    def kill_trees(processes, timeout=5, include_children=True):
+        """
+        Stop processes and all their child processes.
+        SIGTERM is sent to all processes, then all of them are waited together and the ones that are still
+        running after timeout are killed with SIGKILL.
+        :param processes: List of psutil.Process objects.
+        :param timeout: Time to wait processes to exit after SIGTERM (and after SIGKILL).
+        :param include_children: If True child processes are stopped as well.
+        :return: Tuple with lists of psutil.Process objects (terminated, killed).
+        """
+        targets = {}
+        for proc in processes:
             try:
-                cmd = str(proc.cmdline())
-            except Exception:
+                targets[proc.pid] = proc
+                if include_children:
+                    for child in proc.children(recursive=True):
+                        targets[child.pid] = child
+            except psutil.Error:
                 continue
-            if cmdline in cmd:
-                try:
-                    proc.kill()
-                    Log.log(level=logging.DEBUG, msg="Process {0} has been killed.".format(cmdline))
-                    result = True
-                except psutil.NoSuchProcess:
-                    continue
-        return result
+        targets.pop(os.getpid(), None)
+        targets = list(targets.values())
+        if not targets:
+            return [], []
 
-    @staticmethod
-    def kill_by_port(port):
-        for proc in psutil.process_iter():
+        for proc in targets:
             try:
-                connections = proc.connections(kind='inet')
-                if connections:
-                    for connection in connections:
-                        if connection.laddr.port == port:
-                            cmd = ''.join(proc.cmdline())
-                            proc.kill()
-                            Log.info('Kill processes listening on port {0}.'.format(str(port)))
-                            Log.debug('Kill process: ' + cmd)
-            except Exception:
-                pass
+                proc.terminate()
+            except psutil.Error:
+                continue
+        terminated, alive = psutil.wait_procs(targets, timeout=timeout)
+        for proc in alive:
+            try:
+                proc.kill()
+            except psutil.Error:
+                continue
+        if alive:
+            psutil.wait_procs(alive, timeout=timeout)
+
+        for proc in terminated:
+            Log.debug('Process {0} terminated.'.format(proc.pid))
+        for proc in alive:
+            Log.debug('Process {0} killed (still running {1} seconds after SIGTERM).'.format(proc.pid, timeout))
+        Log.info('Stopped {0} processes ({1} killed).'.format(len(targets), len(alive)))
+        return terminated, alive
 
     @staticmethod
     def kill_pid(pid):
@@ -150,19 +292,25 @@ class Process(object):
             pass
 
     @staticmethod
-    def kill_by_handle(file_path):
-        for proc in psutil.process_iter():
+    def kill_by_handle(file_path, snapshot=None):
+        snapshot = snapshot or ProcessSnapshot()
+        processes = snapshot.find_by_open_file(file_path=file_path)
+        for proc in processes:
             try:
-                for item in proc.open_files():
-                    if file_path in item.path:
-                        Log.debug("{0} is locked by {1}".format(file_path, proc.name()))
-                        Log.debug("Proc cmd: {0}".format(proc.cmdline()))
-                        proc.kill()
-            except Exception:
+                Log.debug("{0} is locked by {1}".format(file_path, proc.name()))
+                Log.debug("Proc cmd: {0}".format(proc.cmdline()))
+            except psutil.Error:
                 continue
+        ProcessSnapshot.kill(processes=processes)
 
     @staticmethod
-    def kill_all_in_context():
+    def kill_all_in_context(snapshot=None):
+        snapshot = snapshot or ProcessSnapshot()
+        # Processes started in own process group are stopped with all their children
+        pgids = set([process.pgid for process in TestContext.STARTED_PROCESSES if process.pgid is not None])
+        if pgids:
+            Process.kill_trees(processes=snapshot.find_by_group(pgids=pgids))
         for process in TestContext.STARTED_PROCESSES:
-            name = process.commandline.split(' ')[0]
-            Process.kill(proc_name=name, proc_cmdline=Settings.TEST_RUN_HOME)
+            if process.pgid is None:
+                name = process.commandline.split(' ')[0]
+                Process.kill(proc_name=name, proc_cmdline=Settings.TEST_RUN_HOME, snapshot=snapshot)
@@ -1,9 +1,13 @@
 class ProcessInfo(object):
-    def __init__(self, cmd=None, pid=None, exit_code=None, output='', log_file=None, complete=True, duration=None):
+    def __init__(self, cmd=None, pid=None, exit_code=None, output='', log_file=None, complete=True, duration=None,
+                 stdout='', stderr='', pgid=None):
         self.commandline = cmd
         self.pid = pid
         self.output = output
+        self.stdout = stdout
+        self.stderr = stderr
         self.exit_code = exit_code
         self.log_file = log_file
         self.complete = complete
         self.duration = duration
+        self.pgid = pgid
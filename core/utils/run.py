@@ -1,11 +1,14 @@
 # pylint: disable=too-many-statements
 # pylint: disable=too-many-branches
+# pylint: disable=too-many-arguments
 # pylint: disable=broad-except
-# pylint: disable=unused-variable
+import collections
 import logging
 import os
+import threading
 import time
 from datetime import datetime
+from multiprocessing.pool import ThreadPool
 
 import psutil
 
@@ -14,6 +17,7 @@ from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
 from core.utils.file_utils import File, Folder
+from core.utils.process import Process
 from core.utils.process_info import ProcessInfo
 
 if os.name == 'posix' and Settings.PYTHON_VERSION < 3:
@@ -23,15 +27,118 @@ if os.name == 'posix' and Settings.PYTHON_VERSION < 3:
 else:
     import subprocess
 
+# Max number of lines kept in memory per stream (older lines are dropped, use `tee_file` to keep everything).
+OUTPUT_BUFFER_LINES = 100000
+
+# Time to wait for output readers after process exit (background children may keep the pipes open).
+READERS_TIMEOUT = 5
+
+# Default number of commands executed at the same time by `run_many`.
+RUN_MANY_WORKERS = 4
+
+
+def decode_line(line):
+    """
+    Decode line of process output.
+    :param line: Bytes read from the process pipe.
+    :return: Text (new line is preserved).
+    """
+    if Settings.PYTHON_VERSION < 3:
+        return str(line.decode('utf8', 'ignore').encode('utf8'))
+    return line.decode('utf-8', 'ignore')
+
+
+class OutputBuffer(object):
+    """
+    Output of a process stream.
+    Lines are stored in bounded ring buffer, optionally written to tee file and passed to callback.
+    """
+
+    def __init__(self, max_lines=OUTPUT_BUFFER_LINES, tee=None, tee_lock=None, callback=None):
+        self.lines = collections.deque(maxlen=max_lines)
+        self.dropped_lines = 0
+        self.tee = tee
+        self.tee_lock = tee_lock if tee_lock is not None else threading.Lock()
+        self.callback = callback
+
+    def add(self, raw_line):
+        """
+        Add line of output.
+        :param raw_line: Bytes read from the process pipe.
+        """
+        line = decode_line(raw_line)
+        if len(self.lines) == self.lines.maxlen:
+            self.dropped_lines += 1
+        self.lines.append(line)
+        if self.tee is not None:
+            with self.tee_lock:
+                self.tee.write(raw_line)
+                self.tee.flush()
+        if self.callback is not None:
+            try:
+                self.callback(line)
+            except Exception as error:
+                Log.debug('Output callback failed: {0}'.format(error))
+
+    @property
+    def text(self):
+        return ''.join(self.lines)
+
+
+class OutputReader(threading.Thread):
+    """
+    Drain stream of a process to OutputBuffer in background thread.
+    """
+
+    def __init__(self, stream, max_lines=OUTPUT_BUFFER_LINES, tee=None, tee_lock=None, callback=None):
+        super(OutputReader, self).__init__()
+        self.daemon = True
+        self.stream = stream
+        self.buffer = OutputBuffer(max_lines=max_lines, tee=tee, tee_lock=tee_lock, callback=callback)
+
+    def run(self):
+        try:
+            for raw_line in iter(self.stream.readline, b''):
+                self.buffer.add(raw_line)
+        except (ValueError, IOError, OSError):
+            # Stream is closed (for example when process is killed on timeout).
+            pass
+
+    @property
+    def dropped_lines(self):
+        return self.buffer.dropped_lines
+
+    @property
+    def text(self):
+        return self.buffer.text
+
 
 def run(cmd, cwd=Settings.TEST_RUN_HOME, wait=True, timeout=600, fail_safe=False, register=True,
-        log_level=logging.DEBUG):
+        log_level=logging.DEBUG, tee_file=None, line_callback=None, max_lines=OUTPUT_BUFFER_LINES, on_start=None):
+    """
+    Execute command.
+    :param cmd: Command (executed in shell).
+    :param cwd: Working directory.
+    :param wait: If True wait until command complete, otherwise redirect output to log file and return.
+    :param timeout: Timeout in seconds (used only when wait=True).
+    :param fail_safe: If True do not raise exception on timeout.
+    :param register: If True register process in TestContext.
+    :param log_level: Log level.
+    :param tee_file: Optional file where full stdout and stderr is written while command is running.
+    :param line_callback: Optional function called with each line of stdout and stderr.
+    :param max_lines: Max lines of stdout and stderr kept in memory.
+    :param on_start: Optional function called with pid of the process when it is started (used only when wait=True).
+    :return: ProcessInfo object.
+    """
     # Init result values
     time_string = datetime.now().strftime('%Y_%m_%d_%H_%M_%S_%f')
     log_file = os.path.join(Settings.TEST_OUT_LOGS, 'command_{0}.txt'.format(time_string))
     complete = False
     duration = None
     output = ''
+    stdout = ''
+    stderr = ''
+    pgid = None
 
     # Ensure logs folder exists
     dir_path = os.path.dirname(os.path.realpath(log_file))
@@ -50,44 +157,77 @@ def run(cmd, cwd=Settings.TEST_RUN_HOME, wait=True, timeout=600, fail_safe=False
     # Execute command:
     if wait:
         start = time.time()
-        with open(log_file, mode='w') as log:
-            if Settings.HOST_OS == OSType.WINDOWS:
-                process = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=log, stderr=log)
-            else:
-                process = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=log)
+        tee = None
+        if tee_file is not None:
+            Folder.create(os.path.dirname(os.path.realpath(tee_file)))
+            tee = open(tee_file, mode='wb')
+        tee_lock = threading.Lock()
+        process = subprocess.Popen(cmd, cwd=cwd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        readers = [OutputReader(stream=process.stdout, max_lines=max_lines, tee=tee, tee_lock=tee_lock,
+                                callback=line_callback),
+                   OutputReader(stream=process.stderr, max_lines=max_lines, tee=tee, tee_lock=tee_lock,
+                                callback=line_callback)]
+        for reader in readers:
+            reader.start()
+        if on_start is not None:
+            on_start(process.pid)
 
-        # Wait until command complete
+        # Wait until command complete (pipes are drained by readers, so process can not block on full buffer)
         try:
             process.wait(timeout=timeout)
             complete = True
-            out, err = process.communicate()
-            if out is not None:
-                if Settings.PYTHON_VERSION < 3:
-                    output = str(out.decode('utf8').encode('utf8')).strip()
-                else:
-                    output = out.decode("utf-8").strip()
+            end = time.time()
+            for reader in readers:
+                reader.join(timeout=READERS_TIMEOUT)
+                if reader.is_alive():
+                    Log.debug('Output of "{0}" is still open by child process.'.format(cmd))
         except subprocess.TimeoutExpired:
+            # Kill children of the shell first, otherwise they keep the pipes open.
+            try:
+                for child in psutil.Process(process.pid).children(recursive=True):
+                    child.kill()
+            except psutil.Error:
+                pass
             process.kill()
+            end = time.time()
+            # Child processes of the shell may still hold the pipes, so do not wait readers forever.
+            readers_end_time = time.time() + 1
+            for reader in readers:
+                reader.join(timeout=max(readers_end_time - time.time(), 0))
             if fail_safe:
                 Log.error('Command "{0}" timeout after {1} seconds.'.format(cmd, timeout))
             else:
                 raise
+        finally:
+            if tee is not None:
+                with tee_lock:
+                    tee.close()
+
+        stdout = readers[0].text
+        stderr = readers[1].text
+        for reader in readers:
+            if reader.dropped_lines > 0:
+                Log.debug('{0} lines of output dropped (max_lines={1}).'.format(reader.dropped_lines, max_lines))
 
         # Append stderr to output
-        stderr = File.read(path=log_file)
+        output = stdout.strip()
         if stderr:
-            output = output + os.linesep + File.read(path=log_file)
+            output = output + os.linesep + stderr
 
-        # noinspection PyBroadException
-        try:
-            File.delete(path=log_file)
-        except Exception:
-            Log.debug('Failed to clean log file: {0}'.format(log_file))
-        log_file = None
-        end = time.time()
+        log_file = tee_file
         duration = end - start
     else:
-        process = psutil.Popen(cmd, cwd=cwd, shell=True, stdin=None, stdout=None, stderr=None, close_fds=True)
+        # On posix start process in new session, so it can be stopped with all its children by process group id
+        kwargs = {}
+        if Settings.HOST_OS != OSType.WINDOWS:
+            if Settings.PYTHON_VERSION < 3:
+                kwargs['preexec_fn'] = os.setsid
+            else:
+                kwargs['start_new_session'] = True
+        process = psutil.Popen(cmd, cwd=cwd, shell=True, stdin=None, stdout=None, stderr=None, close_fds=True,
+                               **kwargs)
+        if Settings.HOST_OS != OSType.WINDOWS:
+            pgid = process.pid
 
     # Get result
     pid = process.pid
@@ -101,7 +241,7 @@ def run(cmd, cwd=Settings.TEST_RUN_HOME, wait=True, timeout=600, fail_safe=False
 
     # Construct result
     result = ProcessInfo(cmd=cmd, pid=pid, exit_code=exit_code, output=output, log_file=log_file, complete=complete,
-                         duration=duration)
+                         duration=duration, stdout=stdout, stderr=stderr, pgid=pgid)
 
     # Register in TestContext
     if psutil.pid_exists(result.pid) and register:
@@ -109,3 +249,105 @@ def run(cmd, cwd=Settings.TEST_RUN_HOME, wait=True, timeout=600, fail_safe=False
 
     # Return the result
     return result
+
+
+def run_many(commands, max_workers=RUN_MANY_WORKERS, timeout=600, stop_on_failure=False, **kwargs):
+    """
+    Execute commands in parallel and wait until all of them complete.
+    Each command is executed with `run(wait=True)` on a thread pool, so process that exceeds its timeout is killed
+    with its child processes and processes that are still running are registered in TestContext.
+    If a command raises exception (for example on timeout without `fail_safe`) or fails when `stop_on_failure`
+    is set, commands that are still running are stopped and commands that are not started yet are skipped.
+    :param commands: List of commands. Item can be command string or dict with arguments of `run`
+    (for example `{'cmd': 'npm pack', 'cwd': path, 'timeout': 60}`).
+    :param max_workers: Max number of commands executed at the same time.
+    :param timeout: Timeout of each command in seconds.
+    :param stop_on_failure: If True command that exits with non zero exit code stops other commands.
+    :param kwargs: Arguments of `run` used for all commands (values in command dict take precedence).
+    :return: List of ProcessInfo objects (in order of commands, skipped commands are not complete).
+    """
+    lock = threading.Lock()
+    running = {}
+    stopped = threading.Event()
+
+    def stop(pid):
+        # Shell is only signaled (it is waited by `run`, waiting it here would hide its exit code),
+        # its child processes are stopped and waited.
+        try:
+            shell = psutil.Process(pid)
+            children = shell.children(recursive=True)
+            shell.terminate()
+        except psutil.Error:
+            return
+        Process.kill_trees(processes=children, include_children=False)
+
+    def stop_others():
+        with lock:
+            stopped.set()
+            pids = list(running.values())
+        if pids:
+            Log.info('Stop {0} running commands.'.format(len(pids)))
+        for pid in pids:
+            stop(pid)
+
+    def execute(index):
+        options = dict(kwargs, timeout=timeout, wait=True)
+        command = commands[index]
+        options.update(command if isinstance(command, dict) else {'cmd': command})
+        if stopped.is_set():
+            Log.debug('Command "{0}" is skipped.'.format(options['cmd']))
+            return ProcessInfo(cmd=options['cmd'], complete=False)
+
+        def on_start(pid):
+            with lock:
+                running[index] = pid
+                stop_now = stopped.is_set()
+            if stop_now:
+                # Other command failed while this one was starting.
+                stop(pid)
+
+        options['on_start'] = on_start
+        try:
+            result = run(**options)
+        except Exception:
+            with lock:
+                running.pop(index, None)
+            stop_others()
+            raise
+        with lock:
+            running.pop(index, None)
+        if stop_on_failure and result.exit_code != 0 and not stopped.is_set():
+            Log.info('Command "{0}" failed with exit code {1}.'.format(options['cmd'], result.exit_code))
+            stop_others()
+        return result
+
+    if not commands:
+        return []
+    pool = ThreadPool(processes=max(1, min(max_workers, len(commands))))
+    try:
+        return pool.map(execute, range(len(commands)))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def run_output(args, timeout=60, log_level=logging.DEBUG):
+    """
+    Execute command without shell and return its stdout as bytes (for binary output like screenshots).
+    Output is kept only in memory, it is not logged or written to files.
+    :param args: Command as list of arguments.
+    :param timeout: Timeout in seconds (process is killed and TimeoutExpired is raised on timeout).
+    :param log_level: Log level.
+    :return: Tuple (exit code, stdout as bytes).
+    """
+    Log.log(level=log_level, msg='Execute command: ' + ' '.join(args))
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise
+    if process.returncode != 0:
+        Log.log(level=log_level, msg='Exit code {0}: {1}'.format(process.returncode, stderr.decode('utf-8', 'ignore')))
+    return process.returncode, stdout
@@ -0,0 +1,219 @@
+"""
+Parallel test run: test classes are split between workers by durations measured in previous runs
+and results of workers are merged into single xunit report.
+
+Each worker runs nose in own home folder with links to project files, so apps and test output of workers
+do not collide, and uses own emulator ports and simulators (see `Settings.bind_devices_to_worker`).
+"""
+import importlib
+import inspect
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+from core.enums.os_type import OSType
+from core.log.log import Log
+from core.settings import Settings
+from core.utils.file_utils import Folder
+
+# Duration (in seconds) of test class that was not executed before
+DEFAULT_DURATION = 300
+
+# Project files that are not linked in homes of workers
+NOT_LINKED = ('.git', '.trash', 'out', 'backup_folder')
+
+# Default `testMatch` of nose (names of test modules)
+TEST_MATCH = re.compile(r'(?:^|[\b_\.-])[Tt]est')
+
+NOSE_ARGS = ['-v', '-s', '--nologcapture', '--with-doctest', '--with-xunit', '--with-flaky']
+
+
+class Sharding(object):
+    @staticmethod
+    def collect(names):
+        """
+        Get test classes (same modules as nose finds, classes derived from unittest.TestCase).
+        :param names: Tests in nose format (folders, modules or classes), for example `tests/cli/run`.
+        :return: List of addresses of test classes (`module:Class`).
+        """
+        addresses = []
+        for name in names:
+            if ':' in name:
+                addresses.append(name)
+                continue
+            if os.path.isdir(name):
+                paths = []
+                for root, dirs, files in os.walk(name):
+                    # Same as nose: only packages are searched for test modules.
+                    dirs[:] = sorted(item for item in dirs if os.path.isfile(os.path.join(root, item, '__init__.py')))
+                    paths.extend(os.path.join(root, item) for item in sorted(files)
+                                 if item.endswith('.py') and TEST_MATCH.search(item[:-3]))
+            else:
+                paths = [name]
+            for path in paths:
+                module_name = os.path.splitext(os.path.relpath(path))[0].replace(os.sep, '.') \
+                    if path.endswith('.py') else path
+                module = importlib.import_module(module_name)
+                for item in sorted(vars(module).values(), key=Sharding.__line):
+                    if inspect.isclass(item) and issubclass(item, unittest.TestCase) and \
+                            item.__module__ == module.__name__ and unittest.TestLoader().getTestCaseNames(item):
+                        addresses.append('{0}:{1}'.format(module.__name__, item.__name__))
+        return addresses
+
+    @staticmethod
+    def __line(item):
+        # Classes are returned in order of definition.
+        try:
+            return inspect.getsourcelines(item)[1] if inspect.isclass(item) else 0
+        except (IOError, OSError, TypeError):
+            return 0
+
+    @staticmethod
+    def distribute(tests, durations, workers):
+        """
+        Split tests between workers so workers finish at the same time (longest tests are assigned first).
+        :param tests: List of test addresses.
+        :param durations: Dict with durations of tests in seconds (unknown tests take `DEFAULT_DURATION`).
+        :param workers: Count of workers.
+        :return: List of shards (lists of tests in original order), one per worker.
+        """
+        shards = [[] for _ in range(workers)]
+        loads = [0.0] * workers
+        by_duration = sorted(tests, key=lambda test: -durations.get(Sharding.key(test), DEFAULT_DURATION))
+        for test in by_duration:
+            worker = loads.index(min(loads))
+            shards[worker].append(test)
+            loads[worker] += durations.get(Sharding.key(test), DEFAULT_DURATION)
+        return [sorted(shard, key=tests.index) for shard in shards]
+
+    @staticmethod
+    def key(address):
+        """
+        Get key of test in durations (xunit class name, for example `tests.cli.run.tests.run_tests.RunTests`).
+        :param address: Test address (`module:Class`).
+        """
+        return address.replace(':', '.')
+
+    @staticmethod
+    def read_durations(path=Settings.TEST_DURATIONS):
+        try:
+            with open(path, 'r') as durations_file:
+                return json.load(durations_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_durations(durations, path=Settings.TEST_DURATIONS):
+        Folder.create(os.path.dirname(path))
+        with open(path, 'w') as durations_file:
+            json.dump(durations, durations_file, indent=4, sort_keys=True)
+
+    @staticmethod
+    def get_durations(xunit_file):
+        """
+        Get durations of test classes.
+        :param xunit_file: Path to xunit report.
+        :return: Dict with durations in seconds by xunit class name (for modules with test functions module name).
+        """
+        durations = {}
+        for case in ET.parse(xunit_file).getroot().iter('testcase'):
+            class_name = case.get('classname', '')
+            durations[class_name] = durations.get(class_name, 0.0) + float(case.get('time', 0) or 0)
+        return durations
+
+    @staticmethod
+    def merge_xunit(files, output):
+        """
+        Merge xunit reports of workers.
+        :param files: List of paths to xunit reports (missing report is reported as error).
+        :param output: Path to merged report.
+        """
+        counts = {'tests': 0, 'errors': 0, 'failures': 0, 'skip': 0}
+        suite = ET.Element('testsuite', name='nosetests')
+        for path in files:
+            if not os.path.isfile(path):
+                Log.error('Results of worker not found: {0}'.format(path))
+                case = ET.SubElement(suite, 'testcase', classname='sharding', name=os.path.basename(path), time='0')
+                ET.SubElement(case, 'error', type='WorkerError', message='Results of worker not found.')
+                counts['tests'] += 1
+                counts['errors'] += 1
+                continue
+            root = ET.parse(path).getroot()
+            for name in counts:
+                counts[name] += int(root.get(name, 0) or 0)
+            for case in root.iter('testcase'):
+                suite.append(case)
+        for name, count in counts.items():
+            suite.set(name, str(count))
+        Folder.create(os.path.dirname(os.path.abspath(output)))
+        ET.ElementTree(suite).write(output, encoding='utf-8', xml_declaration=True)
+
+    @staticmethod
+    def create_worker_home(worker, project_home=Settings.TEST_RUN_HOME):
+        """
+        Create home folder of worker with links to project files (apps and test output are created there).
+        :param worker: Index of worker.
+        :param project_home: Project folder.
+        :return: Path to home of the worker.
+        """
+        if Settings.HOST_OS is OSType.WINDOWS:
+            raise Exception('Parallel test run is not supported on Windows.')
+        home = os.path.join(project_home, 'out', 'workers', 'worker_{0}'.format(worker))
+        Folder.create(home)
+        for item in os.listdir(project_home):
+            link = os.path.join(home, item)
+            if item in NOT_LINKED or os.path.lexists(link):
+                continue
+            source = os.path.join(project_home, item)
+            if os.path.isdir(source) and item not in ('node_modules', 'sut') and \
+                    os.path.isfile(os.path.join(source, 'package.json')):
+                # App created by previous test run.
+                continue
+            os.symlink(source, link)
+        return home
+
+    @staticmethod
+    def run(names, workers):
+        """
+        Run tests in parallel workers.
+        :param names: Tests in nose format.
+        :param workers: Count of workers.
+        :return: True if all tests passed.
+        """
+        workers = max(1, min(workers, len(Settings.EMULATOR_PORTS) // Settings.WORKER_EMULATORS))
+        tests = Sharding.collect(names)
+        durations = Sharding.read_durations()
+        shards = Sharding.distribute(tests=tests, durations=durations, workers=workers)
+        Log.info('Run {0} test classes in {1} workers.'.format(len(tests), workers))
+
+        processes = []
+        reports = []
+        for worker, shard in enumerate(shards):
+            if not shard:
+                continue
+            home = Sharding.create_worker_home(worker=worker)
+            report = os.path.join(Settings.TEST_OUT_HOME, 'nosetests_{0}.xml'.format(worker))
+            log_file = os.path.join(Settings.TEST_OUT_LOGS, 'worker_{0}.log'.format(worker))
+            env = dict(os.environ, TEST_WORKER=str(worker), TEST_WORKERS=str(workers))
+            args = [sys.executable, '-m', 'nose', '--xunit-file=' + report] + NOSE_ARGS + shard
+            Log.info('Worker {0}: {1}'.format(worker, ' '.join(shard)))
+            Folder.create(Settings.TEST_OUT_LOGS)
+            with open(log_file, 'w') as log:
+                processes.append(subprocess.Popen(args, cwd=home, env=env, stdout=log, stderr=subprocess.STDOUT))
+            reports.append(report)
+
+        start = time.time()
+        exit_codes = [process.wait() for process in processes]
+        Log.info('Workers finished in {0:.0f} seconds.'.format(time.time() - start))
+
+        Sharding.merge_xunit(files=reports, output=os.path.join(Settings.TEST_RUN_HOME, 'nosetests.xml'))
+        for report in reports:
+            if os.path.isfile(report):
+                durations.update(Sharding.get_durations(report))
+        Sharding.save_durations(durations)
+        return all(exit_code == 0 for exit_code in exit_codes)
@@ -1,7 +1,61 @@
+# pylint: disable=too-many-arguments
+# pylint: disable=protected-access
+import os
+import random
+import sys
 import time
 
+import psutil
+
+from core.base_test.test_context import TestContext
+from core.log.log import Log
+
+
+class Deadline(object):
+    """
+    Time budget shared by multiple waits (for example all waits in one test).
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.end_time = time.time() + timeout
+
+    def remaining(self):
+        return max(self.end_time - time.time(), 0)
+
+    def expired(self):
+        return time.time() >= self.end_time
+
+
+class WaitStats(object):
+    """
+    Timing stats of waits started from one call site.
+    """
+
+    def __init__(self, site):
+        self.site = site
+        self.count = 0
+        self.timeouts = 0
+        self.checks = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def add(self, duration, checks, satisfied):
+        self.count += 1
+        self.checks += checks
+        self.total_time += duration
+        self.max_time = max(self.max_time, duration)
+        if not satisfied:
+            self.timeouts += 1
+
+    def __str__(self):
+        return '{0}: {1} waits, {2} checks, {3} timeouts, total {4:.1f}s, max {5:.1f}s'.format(
+            self.site, self.count, self.checks, self.timeouts, self.total_time, self.max_time)
+
 
 class Wait(object):
+    STATS = {}
+
     @staticmethod
     def until(condition, timeout=100, period=1, *args, **kwargs):
         """
@@ -9,9 +63,116 @@ class Wait(object):
         :rtype: bool
         :returns: True if condition is satisfied before timeout, otherwise False.
         """
-        end_time = time.time() + timeout
-        while time.time() < end_time:
-            if condition(*args, **kwargs):
-                return True
-            time.sleep(period)
-        return False
+        return bool(Wait.poll(lambda: condition(*args, **kwargs), timeout=timeout, period=period,
+                              site=Wait.__caller()))
+
+    @staticmethod
+    def poll(condition, timeout=100, period=1, backoff=1.0, max_period=None, jitter=0.0, deadline=None, site=None):
+        """
+        Check condition until it returns truthy value.
+        :param condition: Function without arguments.
+        :param timeout: Timeout in seconds.
+        :param period: Time to sleep after the first check.
+        :param backoff: Multiplier of period after each check (1.0 means fixed period).
+        :param max_period: Max time to sleep between checks.
+        :param jitter: Random part of the period (0.1 means +/-10%), avoids checks of parallel waits in lockstep.
+        :param deadline: Deadline object, if not specified `TestContext.DEADLINE` is used (when set).
+        :param site: Name used for timing stats (by default file and line of the caller).
+        :returns: Last result of the condition (falsy value if not satisfied before timeout).
+        """
+        if deadline is None:
+            deadline = TestContext.DEADLINE
+        if deadline is not None:
+            if deadline.remaining() < timeout:
+                Log.debug('Wait timeout reduced to {0:.1f}s by test deadline.'.format(deadline.remaining()))
+            timeout = min(timeout, deadline.remaining())
+        if site is None:
+            site = Wait.__caller()
+
+        start_time = time.time()
+        end_time = start_time + timeout
+        checks = 0
+        result = None
+        while True:
+            result = condition()
+            checks += 1
+            if result:
+                break
+            now = time.time()
+            if now >= end_time:
+                break
+            sleep_time = period
+            if jitter:
+                sleep_time += period * random.uniform(-jitter, jitter)
+            time.sleep(max(min(sleep_time, end_time - now), 0))
+            period *= backoff
+            if max_period is not None:
+                period = min(period, max_period)
+
+        Wait.__add_stats(site=site, start_time=start_time, checks=checks, satisfied=bool(result))
+        return result
+
+    @staticmethod
+    def for_file_change(path, timeout=60, period=0.1):
+        """
+        Wait until file is created, modified or deleted.
+        :param path: Path to file.
+        :param timeout: Timeout in seconds.
+        :param period: Check interval (only os.stat is executed on each check).
+        :returns: True if file is changed before timeout, otherwise False.
+        """
+        def get_state():
+            try:
+                stat = os.stat(path)
+                return stat.st_mtime, stat.st_size
+            except OSError:
+                return None
+
+        initial_state = get_state()
+        return bool(Wait.poll(lambda: get_state() != initial_state, timeout=timeout, period=period,
+                              site=Wait.__caller()))
+
+    @staticmethod
+    def for_process_exit(pid, timeout=60):
+        """
+        Wait until process exits.
+        :param pid: Process id.
+        :param timeout: Timeout in seconds.
+        :returns: True if process is not running before timeout, otherwise False.
+        """
+        start_time = time.time()
+        site = Wait.__caller()
+        exited = True
+        deadline = TestContext.DEADLINE
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        try:
+            psutil.Process(pid).wait(timeout=timeout)
+        except psutil.NoSuchProcess:
+            pass
+        except psutil.TimeoutExpired:
+            exited = False
+        Wait.__add_stats(site=site, start_time=start_time, checks=1, satisfied=exited)
+        return exited
+
+    @staticmethod
+    def log_stats(reset=True):
+        """
+        Log timing stats of waits (slowest call sites first).
+        :param reset: If True clean stats after logging.
+        """
+        stats = sorted(Wait.STATS.values(), key=lambda item: item.total_time, reverse=True)
+        for item in stats:
+            Log.info(str(item))
+        if reset:
+            Wait.STATS.clear()
+
+    @staticmethod
+    def __add_stats(site, start_time, checks, satisfied):
+        stats = Wait.STATS.setdefault(site, WaitStats(site=site))
+        stats.add(duration=time.time() - start_time, checks=checks, satisfied=satisfied)
+
+    @staticmethod
+    def __caller():
+        frame = sys._getframe(2)
+        return '{0}:{1}'.format(os.path.basename(frame.f_code.co_filename), frame.f_lineno)
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from core.settings import Settings
+from core.utils.file_utils import File, Folder
+from core.utils.process_info import ProcessInfo
+from products.nativescript.app_snapshots import AppSnapshots
+from products.nativescript.tns_paths import TnsPaths
+
+
+# noinspection PyMethodMayBeStatic
+class AppSnapshotsTests(unittest.TestCase):
+    app_name = 'SnapshotTestApp'
+    app_path = TnsPaths.get_app_path(app_name=app_name)
+
+    def setUp(self):
+        Folder.clean(self.app_path)
+        Folder.clean(AppSnapshots.FOLDER)
+        Folder.create(os.path.join(self.app_path, 'node_modules', 'module'))
+        File.write(path=os.path.join(self.app_path, 'package.json'), text='{}')
+        File.write(path=os.path.join(self.app_path, 'node_modules', 'module', 'index.js'), text='module')
+        AppSnapshots.forget(app_name=self.app_name)
+
+    def tearDown(self):
+        Folder.clean(self.app_path)
+
+    def test_01_save_and_restore(self):
+        key = AppSnapshots.create_key(app_name=self.app_name, command='create ' + self.app_name)
+        assert AppSnapshots.restore(key=key, app_name=self.app_name) is None, 'Snapshot should not exist.'
+        AppSnapshots.save(key=key, app_name=self.app_name, result=ProcessInfo(cmd='tns create', output='created'))
+        Folder.clean(self.app_path)
+        result = AppSnapshots.restore(key=key, app_name=self.app_name)
+        assert result.output == 'created', 'Output of the command that created the snapshot should be returned.'
+        assert result.exit_code == 0
+        assert File.read(os.path.join(self.app_path, 'node_modules', 'module', 'index.js')) == 'module'
+
+    def test_02_keys(self):
+        key = AppSnapshots.create_key(app_name=self.app_name, command='create ' + self.app_name)
+        assert key != AppSnapshots.create_key(app_name=self.app_name, command='create --template ts'), \
+            'Different commands should have different keys.'
+        assert AppSnapshots.create_key(app_name=self.app_name, command='create', template=Settings.TEST_RUN_HOME) \
+            is None, 'Local folder templates should not be restored from snapshot.'
+
+        assert AppSnapshots.platform_key(app_name=self.app_name, command='platform add android') is None, \
+            'App that is not created from snapshot has no platform key.'
+        AppSnapshots.save(key=key, app_name=self.app_name, result=ProcessInfo(cmd='tns create'))
+        assert AppSnapshots.platform_key(app_name=self.app_name, command='platform add android') is not None
+        File.write(path=os.path.join(self.app_path, 'app.js'), text='modified')
+        assert AppSnapshots.platform_key(app_name=self.app_name, command='platform add android') is None, \
+            'Modified app has no platform key.'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+import os
+import struct
+import threading
+import unittest
+
+try:
+    import socketserver
+except ImportError:
+    # noinspection PyUnresolvedReferences,PyPep8Naming
+    import SocketServer as socketserver
+
+from core.settings import Settings
+from core.utils.device.adb_client import AdbClient, AdbError, AdbSyncError, EXIT_CODE_MARKER
+from core.utils.file_utils import File, Folder
+
+SERIAL = 'emulator-5554'
+
+
+class FakeAdbHandler(socketserver.BaseRequestHandler):
+    """
+    Minimal adb server (host protocol) with single device.
+    """
+
+    def read(self, size):
+        data = b''
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def okay(self, payload=None):
+        self.request.sendall(b'OKAY')
+        if payload is not None:
+            self.request.sendall('{0:04x}'.format(len(payload)).encode('ascii') + payload.encode('utf-8'))
+
+    def fail(self, message):
+        self.request.sendall(b'FAIL' + '{0:04x}'.format(len(message)).encode('ascii') + message.encode('utf-8'))
+
+    def handle(self):
+        self.server.connections += 1
+        while True:
+            length = self.read(4)
+            if length is None:
+                return
+            request = self.read(int(length, 16)).decode('utf-8')
+            if request == 'host:version':
+                return self.okay('0029')
+            elif request == 'host:devices':
+                return self.okay('{0}\tdevice\n'.format(SERIAL))
+            elif request.startswith('host:transport:'):
+                if request != 'host:transport:' + SERIAL:
+                    return self.fail('device not found')
+                self.okay()
+            elif request.startswith('shell:'):
+                self.okay()
+                return self.shell(request[len('shell:'):])
+            elif request.startswith('exec:'):
+                self.okay()
+                return self.request.sendall(bytes(bytearray(range(256))) * 4)
+            elif request == 'sync:':
+                self.okay()
+                self.server.sync_connections += 1
+                return self.sync()
+            else:
+                return self.fail('unknown service ' + request)
+
+    def shell(self, command):
+        command, _, marker = command.partition('; echo ')
+        outputs = {'getprop ro.product.model': 'Android SDK built for x86\r\n'}
+        output = outputs.get(command, '/system/bin/sh: {0}: not found\r\n'.format(command))
+        exit_code = 0 if command in outputs else 127
+        if marker:
+            output += marker.replace('$?', str(exit_code)) + '\r\n'
+        self.request.sendall(output.encode('utf-8'))
+
+    def sync(self):
+        files = self.server.files
+        while True:
+            header = self.read(8)
+            if header is None:
+                return
+            request_id, length = header[:4], struct.unpack('<I', header[4:])[0]
+            payload = self.read(length) if length else b''
+            if request_id == b'QUIT':
+                return
+            elif request_id == b'STAT':
+                content = files.get(payload.decode('utf-8'))
+                mode, size = (0o100644, len(content)) if content is not None else (0, 0)
+                self.request.sendall(b'STAT' + struct.pack('<III', mode, size, 0))
+            elif request_id == b'RECV':
+                content = files.get(payload.decode('utf-8'))
+                if content is None:
+                    message = b'No such file or directory'
+                    self.request.sendall(b'FAIL' + struct.pack('<I', len(message)) + message)
+                    continue
+                for start in range(0, len(content), 1000):
+                    chunk = content[start:start + 1000]
+                    self.request.sendall(b'DATA' + struct.pack('<I', len(chunk)) + chunk)
+                self.request.sendall(b'DONE' + struct.pack('<I', 0))
+            elif request_id == b'SEND':
+                path = payload.decode('utf-8').rsplit(',', 1)[0]
+                content = b''
+                while True:
+                    header = self.read(8)
+                    data_id, length = header[:4], struct.unpack('<I', header[4:])[0]
+                    if data_id == b'DONE':
+                        break
+                    content += self.read(length)
+                files[path] = content
+                self.request.sendall(b'OKAY' + struct.pack('<I', 0))
+
+
+class FakeAdbServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), FakeAdbHandler)
+        self.connections = 0
+        self.sync_connections = 0
+        self.files = {}
+
+
+# noinspection PyMethodMayBeStatic
+class AdbClientTests(unittest.TestCase):
+    server = None
+    local_file = os.path.join(Settings.TEST_OUT_HOME, 'adb', 'file.bin')
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeAdbServer()
+        thread = threading.Thread(target=cls.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Folder.clean(os.path.dirname(self.local_file))
+        Folder.create(os.path.dirname(self.local_file))
+        self.client = AdbClient(port=self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_01_host_services(self):
+        assert self.client.version() == 41, 'Wrong version of adb server.'
+        assert self.client.devices() == [(SERIAL, 'device')], 'Wrong list of devices.'
+
+    def test_02_shell(self):
+        exit_code, output = self.client.shell(serial=SERIAL, command='getprop ro.product.model')
+        assert exit_code == 0, 'Wrong exit code of successful command.'
+        assert output == 'Android SDK built for x86\n', 'Wrong output: {0}'.format(output)
+        assert EXIT_CODE_MARKER not in output, 'Exit code marker should be removed from output.'
+        exit_code, output = self.client.shell(serial=SERIAL, command='missing')
+        assert exit_code == 127, 'Wrong exit code of failed command.'
+        assert 'not found' in output
+        lines = list(self.client.stream(serial=SERIAL, command='getprop ro.product.model'))
+        assert lines == ['Android SDK built for x86'], 'Wrong lines: {0}'.format(lines)
+
+    def test_03_exec_out(self):
+        output = self.client.exec_out(serial=SERIAL, command='screencap')
+        assert output == bytes(bytearray(range(256))) * 4, 'Binary output should not be modified.'
+
+    def test_04_unknown_device(self):
+        with self.assertRaises(AdbError):
+            self.client.shell(serial='emulator-5556', command='getprop ro.product.model')
+
+    def test_05_push_and_pull(self):
+        content = os.urandom(200 * 1024)
+        with open(self.local_file, 'wb') as local_file:
+            local_file.write(content)
+        sync_connections = self.server.sync_connections
+        self.client.push(serial=SERIAL, local=self.local_file, remote='/sdcard/file.bin')
+        assert self.client.stat(serial=SERIAL, path='/sdcard/file.bin')[1] == len(content)
+        File.delete(self.local_file)
+        size = self.client.pull(serial=SERIAL, remote='/sdcard/file.bin', local=self.local_file)
+        assert size == len(content), 'Wrong size of pulled file.'
+        with open(self.local_file, 'rb') as local_file:
+            assert local_file.read() == content, 'Pulled file should be same as pushed file.'
+        with self.assertRaises(AdbSyncError):
+            self.client.pull(serial=SERIAL, remote='/sdcard/missing.bin', local=self.local_file)
+        assert self.client.stat(serial=SERIAL, path='/sdcard/missing.bin')[0] == 0
+        assert self.server.sync_connections == sync_connections + 1, 'Sync connection should be reused.'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import errno
+import socket
+import struct
+import unittest
+
+import numpy
+
+from core.utils.device.adb import Adb, ADB_PATH
+
+
+# noinspection PyMethodMayBeStatic
+class AdbTests(unittest.TestCase):
+    def test_01_decode_screencap(self):
+        rgba = numpy.zeros((2, 3, 4), dtype=numpy.uint8)
+        rgba[0, 1] = [10, 20, 30, 255]
+        rgba[1, 2] = [200, 100, 50, 255]
+        for header in [struct.pack('<III', 3, 2, 1), struct.pack('<IIII', 3, 2, 1, 1)]:
+            image = Adb.decode_screencap(header + rgba.tobytes())
+            assert image.shape == (2, 3, 3), 'Wrong size of decoded image: {0}'.format(image.shape)
+            assert (image[0, 1] == [30, 20, 10]).all(), 'Pixels should be in BGR order.'
+            assert (image[1, 2] == [50, 100, 200]).all(), 'Pixels should be in BGR order.'
+
+    def test_02_decode_screencap_not_supported(self):
+        assert Adb.decode_screencap(None) is None
+        assert Adb.decode_screencap(b'\x89PNG\r\n\x1a\n' + b'\x00' * 100) is None, 'PNG is not raw screencap.'
+        assert Adb.decode_screencap(struct.pack('<III', 3, 2, 4) + b'\x00' * 12) is None, 'RGB_565 not supported.'
+
+    def test_03_parse_properties(self):
+        output = '[ro.build.version.release]: [10]\n' \
+                 '[ro.product.cpu.abi]: [x86]\n' \
+                 '[ro.product.model]: [Android SDK built for x86]\n' \
+                 '[sys.boot_completed]: []\n' \
+                 'garbage line\n'
+        properties = Adb.parse_properties(output)
+        assert properties == {'ro.build.version.release': '10',
+                              'ro.product.cpu.abi': 'x86',
+                              'ro.product.model': 'Android SDK built for x86',
+                              'sys.boot_completed': ''}, 'Wrong properties: {0}'.format(properties)
+        assert Adb.parse_properties(None) == {}
+
+    def test_04_screen_image_fallback(self):
+        rgba = numpy.zeros((2, 3, 4), dtype=numpy.uint8)
+        raw = struct.pack('<III', 3, 2, 1) + rgba.tobytes()
+        outputs = {}
+        sdk = {'value': '29'}
+        original = Adb.exec_out, Adb.get_property
+        Adb.exec_out = staticmethod(lambda command, device_id, timeout=60: outputs.get(command))
+        Adb.get_property = staticmethod(lambda device_id, name: sdk['value'])
+        try:
+            # Failed command (timeout or connection error) does not switch device to slower capture.
+            assert Adb.get_screen_image(device_id='fake') is None
+            outputs['screencap'] = raw
+            assert Adb.get_screen_image(device_id='fake') is not None, 'Raw screenshot should be used after error.'
+
+            # Output that can not be decoded switches device to PNG and then to pull of screenshot file.
+            outputs['screencap'] = b'unknown format'
+            outputs['screencap -p'] = b'not png'
+            assert Adb.get_screen_image(device_id='fake') is None
+            outputs['screencap'] = raw
+            assert Adb.get_screen_image(device_id='fake') is None, 'Device should use pull after broken output.'
+            Adb.forget_properties(device_id='fake')
+            assert Adb.get_screen_image(device_id='fake') is not None, 'Capture method should be forgotten.'
+
+            # Devices without `exec-out` are not asked.
+            Adb.forget_properties(device_id='fake')
+            sdk['value'] = '19'
+            assert Adb.get_screen_image(device_id='fake') is None, 'exec-out is not supported before API 21.'
+        finally:
+            Adb.exec_out, Adb.get_property = staticmethod(original[0]), staticmethod(original[1])
+            Adb.forget_properties(device_id='fake')
+
+    def test_05_connection_error_of_adb_server(self):
+        class BrokenClient(object):
+            def shell(self, serial, command, timeout=None):
+                raise socket.error(errno.ECONNRESET, 'Connection reset by peer')
+
+        original = Adb.client
+        Adb.client = staticmethod(BrokenClient)
+        try:
+            result = Adb.run_adb_command(command='shell getprop ro.product.model', device_id='fake', fail_safe=True)
+            assert ADB_PATH in result.commandline, 'Command should be executed by adb executable.'
+            assert result.complete, 'Command should be executed after connection error.'
+        finally:
+            Adb.client = staticmethod(original)
+
+
+if __name__ == '__main__':
+    unittest.main()
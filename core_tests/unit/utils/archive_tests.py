@@ -0,0 +1,55 @@
+import os
+import unittest
+import zipfile
+
+from core.settings import Settings
+from core.utils.archive import Archive
+from core.utils.file_utils import File, Folder
+
+
+# noinspection PyMethodMayBeStatic
+class ArchiveTests(unittest.TestCase):
+    apk = os.path.join(Settings.TEST_OUT_HOME, 'archive', 'app.apk')
+
+    def setUp(self):
+        Folder.clean(os.path.dirname(self.apk))
+        Folder.create(os.path.dirname(self.apk))
+        with zipfile.ZipFile(self.apk, 'w', zipfile.ZIP_DEFLATED) as apk:
+            apk.writestr('AndroidManifest.xml', 'a' * 10)
+            apk.writestr('lib/x86/libNativeScript.so', 'b' * 100)
+            apk.writestr('lib/arm64-v8a/libNativeScript.so', 'c' * 200)
+            apk.writestr('assets/snapshots/x86/snapshot.blob', 'd' * 50)
+            apk.writestr('assets/app/bundle.js', 'e' * 40)
+
+    def test_01_exists(self):
+        apk = Archive.open(self.apk)
+        assert apk.exists('lib/x86/libNativeScript.so'), 'Existing entry not found.'
+        assert apk.exists(os.path.join('assets', 'snapshots', 'x86', 'snapshot.blob')), 'Path separator not handled.'
+        assert apk.exists('assets/snapshots'), 'Folder without entry not found.'
+        assert not apk.exists('lib/x86_64/libNativeScript.so'), 'Not existing entry found.'
+        assert apk.contains('arm64-v8a/libNativeScript'), 'Part of entry name not found.'
+        assert File.is_file_in_zip(self.apk, os.path.join('x86', 'libNativeScript.so'))
+        assert apk.read('assets/app/bundle.js') == b'e' * 40
+
+    def test_02_size(self):
+        apk = Archive.open(self.apk)
+        assert apk.get_size() == 400, 'Wrong size of archive content.'
+        assert apk.get_size('lib') == 300, 'Wrong size of lib folder.'
+        assert apk.get_size('lib', compressed=True) < 300, 'Compressed size should be smaller.'
+        sizes = apk.get_size_tree()
+        assert sizes.size == 400
+        assert sizes.count == 5
+        assert sizes.get('lib').size == 300
+        assert sizes.get('assets/app').size == 40
+        assert sizes.get('lib').breakdown() == [('arm64-v8a', 200), ('x86', 100)]
+        assert sizes.breakdown()[-1] == ('<files>', 10)
+
+    def test_03_index_is_updated(self):
+        assert not Archive.open(self.apk).exists('classes.dex')
+        with zipfile.ZipFile(self.apk, 'a') as apk:
+            apk.writestr('classes.dex', 'f' * 1000)
+        assert Archive.open(self.apk).exists('classes.dex'), 'Index not updated after archive is modified.'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import time
+import unittest
+
+from core.settings import Settings
+from core.utils.artifact_cache import ArtifactCache
+from core.utils.file_utils import File, Folder
+
+
+# noinspection PyMethodMayBeStatic
+class ArtifactCacheTests(unittest.TestCase):
+    cache_folder = os.path.join(Settings.TEST_OUT_HOME, 'cache')
+    artifact = os.path.join(Settings.TEST_OUT_HOME, 'artifact.tgz')
+    restored = os.path.join(Settings.TEST_OUT_HOME, 'restored.tgz')
+
+    def setUp(self):
+        Folder.clean(self.cache_folder)
+        Folder.create(Settings.TEST_OUT_HOME)
+        File.write(path=self.artifact, text='content of artifact')
+        File.delete(path=self.restored)
+
+    def test_01_put_and_get(self):
+        cache = ArtifactCache(folder=self.cache_folder, max_size=1024)
+        key = ArtifactCache.key('npm', 'tns-android-6.0.0.tgz')
+        assert key != ArtifactCache.key('npm', 'tns-android-6.0.1.tgz'), 'Keys should be different.'
+        assert not cache.get(key=key, target=self.restored), 'Artifact should not be found in empty cache.'
+        assert cache.put(key=key, source=self.artifact)
+        assert cache.get(key=key, target=self.restored), 'Artifact should be found.'
+        assert File.read(path=self.restored) == 'content of artifact'
+
+    def test_02_integrity(self):
+        cache = ArtifactCache(folder=self.cache_folder, max_size=1024)
+        key = ArtifactCache.key('npm', 'tns-android-6.0.0.tgz')
+        assert not cache.put(key=key, source=self.artifact, integrity='sha512-wrong'), \
+            'Artifact should not be cached if integrity does not match.'
+        assert cache.put(key=key, source=self.artifact, integrity=ArtifactCache.integrity(self.artifact))
+        File.write(path=os.path.join(self.cache_folder, key + '.bin'), text='corrupted')
+        assert not cache.get(key=key, target=self.restored), 'Corrupted artifact should not be restored.'
+
+    def test_03_evict_least_recently_used(self):
+        size = os.path.getsize(self.artifact)
+        cache = ArtifactCache(folder=self.cache_folder, max_size=2 * size)
+        keys = [ArtifactCache.key('template', index) for index in range(3)]
+        cache.put(key=keys[0], source=self.artifact)
+        cache.put(key=keys[1], source=self.artifact)
+        os.utime(os.path.join(self.cache_folder, keys[1] + '.json'), (time.time() - 60, time.time() - 60))
+        cache.get(key=keys[0], target=self.restored)
+        cache.put(key=keys[2], source=self.artifact)
+        assert not cache.get(key=keys[1], target=self.restored), 'Least recently used artifact should be removed.'
+        assert cache.get(key=keys[0], target=self.restored)
+        assert cache.get(key=keys[2], target=self.restored)
+
+    def test_04_disabled(self):
+        cache = ArtifactCache(folder=self.cache_folder, max_size=0)
+        key = ArtifactCache.key('template')
+        assert not cache.put(key=key, source=self.artifact)
+        assert not cache.get(key=key, target=self.restored)
+
+
+if __name__ == '__main__':
+    unittest.main()
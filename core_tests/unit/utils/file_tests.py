@@ -1,10 +1,12 @@
 import os
+import time
 import unittest
 
 from core.base_test.test_context import TestContext
 from core.base_test.tns_test import TnsTest
+from core.enums.copy_strategy import CopyStrategy
 from core.settings import Settings
-from core.utils.file_utils import File, Folder
+from core.utils.file_utils import File, Folder, LINK_FOLDERS
 
 
 # noinspection PyMethodMayBeStatic
@@ -285,6 +287,95 @@ class FileUtilsTests(unittest.TestCase):
         Folder.clean(folder_name_new3)
         Folder.clean(folder_name_new4)
 
+    def test_10_copy_folder(self):
+        source = os.path.join(Settings.TEST_OUT_HOME, 'copy_source')
+        Folder.clean(source)
+        Folder.create(os.path.join(source, 'app'))
+        Folder.create(os.path.join(source, 'node_modules', 'module'))
+        File.write(path=os.path.join(source, 'app', 'app.js'), text='app')
+        for index in range(100):
+            File.write(path=os.path.join(source, 'node_modules', 'module', '{0}.js'.format(index)), text=str(index))
+
+        for strategy in [CopyStrategy.AUTO, CopyStrategy.PARALLEL, CopyStrategy.COPYTREE]:
+            target = os.path.join(Settings.TEST_OUT_HOME, 'copy_target_{0}'.format(strategy))
+            Folder.copy(source=source, target=target, strategy=strategy)
+            assert File.read(os.path.join(target, 'app', 'app.js')) == 'app', 'Failed to copy with ' + str(strategy)
+            assert File.read(os.path.join(target, 'node_modules', 'module', '99.js')) == '99'
+
+        target = os.path.join(Settings.TEST_OUT_HOME, 'copy_target')
+        stats = Folder.copy(source=source, target=target)
+        assert stats.files == 101, 'Wrong number of copied files.'
+        assert 'linked' not in stats.methods, 'Files should not be linked by default.'
+        File.write(path=os.path.join(target, 'node_modules', 'module', '0.js'), text='changed')
+        assert File.read(os.path.join(source, 'node_modules', 'module', '0.js')) == '0', 'Source should not change.'
+
+        stats = Folder.copy(source=source, target=target, strategy=CopyStrategy.PARALLEL, link_folders=LINK_FOLDERS)
+        assert stats.methods.get('linked') == 100, 'Files in node_modules should be linked: {0}'.format(stats)
+        assert stats.methods.get('copied') == 1, 'Files out of node_modules should be copied: {0}'.format(stats)
+
+    def test_11_clean_folder_in_background(self):
+        folder = os.path.join(Settings.TEST_OUT_HOME, 'clean_in_background')
+        for index in range(10):
+            Folder.create(os.path.join(folder, 'node_modules', 'module{0}'.format(index)))
+            File.write(path=os.path.join(folder, 'node_modules', 'module{0}'.format(index), 'index.js'), text='js')
+        Folder.clean(folder, background=True)
+        assert not Folder.exists(folder), 'Folder should be moved to trash immediately.'
+        Folder.create(folder)
+        Folder.drain()
+        assert Folder.exists(folder), 'New folder with same name should not be deleted.'
+        trash = [item for item in os.listdir(Settings.TEST_TRASH_HOME) if item.startswith('.trash-')]
+        assert not trash, 'Trash should be deleted after drain: {0}'.format(trash)
+        assert not [item for item in os.listdir(Settings.TEST_OUT_HOME) if item.startswith('.trash-')], \
+            'Trash should not be created in parent of cleaned folder.'
+
+    def test_12_find(self):
+        base = os.path.join(Settings.TEST_OUT_HOME, 'find')
+        Folder.clean(base)
+        for folder in ['a', os.path.join('a', 'bb'), os.path.join('a', 'bb', 'c'), 'node_modules']:
+            Folder.create(os.path.join(base, folder))
+        for path in [os.path.join('a', 'bb', 'c', 'lib.aar'), os.path.join('a', 'lib.aar'), os.path.join('a', 'x.txt'),
+                     os.path.join('node_modules', 'module.aar')]:
+            File.write(path=os.path.join(base, path), text='')
+
+        assert File.find(base_path=base, file_name='lib.aar', exact_match=True) == os.path.join(base, 'a', 'lib.aar')
+        assert File.find(base_path=base, file_name='.aar', match_index=1) == \
+            os.path.join(base, 'a', 'bb', 'c', 'lib.aar'), 'node_modules should not be searched by default.'
+        assert File.find(base_path=base, file_name='.aar', match_index=2, prune=()) == \
+            os.path.join(base, 'node_modules', 'module.aar')
+        found = File.find_by_extension(folder=base, extension='aar')
+        assert found == [os.path.join(base, 'a', 'lib.aar'), os.path.join(base, 'a', 'bb', 'c', 'lib.aar')]
+        assert File.pattern_exists(directory=base, pattern='*.txt')
+        assert not File.pattern_exists(directory=base, pattern='module*')
+        assert File.pattern_exists(directory=base, pattern='module*', prune=())
+
+        # Index is updated when folder content is changed
+        assert not File.pattern_exists(directory=base, pattern='*.js', use_index=True)
+        time.sleep(0.01)
+        File.write(path=os.path.join(base, 'a', 'bb', 'new.js'), text='')
+        assert File.pattern_exists(directory=base, pattern='*.js', use_index=True)
+
+    def test_13_get_size(self):
+        base = os.path.join(Settings.TEST_OUT_HOME, 'size')
+        Folder.clean(base)
+        Folder.create(os.path.join(base, 'assets', 'app'))
+        Folder.create(os.path.join(base, 'lib'))
+        File.write(path=os.path.join(base, 'assets', 'app', 'bundle.js'), text='x' * 1000)
+        File.write(path=os.path.join(base, 'lib', 'libNativeScript.so'), text='x' * 300)
+        File.write(path=os.path.join(base, 'AndroidManifest.xml'), text='x' * 10)
+
+        tree = Folder.get_size_tree(base)
+        assert tree.size == 1310, 'Wrong size of the folder.'
+        assert tree.get('assets/app').size == 1000, 'Wrong size of sub folder.'
+        assert tree.breakdown() == [('assets', 1000), ('lib', 300), ('<files>', 10)]
+        assert Folder.get_size(base) == 1310
+
+        # Size of the code is same as calculated with os.walk
+        folder = os.path.join(Settings.TEST_RUN_HOME, 'core')
+        expected = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, files in os.walk(folder) for name in files)
+        assert Folder.get_size(folder, use_cache=True) == expected
+        assert Folder.get_size(folder, use_cache=True) == expected, 'Cached size should be same.'
+
 
 if __name__ == '__main__':
     unittest.main()
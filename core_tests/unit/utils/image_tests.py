@@ -13,6 +13,7 @@ import unittest
 import numpy
 
 from core.log.log import Log
+from core.utils.image_colors import ImageColors
 from core.utils.image_utils import ImageUtils
 
 
@@ -82,6 +83,42 @@ class ImageUtilsTests(unittest.TestCase):
         assert 'Ter Stegen' in text
         assert 'Piqué' in text
 
+    def test_06_image_match(self):
+        match, diff_percent, diff_image = ImageUtils.image_match(actual_image=self.app_image,
+                                                                 expected_image=self.app_image)
+        assert match, 'Same images should match.'
+        assert diff_percent == 0, 'Diff of same images should be 0.'
+
+        match, diff_percent, diff_image = ImageUtils.image_match(actual_image=self.app_image,
+                                                                 expected_image=self.app_image_ng)
+        assert not match, 'Different images should not match.'
+        assert abs(diff_percent - 10.0916) < 0.001, 'Wrong diff: {0}'.format(diff_percent)
+        assert diff_image.size == (480, 800), 'Diff image should have size of actual image.'
+        assert diff_image.getpixel((70, 280)) == (255, 0, 0, 255), 'Different pixels should be red.'
+        assert diff_image.getpixel((240, 20)) != (255, 0, 0, 255), 'Status bar should not be compared.'
+
+        # Compare only top area of the screen, ignore the action bar.
+        match, diff_percent, _ = ImageUtils.image_match(actual_image=self.app_image,
+                                                        expected_image=self.app_image_ng,
+                                                        region=(0, 0, 480, 400), ignore=[(0, 0, 480, 120)])
+        assert not match, 'Different regions should not match.'
+        assert 0 < diff_percent < 25, 'Diff should be relative to region size: {0}'.format(diff_percent)
+        match, diff_percent, _ = ImageUtils.image_match(actual_image=self.app_image,
+                                                        expected_image=self.app_image_ng,
+                                                        ignore=[(0, 0, 480, 800)])
+        assert match, 'Images should match when whole screen is ignored.'
+
+    def test_07_get_pixels_by_colors(self):
+        counts = ImageUtils.get_pixels_by_colors(image_path=self.app_image, colors=[self.blue, self.white])
+        assert counts[0] == 18604, 'Blue pixels count is wrong. Actual: {0} Expected: {1}'.format(counts[0], 18604)
+        assert counts[1] > counts[0], 'White should be the main color.'
+
+        # Most common color is returned, lowest BGR value if counts are same.
+        img = numpy.array([[[1, 2, 3], [9, 9, 9], [9, 9, 9], [1, 2, 3], [0, 0, 200]]], dtype=numpy.uint8)
+        colors = ImageColors(img)
+        assert (colors.get_main_color() == numpy.array([1, 2, 3])).all(), 'Main color is wrong.'
+        assert colors.get_pixels_by_colors([[0, 0, 0], [0, 0, 190], [50, 50, 50]]) == [2, 1, 0]
+
 
 if __name__ == '__main__':
     unittest.main()
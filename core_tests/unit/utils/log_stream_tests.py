@@ -0,0 +1,86 @@
+import os
+import stat
+import sys
+import threading
+import time
+import unittest
+
+from core.settings import Settings
+from core.utils.device.log_stream import LogStream
+from core.utils.file_utils import File, Folder
+
+# Fake adb executable: first `logcat` exits after two lines (like disconnected device),
+# next `logcat -T <time>` prints the log again since that time and then new lines
+# (including line identical to the last one, printed again in the same millisecond).
+FAKE_ADB = '''
+import os
+import sys
+import time
+
+state = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'state')
+lines = ['05-29 14:20:31.100  1000  1000 I JS      : first',
+         '05-29 14:20:31.200  1000  1000 I JS      : second']
+if not os.path.exists(state):
+    open(state, 'w').close()
+    print('\\n'.join(lines))
+    sys.exit(0)
+assert '-T' in sys.argv, 'Stream should continue from time of last line.'
+print('\\n'.join(lines[1:] + lines[1:] + ['05-29 14:20:32.000  1000  1000 I JS      : Hello World!']))
+sys.stdout.flush()
+time.sleep(30)
+'''
+
+
+# noinspection PyMethodMayBeStatic
+class LogStreamTests(unittest.TestCase):
+    folder = os.path.join(Settings.TEST_OUT_HOME, 'logcat')
+    adb = os.path.join(folder, 'adb')
+
+    def setUp(self):
+        Folder.clean(self.folder)
+        Folder.create(self.folder)
+        File.write(path=self.adb + '.py', text=FAKE_ADB)
+        File.write(path=self.adb, text='#!/bin/sh\nexec "{0}" "{1}.py" "$@"\n'.format(sys.executable, self.adb))
+        os.chmod(self.adb, os.stat(self.adb).st_mode | stat.S_IEXEC)
+        self.stream = LogStream(device_id='emulator-5554', adb_path=self.adb)
+
+    def tearDown(self):
+        self.stream.stop()
+
+    def test_01_wait_for_new_lines(self):
+        self.stream.start()
+        assert self.stream.wait_for(text='Hello World!', timeout=10), 'Text not found in the log.'
+        lines = self.stream.read()[0]
+        assert len(lines) == 4, 'Lines read again after reconnect should be skipped: {0}'.format(lines)
+        assert lines[1] == lines[2], 'Repeated line should not be skipped.'
+        cursor = self.stream.cursor
+        assert self.stream.get_text(since=cursor) == '', 'Log should be empty after cursor is moved.'
+        start = time.time()
+        assert not self.stream.wait_for(text='first', timeout=1, since=cursor), 'Old lines should not be scanned.'
+        assert time.time() - start < 5
+
+    def test_02_wake_on_new_line(self):
+        self.stream.start()
+        assert self.stream.wait_for(text='Hello World!', timeout=10)
+        cursor = self.stream.cursor
+        add = getattr(self.stream, '_LogStream__add')
+        timer = threading.Timer(0.5, add, args=['05-29 14:20:33.000  1000  1000 I JS      : Bye!'])
+        timer.start()
+        start = time.time()
+        assert self.stream.wait_for(text='Bye!', timeout=10, since=cursor), 'New line not found.'
+        assert time.time() - start < 3, 'Wait should end as soon as line arrives.'
+        assert self.stream.get_text(since=cursor).endswith('Bye!')
+
+    def test_03_out_of_order_and_repeated_lines(self):
+        add = getattr(self.stream, '_LogStream__add')
+        lines = ['05-29 14:20:31.200  1000  1000 I JS      : second',
+                 '05-29 14:20:31.100  1000  1001 I JS      : first',
+                 '05-29 14:20:31.200  1000  1000 I JS      : second',
+                 '05-29 14:20:31.200  1000  1000 I JS      : second']
+        for line in lines:
+            add(line)
+        assert self.stream.read()[0] == lines, 'Lines should be skipped only after reconnect.'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import unittest
+
+from core.settings import Settings
+from core.utils.file_utils import File, Folder
+from core.utils.log_tail import LogTail, StringMatcher
+
+
+# noinspection PyMethodMayBeStatic
+class LogTailTests(unittest.TestCase):
+    log_file = os.path.join(Settings.TEST_OUT_HOME, 'tail.txt')
+
+    def setUp(self):
+        Folder.create(Settings.TEST_OUT_HOME)
+        File.write(path=self.log_file, text='')
+        LogTail.reset()
+
+    def test_01_read_only_new_text(self):
+        tail = LogTail.get(self.log_file)
+        assert tail is LogTail.get(self.log_file), 'Same tail should be returned for same file.'
+        File.append(path=self.log_file, text='first')
+        assert tail.read() == 'first'
+        assert tail.read() == '', 'Nothing should be read if file is not changed.'
+        File.append(path=self.log_file, text=' second')
+        assert tail.read() == ' second'
+
+    def test_02_verified_part(self):
+        tail = LogTail.get(self.log_file)
+        File.append(path=self.log_file, text='old')
+        tail.read()
+        tail.mark_verified()
+        File.append(path=self.log_file, text='new')
+        assert tail.read_unverified() == 'new'
+        assert tail.read_unverified() == 'new', 'Unverified text should be read again until marked verified.'
+        assert 'old' in File.read(path=self.log_file), 'Verified marker should not be written in the file.'
+
+    def test_03_truncated_file(self):
+        tail = LogTail.get(self.log_file)
+        File.append(path=self.log_file, text='some long text')
+        tail.read()
+        File.write(path=self.log_file, text='short')
+        assert tail.read() == 'short', 'Truncated file should be read from the beginning.'
+
+    def test_10_match_strings(self):
+        matcher = StringMatcher(['Successfully synced application', 'Successfully synced application org.test',
+                                 'Webpack build done!', 'not existing'])
+        found = matcher.scan('Webpack build ')
+        assert not found
+        found = matcher.scan('done! Successfully synced application org.test on device')
+        assert found == {'Webpack build done!', 'Successfully synced application',
+                         'Successfully synced application org.test'}, 'Actual: {0}'.format(found)
+
+
+if __name__ == '__main__':
+    unittest.main()
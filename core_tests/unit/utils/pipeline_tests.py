@@ -0,0 +1,50 @@
+import time
+import unittest
+
+from core.utils.pipeline import Pipeline, StageStatus
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+# noinspection PyMethodMayBeStatic
+class PipelineTests(unittest.TestCase):
+
+    def test_01_run_independent_stages_in_parallel(self):
+        order = []
+        pipeline = Pipeline(name='Test', workers=3)
+        pipeline.add(name='first', action=sleep, seconds=1)
+        pipeline.add(name='second', action=sleep, seconds=1)
+        pipeline.add(name='third', action=lambda: order.append('third'), depends=['first', 'second'])
+        start = time.time()
+        pipeline.run()
+        duration = time.time() - start
+        assert duration < 1.9, 'Independent stages should run in parallel, but took {0:.1f}s.'.format(duration)
+        assert order == ['third'], 'Dependent stage should be executed.'
+        third = pipeline.get('third')
+        assert third.start_time >= pipeline.get('first').end_time, 'Stage should start after its dependencies.'
+        assert all(stage.status == StageStatus.PASSED for stage in pipeline.stages), 'All stages should pass.'
+
+    def test_02_failed_stage(self):
+        def fail():
+            raise IOError('Failed to pack.')
+
+        pipeline = Pipeline(name='Test')
+        pipeline.add(name='fail', action=fail)
+        pipeline.add(name='slow', action=sleep, seconds=0.5)
+        pipeline.add(name='dependent', action=sleep, depends=['fail'], seconds=0)
+        with self.assertRaises(IOError):
+            pipeline.run()
+        assert pipeline.get('fail').status == StageStatus.FAILED
+        assert pipeline.get('slow').status == StageStatus.PASSED, 'Running stages should complete.'
+        assert pipeline.get('dependent').status == StageStatus.SKIPPED, 'Dependent stages should be skipped.'
+
+    def test_03_unknown_dependency(self):
+        pipeline = Pipeline()
+        with self.assertRaises(KeyError):
+            pipeline.add(name='stage', action=sleep, depends=['not existing'], seconds=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
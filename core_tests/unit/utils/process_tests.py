@@ -4,7 +4,7 @@ import time
 
 from core.enums.os_type import OSType
 from core.settings import Settings
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
 from core.utils.run import run
 
 
@@ -14,6 +14,31 @@ class ProcessTests(unittest.TestCase):
     else:
         http_module = 'SimpleHTTPServer'
 
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_10_snapshot(self):
+        run(cmd='sleep 101', wait=False)
+        run(cmd='sleep 102', wait=False)
+        time.sleep(0.5)
+        snapshot = ProcessSnapshot()
+        assert snapshot.find_by_name(proc_name='sleep', proc_cmdline='101'), 'Failed to find process by name.'
+        assert len(snapshot.find_by_commandline(commandline="'sleep', '10")) == 2, 'Failed to find by commandline.'
+        assert Process.kill(proc_name='sleep', proc_cmdline='101', snapshot=snapshot), 'Failed to kill process.'
+        assert Process.kill_by_commandline(cmdline='102', snapshot=snapshot), 'Failed to kill process.'
+        time.sleep(0.5)
+        assert not Process.is_running_by_commandline(commandline="'sleep', '10"), 'Processes are not killed.'
+
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_20_kill_trees(self):
+        result = run(cmd='sleep 103 & sleep 104', wait=False)
+        time.sleep(0.5)
+        assert result.pgid is not None, 'Process started with wait=False should be in own process group.'
+        processes = ProcessSnapshot().find_by_group(pgids=[result.pgid])
+        assert len(processes) >= 2, 'All child processes should be in the process group.'
+        terminated, killed = Process.kill_trees(processes=processes, timeout=3)
+        assert len(terminated) >= 2, 'Processes should be terminated by SIGTERM.'
+        assert not killed, 'No need to kill processes that handle SIGTERM.'
+        assert not Process.is_running_by_commandline(commandline="'sleep', '10"), 'Processes are not stopped.'
+
     def test_30_kill_by_port(self):
         port = 4210
         self.start_server(port=port)
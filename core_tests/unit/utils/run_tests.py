@@ -1,14 +1,17 @@
 import os
+import subprocess
 import time
 import unittest
 
+import psutil
+
 from nose.tools import timed
 
 from core.enums.os_type import OSType
 from core.settings import Settings
 from core.utils.file_utils import File
 from core.utils.process import Process
-from core.utils.run import run
+from core.utils.run import run, run_many, run_output
 
 
 # noinspection PyMethodMayBeStatic
@@ -63,7 +66,86 @@ class RunTests(unittest.TestCase):
         assert result.duration < 2, 'Process duration should be same as timeout.'
         assert result.output == '', 'No output for not completed programs.'
 
+    @timed(10)
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_12_run_command_with_large_output(self):
+        lines = []
+        tee_file = os.path.join(Settings.TEST_OUT_HOME, 'tee.txt')
+        cmd = 'python -c "import sys; [sys.stdout.write(str(i) + chr(10)) for i in range(200000)]; ' \
+              'sys.stderr.write(\'done\' + chr(10))"'
+        result = run(cmd=cmd, wait=True, timeout=5, tee_file=tee_file, line_callback=lines.append, max_lines=1000)
+        assert result.exit_code == 0, 'Wrong exit code of successful command.'
+        assert result.complete is True, 'Large output should not block the command.'
+        assert result.log_file == tee_file, 'Log file should be the tee file.'
+        assert len(result.stdout.splitlines()) == 1000, 'Only last lines should be kept in memory.'
+        assert result.stdout.splitlines()[-1] == '199999', 'Last line of stdout should be kept.'
+        assert result.stderr.strip() == 'done', 'Stderr should be captured.'
+        assert result.output.strip().endswith('done'), 'Stderr should be appended to output.'
+        assert len(lines) == 200001, 'Callback should be called for each line.'
+        assert len(File.read(path=tee_file).splitlines()) == 200001, 'Tee file should contain full output.'
+
+    @timed(10)
+    def test_13_run_output(self):
+        script = 'import sys; getattr(sys.stdout, "buffer", sys.stdout).write(bytes(bytearray(range(256))))'
+        cmd = ['python', '-c', script]
+        exit_code, output = run_output(args=cmd, timeout=5)
+        assert exit_code == 0, 'Wrong exit code of successful command.'
+        assert output == bytes(bytearray(range(256))), 'Binary output should not be modified.'
+
     @timed(5)
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_14_run_many(self):
+        start = time.time()
+        results = run_many(['sleep 1 && echo first', 'sleep 1 && echo second 1>&2', 'ls ' + self.current_folder],
+                           max_workers=3, timeout=5)
+        duration = time.time() - start
+        assert duration < 1.9, 'Commands should be executed in parallel, but took {0:.1f}s.'.format(duration)
+        assert [result.exit_code for result in results] == [0, 0, 0], 'Wrong exit codes.'
+        assert results[0].stdout.strip() == 'first', 'Results should be in order of commands.'
+        assert results[1].stderr.strip() == 'second', 'stderr should be captured.'
+        assert self.current_file in results[2].output, 'Wrong output of ls command.'
+
+        start = time.time()
+        results = run_many(['sleep 1', 'sleep 1', 'sleep 1'], max_workers=2, timeout=5)
+        assert time.time() - start >= 2, 'Only two commands should be executed at the same time.'
+        assert all(result.complete for result in results), 'All commands should complete.'
+
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_15_run_many_timeout(self):
+        results = run_many([{'cmd': 'sleep 10.1', 'timeout': 1, 'fail_safe': True}, 'echo done'], timeout=5)
+        assert results[0].complete is False, 'Command that exceed timeout should not be complete.'
+        assert results[0].duration < 2, 'Command should be killed on timeout.'
+        assert not self.__is_running('sleep', '10.1'), 'Child process of command should be killed on timeout.'
+        assert results[1].output == 'done', 'Other commands should not be affected by timeout.'
+
+        start = time.time()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            run_many(['sleep 10.2', 'sleep 10.3'], timeout=1)
+        assert time.time() - start < 3, 'Commands should be killed on timeout.'
+        assert not self.__is_running('sleep', '10.2') and not self.__is_running('sleep', '10.3')
+
+    @unittest.skipIf(Settings.HOST_OS == OSType.WINDOWS, 'Skip on Windows.')
+    def test_16_run_many_stop_on_failure(self):
+        start = time.time()
+        results = run_many(['sleep 0.5; exit 3', 'sleep 10.4', 'echo skipped'], max_workers=2, timeout=30,
+                           stop_on_failure=True)
+        assert time.time() - start < 5, 'Running commands should be stopped on first failure.'
+        assert results[0].exit_code == 3, 'Wrong exit code of failed command.'
+        assert results[1].complete and results[1].exit_code != 0, 'Running command should be killed.'
+        assert not psutil.pid_exists(results[1].pid), 'Process of stopped command should not run.'
+        assert not self.__is_running('sleep', '10.4'), 'Child process of stopped command should be killed.'
+        assert results[2].complete is False and results[2].pid is None, 'Not started command should be skipped.'
+
+    @staticmethod
+    def __is_running(*args):
+        for proc in psutil.process_iter():
+            try:
+                if proc.cmdline() == list(args) and proc.status() != psutil.STATUS_ZOMBIE:
+                    return True
+            except psutil.Error:
+                continue
+        return False
+
     def test_20_run_long_living_process(self):
         file_path = os.path.join(Settings.TEST_OUT_HOME, 'temp.txt')
         File.write(path=file_path, text='test')
@@ -0,0 +1,89 @@
+import os
+import shutil
+import time
+import unittest
+
+import numpy
+
+from core.enums.device_type import DeviceType
+from core.settings import Settings
+from core.utils.device.adb import Adb
+from core.utils.device.device import Device
+from core.utils.file_utils import File, Folder
+
+
+class FakeDevice(Device):
+    def __init__(self, image):
+        super(FakeDevice, self).__init__(id='fake', name='fake', type=DeviceType.ANDROID, model='fake', version=10)
+        self.image = image
+        self.captures = 0
+
+    def get_screen(self, path, log_level=None):
+        self.captures += 1
+        Folder.create(os.path.dirname(path))
+        shutil.copy(self.image, path)
+
+
+# noinspection PyMethodMayBeStatic
+class ScreenFrameTests(unittest.TestCase):
+    app_image = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'resources', 'app.png')
+    expected_image = os.path.join(Settings.TEST_OUT_IMAGES, 'expected.png')
+    blue = numpy.array([255, 188, 48])
+    white = numpy.array([255, 255, 255])
+
+    def setUp(self):
+        Folder.create(Settings.TEST_OUT_IMAGES)
+        shutil.copy(self.app_image, self.expected_image)
+
+    def test_01_frame_is_reused(self):
+        device = FakeDevice(image=self.app_image)
+        assert device.get_pixels_by_color(color=self.blue) == 18604
+        assert (device.get_main_color() == self.white).all(), 'Main color is wrong.'
+        assert device.captures == 1, 'Screenshot should be reused by consecutive queries.'
+        assert device.get_frame(max_age=0).path.startswith(Settings.TEST_OUT_IMAGES)
+        assert device.captures == 2, 'New screenshot should be captured if max age is 0.'
+
+    def test_02_frame_is_invalidated(self):
+        device = FakeDevice(image=self.app_image)
+        frame = device.get_frame()
+        device.invalidate_screen()
+        assert not File.exists(frame.path), 'Screenshot should be deleted when screen is invalidated.'
+        frame = device.get_frame()
+        Device.invalidate_screens()
+        assert device.get_frame() is not frame, 'Screenshot should not be reused after all screens are invalidated.'
+        assert device.captures == 3
+        frame = device.get_frame()
+        Adb.invalidate_screen(device_id=device.id)
+        assert device.get_frame() is not frame, 'Screenshot should not be reused after UI command of Adb.'
+        assert device.captures == 4
+
+    def test_03_screen_stream(self):
+        device = FakeDevice(image=self.app_image)
+        device.start_screen_stream(video=False, max_frames=5)
+        try:
+            start = time.time()
+            frame = device.wait_for_screen(lambda screen: screen.colors.get_pixels_by_color(color=self.blue) > 0,
+                                           timeout=10, since=start)
+            assert frame is not None, 'Frame should be captured by the stream.'
+            assert frame.time >= start, 'Frames captured before since time should not be checked.'
+            device.wait_for_color(color=self.blue, pixel_count=18604, timeout=10)
+            device.wait_for_main_color(color=self.white, timeout=10)
+            device.screen_match(expected_image=self.expected_image, timeout=10)
+            assert device.wait_for_screen(lambda screen: False, timeout=1) is None
+            assert device.captures > 1, 'Stream should capture screen continuously.'
+
+            # Frames of the stream are reused only in the same screen epoch and until they are older than max age.
+            start = time.time()
+            assert device.get_frame(max_age=0).time >= start, 'New screenshot should be captured if max age is 0.'
+            latest = device.wait_for_screen(lambda screen: True, timeout=10)
+            Adb.invalidate_screen(device_id=device.id)
+            frame = device.get_frame(max_age=60)
+            assert frame is not latest and frame.epoch == device.get_screen_epoch(), 'Outdated frame is returned.'
+            Device.invalidate_screens()
+            assert device.get_frame(max_age=60).epoch == device.get_screen_epoch(), 'Outdated frame is returned.'
+        finally:
+            device.stop_screen_stream()
+
+
+if __name__ == '__main__':
+    unittest.main()
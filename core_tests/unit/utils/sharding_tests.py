@@ -0,0 +1,100 @@
+import os
+import unittest
+
+from core.settings import Settings
+from core.settings.Settings import Emulators, Simulators
+from core.utils.device.emulator_info import EmulatorInfo
+from core.utils.device.simulator_info import SimulatorInfo
+from core.utils.file_utils import File, Folder
+from core.utils.sharding import Sharding
+
+REPORT = '''<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="nosetests" tests="3" errors="0" failures="1" skip="0">
+<testcase classname="tests.a.ATests" name="test_01" time="10.5"></testcase>
+<testcase classname="tests.a.ATests" name="test_02" time="4.5"><failure message="boom"></failure></testcase>
+<testcase classname="tests.b.BTests" name="test_01" time="1"></testcase>
+</testsuite>'''
+
+
+# noinspection PyMethodMayBeStatic
+class ShardingTests(unittest.TestCase):
+    folder = os.path.join(Settings.TEST_OUT_HOME, 'sharding')
+
+    def setUp(self):
+        Folder.clean(self.folder)
+        Folder.create(self.folder)
+
+    def test_01_distribute(self):
+        tests = ['a:A', 'b:B', 'c:C', 'd:D', 'e:E']
+        durations = {'a.A': 100, 'b.B': 60, 'c.C': 50, 'd.D': 10}
+        shards = Sharding.distribute(tests=tests, durations=durations, workers=2)
+        # Test without known duration takes DEFAULT_DURATION (the longest one).
+        assert shards == [['e:E'], ['a:A', 'b:B', 'c:C', 'd:D']], 'Wrong shards: {0}'.format(shards)
+        durations['e.E'] = 20
+        shards = Sharding.distribute(tests=tests, durations=durations, workers=2)
+        assert shards == [['a:A', 'e:E'], ['b:B', 'c:C', 'd:D']], 'Wrong shards: {0}'.format(shards)
+        assert sorted(sum(shards, [])) == tests, 'Each test should be in exactly one shard.'
+        assert Sharding.distribute(tests=['a:A'], durations={}, workers=3) == [['a:A'], [], []]
+
+    def test_02_xunit(self):
+        first = os.path.join(self.folder, 'nosetests_0.xml')
+        File.write(path=first, text=REPORT)
+        durations = Sharding.get_durations(first)
+        assert durations == {'tests.a.ATests': 15.0, 'tests.b.BTests': 1.0}, 'Wrong durations: {0}'.format(durations)
+        output = os.path.join(self.folder, 'nosetests.xml')
+        Sharding.merge_xunit(files=[first, first, os.path.join(self.folder, 'nosetests_2.xml')], output=output)
+        merged = File.read(output)
+        assert 'tests="7"' in merged and 'failures="2"' in merged and 'errors="1"' in merged, merged
+        assert merged.count('<testcase') == 7, 'All test cases should be merged.'
+
+    def test_03_worker_home(self):
+        project = os.path.join(self.folder, 'project')
+        for item in ['requirements.txt', os.path.join('tests', 'a.py'), os.path.join('TestApp', 'package.json'),
+                     os.path.join('out', 'log.txt')]:
+            Folder.create(os.path.dirname(os.path.join(project, item)))
+            File.write(path=os.path.join(project, item), text='')
+        home = Sharding.create_worker_home(worker=1, project_home=project)
+        assert home == os.path.join(project, 'out', 'workers', 'worker_1')
+        assert sorted(os.listdir(home)) == ['requirements.txt', 'tests'], 'Wrong links: {0}'.format(os.listdir(home))
+        assert Sharding.create_worker_home(worker=1, project_home=project) == home, 'Home should be reused.'
+        Folder.clean(os.path.join(home, 'tests'))
+        assert File.exists(os.path.join(project, 'tests', 'a.py')), 'Clean of link should not delete project files.'
+
+    def test_04_emulator_ports_are_unique(self):
+        emulators = [item for name, item in vars(Emulators).items() if isinstance(item, EmulatorInfo)
+                     and name != 'DEFAULT']
+        ports = [emulator.port for emulator in emulators]
+        assert len(set(ports)) == len(ports), 'Emulators should not share ports: {0}'.format(sorted(ports))
+
+    def test_05_bind_devices_to_worker(self):
+        emulators = [item for item in vars(Emulators).values() if isinstance(item, EmulatorInfo)]
+        simulators = [item for item in vars(Simulators).values() if isinstance(item, SimulatorInfo)]
+        backup = [(item, item.port, item.emu_id) for item in emulators]
+        names = [(item, item.name) for item in simulators]
+        try:
+            Settings.bind_devices_to_worker(1)
+            ports = [str(port) for port in Settings.get_worker_ports(1)]
+            assert len(ports) == Settings.WORKER_EMULATORS, 'Worker should have own block of ports.'
+            assert all(item.port in ports for item in emulators), 'Emulators should use ports of the worker.'
+            assert all(item.emu_id == 'emulator-' + item.port for item in emulators)
+            assert Emulators.EMU_API_23.port != Emulators.EMU_API_24.port, 'Emulators used together share port.'
+            assert Emulators.DEFAULT.port in ports, 'Default emulator should use ports of the worker.'
+            assert all(item.name.endswith('_w1') for item in simulators), 'Simulators should get worker names.'
+            assert not set(ports) & set(str(port) for port in Settings.get_worker_ports(0)), 'Workers share ports.'
+        finally:
+            for item, port, emu_id in backup:
+                item.port, item.emu_id = port, emu_id
+            for item, name in names:
+                item.name = name
+
+    def test_06_collect(self):
+        tests = Sharding.collect(['core_tests/unit/utils/archive_tests.py', 'core_tests/unit/product'])
+        expected = ['core_tests.unit.utils.archive_tests:ArchiveTests',
+                    'core_tests.unit.product.app_snapshots_tests:AppSnapshotsTests',
+                    'core_tests.unit.product.tns_helpers_tests:SyncMessagesTests']
+        assert tests == expected, 'Wrong tests: {0}'.format(tests)
+        assert Sharding.collect(['tests.a:ATests']) == ['tests.a:ATests'], 'Class address should be kept.'
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from core.utils.device.ui_hierarchy import UiHierarchy
+
+XML = '''<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>
+<hierarchy rotation="0">
+  <node index="0" text="" class="android.widget.FrameLayout" bounds="[0,0][1080,1920]">
+    <node index="0" text="Tap the button" class="android.widget.TextView" bounds="[0,210][1080,300]" />
+    <node index="1" text="TAP" class="android.widget.Button" bounds="[100,400][300,500]" />
+    <node index="2" text="42 taps left" class="android.widget.TextView" bounds="[0,600][1080,700]" />
+  </node>
+</hierarchy>'''
+
+
+# noinspection PyMethodMayBeStatic
+class UiHierarchyTests(unittest.TestCase):
+    def test_01_find(self):
+        hierarchy = UiHierarchy(xml=XML)
+        assert hierarchy.find('tap').attrib['text'] == 'Tap the button', 'First node in document order expected.'
+        assert hierarchy.find('TAP', case_sensitive=True).attrib['text'] == 'TAP'
+        assert hierarchy.find('tap', exact=True).attrib['text'] == 'TAP'
+        assert hierarchy.find('tap', case_sensitive=True, exact=True) is None
+        assert len(hierarchy.find_all('tap')) == 3, 'All nodes that contain text expected.'
+        assert hierarchy.find('not existing') is None
+        assert hierarchy.find('button\n42') is None, 'Text should not be found across nodes.'
+
+    def test_02_bounds(self):
+        node = UiHierarchy(xml=XML).find('TAP', exact=True)
+        assert UiHierarchy.get_bounds(node) == (100, 400, 300, 500), 'Wrong bounds.'
+
+    def test_03_failed_dump(self):
+        for xml in ['', 'ERROR: could not get idle state.']:
+            hierarchy = UiHierarchy(xml=xml)
+            assert hierarchy.nodes == [], 'Failed dump should have no nodes.'
+            assert hierarchy.find('TAP') is None
+
+    def test_04_non_ascii_text(self):
+        xml = XML.replace('42 taps left', u'Caf\u00e9 \u00a9 2019\u2026')
+        for dump in [xml, xml.encode('utf-8')]:
+            hierarchy = UiHierarchy(xml=dump)
+            assert len(hierarchy.nodes) == 4, 'Dump with non ASCII text should be parsed.'
+            assert hierarchy.find(u'caf\u00e9').attrib['text'] == u'Caf\u00e9 \u00a9 2019\u2026', 'Wrong node.'
+            assert hierarchy.find('TAP', exact=True) is not None
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,17 @@
+import os
+import threading
 import time
 import unittest
 from random import randint
 
 from nose.tools import timed
 
+from core.base_test.test_context import TestContext
+from core.settings import Settings
+from core.utils.file_utils import File, Folder
 from core.utils.perf_utils import PerfUtils
 from core.utils.run import run
-from core.utils.wait import Wait
+from core.utils.wait import Wait, Deadline
 
 
 # noinspection PyMethodMayBeStatic
@@ -18,6 +23,35 @@ class WaitTests(unittest.TestCase):
         assert Wait.until(lambda: WaitTests.get_int() == 3, timeout=10, period=0.01)
         assert not Wait.until(lambda: False, timeout=1, period=0.01)
 
+    @timed(5)
+    def test_11_wait_with_backoff(self):
+        checks = []
+        assert not Wait.poll(lambda: checks.append(time.time()), timeout=1, period=0.1, backoff=2, max_period=0.4)
+        assert len(checks) <= 5, 'Checks should be less often when backoff is used. Checks: {0}'.format(len(checks))
+        assert Wait.poll(lambda: 'result', timeout=1) == 'result', 'Result of condition should be returned.'
+
+    @timed(5)
+    def test_12_wait_with_deadline(self):
+        TestContext.DEADLINE = Deadline(timeout=1)
+        try:
+            start = time.time()
+            assert not Wait.until(lambda: False, timeout=10, period=0.1)
+            assert time.time() - start < 2, 'Wait should not exceed the deadline.'
+        finally:
+            TestContext.DEADLINE = None
+
+    @timed(5)
+    def test_13_wait_for_events(self):
+        Folder.create(Settings.TEST_OUT_HOME)
+        file_path = os.path.join(Settings.TEST_OUT_HOME, 'wait.txt')
+        File.delete(file_path)
+        timer = threading.Timer(0.3, lambda: File.write(path=file_path, text='changed'))
+        timer.start()
+        assert Wait.for_file_change(path=file_path, timeout=3), 'File change not detected.'
+        result = run(cmd='sleep 0.3', wait=False)
+        assert Wait.for_process_exit(pid=result.pid, timeout=3), 'Process exit not detected.'
+        assert Wait.STATS, 'Stats of wait calls should be collected.'
+
     @timed(5)
     def test_20_get_average_time(self):
         ls_time = PerfUtils.get_average_time(lambda: run(cmd='ifconfig'), retry_count=5)
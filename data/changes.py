@@ -1,6 +1,7 @@
 import os
 
 from core.settings import Settings
+from core.utils.device.device import Device
 from core.utils.file_utils import File
 from data.const import Colors
 
@@ -21,11 +22,13 @@ class Sync(object):
     def replace(app_name, change_set, fail_safe=False):
         path = os.path.join(Settings.TEST_RUN_HOME, app_name, change_set.file_path)
         File.replace(path=path, old_string=change_set.old_value, new_string=change_set.new_value, fail_safe=fail_safe)
+        Device.invalidate_screens()
 
     @staticmethod
     def revert(app_name, change_set, fail_safe=False):
         path = os.path.join(Settings.TEST_RUN_HOME, app_name, change_set.file_path)
         File.replace(path=path, old_string=change_set.new_value, new_string=change_set.old_value, fail_safe=fail_safe)
+        Device.invalidate_screens()
 
 
 class Changes(object):
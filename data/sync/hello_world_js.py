@@ -63,7 +63,7 @@ def run_hello_world_js_ts(app_name, platform, device, bundle=True, hmr=True, ugl
             apk_path = TnsPaths.get_apk_path(app_name=app_name, release=False)
         TnsAssert.string_in_android_manifest(apk_path, 'compileSdkVersion="{0}"'.format(default_andr_sdk))
     if snapshot and Settings.HOST_OS != OSType.WINDOWS:
-        TnsAssert.snapshot_build(TnsPaths.get_apk_path(app_name=app_name, release=True), Settings.TEST_OUT_TEMP)
+        TnsAssert.snapshot_build(TnsPaths.get_apk_path(app_name=app_name, release=True))
     return result
 
 
@@ -6,7 +6,7 @@ from core.log.log import Log
 from core.settings import Settings
 from core.utils.file_utils import File, Folder
 from core.utils.npm import Npm
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
 from core.utils.run import run
 from core.utils.wait import Wait
 
@@ -134,5 +134,6 @@ class NG(object):
         """
         Kill ng cli processes.
         """
-        Process.kill(proc_name='node', proc_cmdline=Settings.Executables.NG)
-        Process.kill_by_port(DEFAULT_PORT)
+        snapshot = ProcessSnapshot()
+        Process.kill(proc_name='node', proc_cmdline=Settings.Executables.NG, snapshot=snapshot)
+        Process.kill_by_port(DEFAULT_PORT, snapshot=snapshot)
@@ -73,8 +73,8 @@ class App(object):
         if web_pack and App.is_dev_dependency(app_name=app_name, dependency='nativescript-dev-webpack'):
             Npm.uninstall(package='nativescript-dev-webpack', option='--save-dev', folder=app_path)
             Npm.install(package=Settings.Packages.WEBPACK, option='--save-dev --save-exact', folder=app_path)
-            Folder.clean(os.path.join(app_name, 'hooks'))
-            Folder.clean(os.path.join(app_name, 'node_modules'))
+            Folder.clean(os.path.join(app_name, 'hooks'), background=True)
+            Folder.clean(os.path.join(app_name, 'node_modules'), background=True)
             Npm.install(folder=app_path)
             path_script = '"' + os.path.join(modules_path, '.bin', 'update-ns-webpack') + '"'
             update_script = path_script + ' --deps --configs'
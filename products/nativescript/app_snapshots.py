@@ -0,0 +1,126 @@
+"""
+Snapshots of created (and updated) apps reused by `Tns.create` and `Tns.platform_add` in the same test run.
+App created with same command and same packages is copied from snapshot instead of `tns create` + `App.update`.
+"""
+import json
+import os
+import shutil
+
+from core.enums.os_type import OSType
+from core.log.log import Log
+from core.settings import Settings
+from core.utils.artifact_cache import ArtifactCache
+from core.utils.file_utils import Folder, File
+from core.utils.process_info import ProcessInfo
+from core.utils.run import run
+from products.nativescript.tns_paths import TnsPaths
+
+
+class AppSnapshots(object):
+    FOLDER = os.path.join(Settings.TEST_OUT_HOME, 'snapshots')
+
+    # Key of the snapshot and fingerprint of the app files for apps created or restored from snapshot
+    __STATE = {}
+
+    @staticmethod
+    def create_key(app_name, command, template=None):
+        """
+        Get key of app created with `tns create` and updated with `App.update`.
+        :param app_name: App name.
+        :param command: Tns create command.
+        :param template: Template passed to create command.
+        :return: Key (None if template is local folder, it might be modified between the calls).
+        """
+        template_stat = None
+        if template is not None and os.path.exists(template):
+            if os.path.isdir(template):
+                return None
+            stat = os.stat(template)
+            template_stat = '{0}:{1}'.format(stat.st_size, stat.st_mtime)
+        packages = Settings.Packages
+        return ArtifactCache.key('create', app_name, command, template_stat, packages.NS_CLI, packages.MODULES,
+                                 packages.NATIVESCRIPT_CORE, packages.ANGULAR, packages.WEBPACK, packages.TYPESCRIPT)
+
+    @staticmethod
+    def platform_key(app_name, command):
+        """
+        Get key of app after `tns platform add`.
+        :param app_name: App name.
+        :param command: Tns platform add command.
+        :return: Key (None if app is modified after it was created or restored from snapshot).
+        """
+        state = AppSnapshots.__STATE.get(app_name)
+        if state is None or AppSnapshots.__fingerprint(app_name=app_name) != state[1]:
+            return None
+        return ArtifactCache.key('platform', state[0], command)
+
+    @staticmethod
+    def forget(app_name):
+        AppSnapshots.__STATE.pop(app_name, None)
+
+    @staticmethod
+    def __fingerprint(app_name):
+        # Paths, sizes and modification times of app files (except node_modules).
+        app_path = TnsPaths.get_app_path(app_name=app_name)
+        files = []
+        for root, dirs, names in os.walk(app_path):
+            if 'node_modules' in dirs:
+                dirs.remove('node_modules')
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.lstat(path)
+                except OSError:
+                    continue
+                files.append((os.path.relpath(path, app_path), stat.st_size, stat.st_mtime))
+        return sorted(files)
+
+    @staticmethod
+    def __copy(source, target):
+        # Copy-on-write clone of the files when file system supports it (btrfs, xfs, apfs), otherwise plain copy.
+        Folder.clean(target)
+        Folder.create(os.path.dirname(target))
+        command = None
+        if Settings.HOST_OS == OSType.LINUX:
+            command = 'cp -a --reflink=auto "{0}" "{1}"'.format(source, target)
+        elif Settings.HOST_OS == OSType.OSX:
+            command = 'cp -Rc "{0}" "{1}"'.format(source, target)
+        if command is not None:
+            result = run(cmd=command, timeout=600, fail_safe=True)
+            if result.exit_code == 0:
+                return
+            Log.debug('Failed to clone {0}, fallback to copy.'.format(source))
+            Folder.clean(target)
+        shutil.copytree(source, target, symlinks=True)
+
+    @staticmethod
+    def restore(key, app_name):
+        """
+        Restore app from snapshot.
+        :param key: Key of the snapshot.
+        :param app_name: App name.
+        :return: ProcessInfo of the command that created the snapshot (None if snapshot does not exist).
+        """
+        snapshot_path = os.path.join(AppSnapshots.FOLDER, key)
+        meta_file = snapshot_path + '.json'
+        if not File.exists(meta_file):
+            return None
+        info = json.loads(File.read(meta_file))
+        Log.info('Restore {0} from snapshot of "{1}".'.format(app_name, info['cmd']))
+        AppSnapshots.__copy(source=snapshot_path, target=TnsPaths.get_app_path(app_name=app_name))
+        AppSnapshots.__STATE[app_name] = (key, AppSnapshots.__fingerprint(app_name=app_name))
+        return ProcessInfo(cmd=info['cmd'], exit_code=0, output=info['output'], duration=0)
+
+    @staticmethod
+    def save(key, app_name, result):
+        """
+        Save snapshot of the app.
+        :param key: Key of the snapshot.
+        :param app_name: App name.
+        :param result: ProcessInfo of the command that created the app.
+        """
+        snapshot_path = os.path.join(AppSnapshots.FOLDER, key)
+        Log.info('Save snapshot of {0}.'.format(app_name))
+        AppSnapshots.__copy(source=TnsPaths.get_app_path(app_name=app_name), target=snapshot_path)
+        File.write(path=snapshot_path + '.json', text=json.dumps({'cmd': result.commandline, 'output': result.output}))
+        AppSnapshots.__STATE[app_name] = (key, AppSnapshots.__fingerprint(app_name=app_name))
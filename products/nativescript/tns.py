@@ -12,9 +12,10 @@ from core.settings import Settings
 from core.utils.file_utils import Folder, File
 from core.utils.json_utils import JsonUtils
 from core.utils.npm import Npm
-from core.utils.process import Process
+from core.utils.process import Process, ProcessSnapshot
 from core.utils.run import run
 from products.nativescript.app import App
+from products.nativescript.app_snapshots import AppSnapshots
 from products.nativescript.tns_assert import TnsAssert
 from products.nativescript.tns_logs import TnsLogs
 from products.nativescript.tns_paths import TnsPaths
@@ -121,7 +122,8 @@ class Tns(object):
                force_clean=True,
                log_trace=False,
                verify=True,
-               app_data=None):
+               app_data=None,
+               app_snapshot=True):
         """
         Create {N} application.
         :param app_name: Application name (TestApp by default).
@@ -135,11 +137,14 @@ class Tns(object):
         :param log_trace: If True runs tns command with '--log trace'.
         :param verify: If True assert app is created properly.
         :param app_data: AppInfo object with expected data (used to verify app is created properly).
+        :param app_snapshot: If True app created and updated with same command is restored from snapshot
+        (only when `update=True`, set it False in tests that verify create command).
         """
 
         # Cleanup app folder
+        AppSnapshots.forget(app_name=app_name)
         if force_clean:
-            Folder.clean(TnsPaths.get_app_path(app_name=app_name))
+            Folder.clean(TnsPaths.get_app_path(app_name=app_name), background=True)
 
         # Create app
         normalized_app_name = app_name
@@ -157,11 +162,23 @@ class Tns(object):
             command += ' --force'
         if default:
             command += ' --default'
-        result = Tns.exec_command(command, log_trace=log_trace)
 
-        # Update the app (if specified)
-        if update:
-            App.update(app_name=app_name)
+        # Restore from snapshot (if same app is already created in this test run)
+        snapshot_key = None
+        result = None
+        if app_snapshot and Settings.APP_SNAPSHOTS and update and force_clean and path is None and not log_trace:
+            snapshot_key = AppSnapshots.create_key(app_name=app_name, command=command, template=template)
+            if snapshot_key is not None:
+                result = AppSnapshots.restore(key=snapshot_key, app_name=app_name)
+
+        if result is None:
+            result = Tns.exec_command(command, log_trace=log_trace)
+
+            # Update the app (if specified)
+            if update:
+                App.update(app_name=app_name)
+        else:
+            snapshot_key = None
 
         # Let TestContext know app is created
         TestContext.TEST_APP_NAME = app_name
@@ -176,6 +193,9 @@ class Tns(object):
                 path = Settings.TEST_RUN_HOME
             TnsAssert.created(app_name=app_name, output=result.output, app_data=app_data, path=path)
 
+        if snapshot_key is not None and result.exit_code == 0:
+            AppSnapshots.save(key=snapshot_key, app_name=app_name, result=result)
+
         return result
 
     @staticmethod
@@ -196,9 +216,23 @@ class Tns(object):
         command = 'platform add ' + platform_add_string + ' --path ' + app_name
         if framework_path is not None:
             command = command + ' --frameworkPath ' + framework_path
-        result = Tns.exec_command(command=command, log_trace=log_trace)
+
+        # Restore from snapshot if app is not modified since it was created (or restored) from snapshot
+        snapshot_key = None
+        result = None
+        if not log_trace:
+            snapshot_key = AppSnapshots.platform_key(app_name=app_name, command=command)
+            if snapshot_key is not None:
+                result = AppSnapshots.restore(key=snapshot_key, app_name=app_name)
+        if result is None:
+            result = Tns.exec_command(command=command, log_trace=log_trace)
+        else:
+            snapshot_key = None
+
         if verify:
             TnsAssert.platform_added(app_name=app_name, platform=platform, output=result.output, version=version)
+        if snapshot_key is not None and result.exit_code == 0:
+            AppSnapshots.save(key=snapshot_key, app_name=app_name, result=result)
         return result
 
     @staticmethod
@@ -551,13 +585,16 @@ class Tns(object):
         return Tns.exec_command(command='--version')
 
     @staticmethod
-    def kill():
+    def kill(snapshot=None):
         """
         Kill all tns related processes.
+        :param snapshot: ProcessSnapshot object (if not specified new snapshot of process table is created).
         """
         Log.info("Kill tns processes.")
+        snapshot = snapshot or ProcessSnapshot()
         if Settings.HOST_OS == OSType.WINDOWS:
-            Process.kill(proc_name='node')
+            processes = snapshot.find_by_name(proc_name='node.exe')
         else:
-            Process.kill(proc_name='node', proc_cmdline=Settings.Executables.TNS)
-            Process.kill_by_commandline(cmdline='webpack.js')
+            processes = snapshot.find_by_name(proc_name='node', proc_cmdline=Settings.Executables.TNS)
+            processes.extend(snapshot.find_by_commandline(commandline='webpack.js'))
+        Process.kill_trees(processes=processes)
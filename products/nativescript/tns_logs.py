@@ -1,11 +1,9 @@
 import time
 
 from core.enums.app_type import AppType
-from core.enums.os_type import OSType
 from core.enums.platform_type import Platform
 from core.log.log import Log
-from core.settings import Settings
-from core.utils.file_utils import File
+from core.utils.log_tail import LogTail, StringMatcher
 from products.nativescript.run_type import RunType
 from products.nativescript.tns_paths import TnsPaths
 
@@ -276,32 +274,50 @@ class TnsLogs(object):
         return logs
 
     @staticmethod
-    def wait_for_log(log_file, string_list, not_existing_string_list=None, timeout=60, check_interval=3):
+    def get_unverified_log(log_file):
+        """
+        Get part of the log that is not verified by previous `wait_for_log` calls.
+        :param log_file: Path to log file.
+        :return: Text.
+        """
+        return LogTail.get(log_file).read_unverified()
+
+    @staticmethod
+    def mark_log_verified(log_file):
+        """
+        Mark current content of the log as verified (next `wait_for_log` will check only text after it).
+        :param log_file: Path to log file.
+        """
+        tail = LogTail.get(log_file)
+        tail.read()
+        tail.mark_verified()
+
+    @staticmethod
+    def wait_for_log(log_file, string_list, not_existing_string_list=None, timeout=60, check_interval=0.5):
         """
         Wait until log file contains list of string.
         :param log_file: Path to log file.
         :param string_list: List of strings.
         :param not_existing_string_list: List of string that should not be in logs.
         :param timeout: Timeout.
-        :param check_interval: Check interval.
+        :param check_interval: Check interval (only new content of the log is read on each check).
         """
         end_time = time.time() + timeout
         all_items_found = False
-        not_found_list = []
-        log = ""
-        verified_flag = '[VERIFIED]'
+        not_found_list = list(string_list)
+        errors = {'BUILD FAILED': 'BUILD FAILED. No need to wait more time!',
+                  'Unable to sync files': 'Sync process failed. No need to wait more time!',
+                  'errors were thrown': 'Multiple errors were thrown. No need to wait more time!'}
+
+        # Check only the part of the log that hasn't been previously verified
+        tail = LogTail.get(log_file)
+        tail.rewind()
+        matcher = StringMatcher(list(string_list) + list(errors.keys()))
         while time.time() < end_time:
-            not_found_list = []
-            log = File.read(log_file)
-            # Extract the part of the log that hasn't been previously verified
-            if verified_flag in log:
-                log = File.extract_part_of_text(log, verified_flag)
-            for item in string_list:
-                if item in log:
-                    Log.info("'{0}' found.".format(item))
-                else:
-                    not_found_list.append(item)
-            string_list = not_found_list
+            found = matcher.scan(tail.read())
+            for item in [item for item in not_found_list if item in found]:
+                Log.info("'{0}' found.".format(item))
+            not_found_list = [item for item in not_found_list if item not in found]
             if not not_found_list:
                 all_items_found = True
                 Log.info("All items found")
@@ -309,20 +325,14 @@ class TnsLogs(object):
             else:
                 Log.debug("'{0}' NOT found. Wait...".format(not_found_list))
                 time.sleep(check_interval)
-            if 'BUILD FAILED' in log:
-                Log.error('BUILD FAILED. No need to wait more time!')
-                break
-            if 'Unable to sync files' in log:
-                Log.error('Sync process failed. No need to wait more time!')
-                break
-            if 'errors were thrown' in log:
-                Log.error('Multiple errors were thrown. No need to wait more time!')
+            failed = [error for error in errors if error in found]
+            if failed:
+                Log.error(errors[failed[0]])
                 break
 
-        # Mark that part of the log as verified by appending a flag at the end.
-        # The second time we read the file we will verify only the text after that flag
-        if Settings.HOST_OS != OSType.WINDOWS:
-            File.append(log_file, verified_flag)
+        # Mark that part of the log as verified, next time we verify only the text after it
+        log = tail.read_unverified()
+        tail.mark_verified()
 
         if all_items_found:
             if not_existing_string_list is None:
@@ -3,23 +3,30 @@ import os
 from core.enums.os_type import OSType
 from core.log.log import Log
 from core.settings import Settings
+from core.utils.artifact_cache import ArtifactCache
 from core.utils.device.adb import Adb
 from core.utils.device.device_manager import DeviceManager
 from core.utils.file_utils import File, Folder
 from core.utils.git import Git
 from core.utils.gradle import Gradle
 from core.utils.npm import Npm
+from core.utils.pipeline import Pipeline
 from data.templates import Template
 from products.nativescript.preview_helpers import Preview
 from products.nativescript.tns import Tns
 
+TEMPLATES_FOLDER = os.path.join(Settings.TEST_SUT_HOME, 'templates')
+TEMPLATES = [Template.HELLO_WORLD_JS, Template.HELLO_WORLD_TS, Template.HELLO_WORLD_NG, Template.MASTER_DETAIL_NG,
+             Template.VUE_BLANK, Template.MASTER_DETAIL_VUE, Template.TAB_NAVIGATION_JS]
+
 
 def __cleanup():
     """
     Wipe TEST_OUT_HOME.
     """
-    Folder.clean(os.path.join(Settings.TEST_RUN_HOME, 'node_modules'))
-    Folder.clean(Settings.TEST_OUT_HOME)
+    Folder.empty_trash()
+    Folder.clean(os.path.join(Settings.TEST_RUN_HOME, 'node_modules'), background=True)
+    Folder.clean(Settings.TEST_OUT_HOME, background=True)
     Folder.create(Settings.TEST_OUT_LOGS)
     Folder.create(Settings.TEST_OUT_IMAGES)
     Folder.create(Settings.TEST_OUT_TEMP)
@@ -33,25 +40,50 @@ def __cleanup():
     Gradle.kill()
 
 
-def __get_templates(branch=Settings.Packages.TEMPLATES_BRANCH):
+def __clone_templates(branch=Settings.Packages.TEMPLATES_BRANCH):
     """
-    Clone hello-world templates and pack them as local npm packages.
+    Clone hello-world templates.
     :param branch: Branch of https://github.com/NativeScript/nativescript-app-templates
     """
-    local_folder = os.path.join(Settings.TEST_SUT_HOME, 'templates')
-    Git.clone(repo_url=Template.REPO, branch=branch, local_folder=local_folder)
-
-    apps = [Template.HELLO_WORLD_JS, Template.HELLO_WORLD_TS, Template.HELLO_WORLD_NG, Template.MASTER_DETAIL_NG,
-            Template.VUE_BLANK, Template.MASTER_DETAIL_VUE, Template.TAB_NAVIGATION_JS]
-    for app in apps:
-        template_name = app.name
-        template_folder = os.path.join(local_folder, 'packages', template_name)
-        out_file = os.path.join(Settings.TEST_SUT_HOME, template_name + '.tgz')
-        Npm.pack(folder=template_folder, output_file=out_file)
-        if File.exists(out_file):
-            app.path = out_file
-        else:
-            raise IOError("Failed to clone and pack template: " + template_name)
+    Git.clone(repo_url=Template.REPO, branch=branch, local_folder=TEMPLATES_FOLDER)
+
+
+def __template_cache_key(app, commit):
+    return ArtifactCache.key('template', Template.REPO, commit, app.name)
+
+
+def __restore_template(app, commit):
+    """
+    Restore packed template from artifact cache.
+    :param app: AppInfo object of the template.
+    :param commit: Commit of templates repo.
+    :return: True if template is restored.
+    """
+    if commit is None:
+        return False
+    out_file = os.path.join(Settings.TEST_SUT_HOME, app.name + '.tgz')
+    if ArtifactCache().get(key=__template_cache_key(app=app, commit=commit), target=out_file):
+        app.path = out_file
+        return True
+    return False
+
+
+def __pack_template(app, commit=None):
+    """
+    Pack cloned template as local npm package.
+    :param app: AppInfo object of the template.
+    :param commit: Commit of templates repo (if specified the package is stored in artifact cache).
+    """
+    template_name = app.name
+    template_folder = os.path.join(TEMPLATES_FOLDER, 'packages', template_name)
+    out_file = os.path.join(Settings.TEST_SUT_HOME, template_name + '.tgz')
+    Npm.pack(folder=template_folder, output_file=out_file)
+    if File.exists(out_file):
+        app.path = out_file
+        if commit is not None:
+            ArtifactCache().put(key=__template_cache_key(app=app, commit=commit), source=out_file, name=template_name)
+    else:
+        raise IOError("Failed to clone and pack template: " + template_name)
 
 
 def __get_runtimes():
@@ -121,14 +153,25 @@ def __install_schematics():
 def prepare(clone_templates=True, install_ng_cli=False, get_preivew_packages=False):
     Log.info('================== Prepare Test Run ==================')
     __cleanup()
-    __install_ns_cli()
-    __get_runtimes()
+
+    # Independent stages are executed in parallel (most of the time is spent waiting npm, git and file copy).
+    pipeline = Pipeline(name='Prepare Test Run')
+    pipeline.add(name='Install NativeScript CLI', action=__install_ns_cli)
+    pipeline.add(name='Get runtimes', action=__get_runtimes)
     if install_ng_cli:
-        __install_ng_cli()
-        __install_schematics()
+        pipeline.add(name='Install Angular CLI', action=__install_ng_cli)
+        pipeline.add(name='Install schematics', action=__install_schematics, depends=['Install Angular CLI'])
     if clone_templates:
-        __get_templates()
+        # Templates packed from same commit of templates repo are restored from cache (without clone).
+        commit = Git.get_remote_commit(repo_url=Template.REPO, branch=Settings.Packages.TEMPLATES_BRANCH)
+        missing = [app for app in TEMPLATES if not __restore_template(app=app, commit=commit)]
+        if missing:
+            pipeline.add(name='Clone templates', action=__clone_templates)
+        for app in missing:
+            pipeline.add(name='Pack ' + app.name, action=__pack_template, depends=['Clone templates'], app=app,
+                         commit=commit)
     if get_preivew_packages:
-        Preview.get_app_packages()
+        pipeline.add(name='Get preview packages', action=Preview.get_app_packages)
+    pipeline.run()
 
     Log.settings()
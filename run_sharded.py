@@ -0,0 +1,17 @@
+"""
+Run tests in parallel workers, each worker uses own emulator (and simulators on macOS).
+
+Usage: python run_sharded.py <count of workers> [tests in nose format]
+Example: python run_sharded.py 4 tests/cli/run
+"""
+import sys
+
+import run_common
+from core.log.log import Log
+from core.utils.sharding import Sharding
+
+if __name__ == '__main__':
+    run_common.prepare(clone_templates=True, install_ng_cli=False)
+    Log.info("Running tests...")
+    passed = Sharding.run(names=sys.argv[2:] or ['tests'], workers=int(sys.argv[1]))
+    sys.exit(0 if passed else 1)
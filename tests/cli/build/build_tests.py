@@ -82,10 +82,10 @@ class BuildTests(TnsTest):
         # Clean META-INF folder. It contains com.android.support.... files which are expected to be there due to
         # https://github.com/NativeScript/nativescript-cli/pull/3923
         Folder.clean(os.path.join(self.temp_folder, 'META-INF'))
-        assert not File.pattern_exists(self.temp_folder, '*.aar')
-        assert not File.pattern_exists(self.temp_folder, '*.plist')
-        assert not File.pattern_exists(self.temp_folder, '*.android.*')
-        assert not File.pattern_exists(self.temp_folder, '*.ios.*')
+        assert not File.pattern_exists(self.temp_folder, '*.aar', prune=())
+        assert not File.pattern_exists(self.temp_folder, '*.plist', prune=())
+        assert not File.pattern_exists(self.temp_folder, '*.android.*', prune=())
+        assert not File.pattern_exists(self.temp_folder, '*.ios.*', prune=())
 
         # Verify app is built with android sdk 29 by default
         TnsAssert.string_in_android_manifest(apk_path, 'compileSdkVersion="29"')
@@ -107,7 +107,7 @@ class BuildTests(TnsTest):
         # Verify snapshot files in the built .apk
         apk_path = TnsPaths.get_apk_path(app_name=self.app_name, release=True)
         if Settings.HOST_OS != OSType.WINDOWS:
-            TnsAssert.snapshot_build(apk_path, self.temp_folder)
+            TnsAssert.snapshot_build(apk_path)
 
         # Verify app is built with android sdk 29 by default
         TnsAssert.string_in_android_manifest(apk_path, 'compileSdkVersion="29"')
@@ -90,10 +90,11 @@ class CreateTests(TnsTest):
         file_path = os.path.join(tns_ts_template_path, 'package.json')
         File.replace(path=file_path, old_string="tns-template-hello-world-ts",
                      new_string="test-tns-template-hello-world-ts")
-        Tns.create(app_name=Settings.AppName.DEFAULT, template=tns_ts_template_path)
+        Tns.create(app_name=Settings.AppName.DEFAULT, template=tns_ts_template_path, app_snapshot=False)
 
     def test_011_create_app_scoped_packages(self):
-        result = Tns.create(app_name=Settings.AppName.DEFAULT, template="@angular/core", verify=False)
+        result = Tns.create(app_name=Settings.AppName.DEFAULT, template="@angular/core", verify=False,
+                            app_snapshot=False)
         assert "Command npm install" not in result.output
 
     def test_012_create_project_with_named_app(self):
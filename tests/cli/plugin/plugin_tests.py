@@ -214,8 +214,8 @@ class PluginTests(TnsTest):
 
         Tns.build_ios(app_name=self.app_name, bundle=False)
         ios_path = os.path.join(TnsPaths.get_platforms_ios_folder(self.app_name))
-        assert not File.pattern_exists(ios_path, pattern='*.aar')
-        assert not File.pattern_exists(ios_path, pattern='*acra*')
+        assert not File.pattern_exists(ios_path, pattern='*.aar', prune=())
+        assert not File.pattern_exists(ios_path, pattern='*acra*', prune=())
 
         Tns.build_android(app_name=self.app_name, bundle=False)
         android_path = os.path.join(TnsPaths.get_platforms_android_folder(self.app_name))
@@ -163,13 +163,12 @@ class PreviewJSTests(TnsPreviewJSTests):
 
         # Check changes are not synced more than once per platform
         # Extract the last part of the log
-        log = File.read(result.log_file)
-        log = File.extract_part_of_text(log, '[VERIFIED]')
+        log = TnsLogs.get_unverified_log(result.log_file)
         # Verify files are synced once
         TnsAssert.file_is_synced_once(log, device=self.emu, file_name='main-view-model.js')
         TnsAssert.file_is_synced_once(log, device=self.sim, file_name='main-view-model.js')
         # Mark that part of the log as verified before next sync
-        File.append(result.log_file, '[VERIFIED]')
+        TnsLogs.mark_log_verified(result.log_file)
 
         # Edit XML file and verify changes are applied on both emulators
         Sync.replace(app_name=self.app_name, change_set=Changes.JSHelloWord.XML)
@@ -178,8 +177,7 @@ class PreviewJSTests(TnsPreviewJSTests):
 
         # Check changes are not synced more than once per platform
         # Extract the last part of the log
-        log = File.read(result.log_file)
-        log = File.extract_part_of_text(log, '[VERIFIED]')
+        log = TnsLogs.get_unverified_log(result.log_file)
         # Verify files are synced once
         TnsAssert.file_is_synced_once(log, device=self.emu, file_name='main-page.xml')
         TnsAssert.file_is_synced_once(log, device=self.sim, file_name='main-page.xml')
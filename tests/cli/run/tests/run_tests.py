@@ -466,8 +466,7 @@ class TnsRunJSTests(TnsRunTest):
         strings = TnsLogs.run_messages(app_name=self.app_name, platform=Platform.ANDROID,
                                        run_type=RunType.FIRST_TIME, device=self.emu)
         TnsLogs.wait_for_log(log_file=result.log_file, string_list=strings)
-        yellow_count = self.emu.get_pixels_by_color(color=Colors.YELLOW_ICON)
-        green_count = self.emu.get_pixels_by_color(color=Colors.GREEN_ICON)
+        yellow_count, green_count = self.emu.get_pixels_by_colors(colors=[Colors.YELLOW_ICON, Colors.GREEN_ICON])
 
         # Verify the referenced image file is displayed on device screen
         assert yellow_count > 0, 'Failed to find yellow color on {0}'.format(self.emu.name)
@@ -483,8 +482,7 @@ class TnsRunJSTests(TnsRunTest):
         TnsLogs.wait_for_log(log_file=result.log_file, string_list=strings)
 
         # Verify the new image is synced and displayed on device screen
-        yellow_count = self.emu.get_pixels_by_color(color=Colors.YELLOW_ICON)
-        green_count = self.emu.get_pixels_by_color(color=Colors.GREEN_ICON)
+        yellow_count, green_count = self.emu.get_pixels_by_colors(colors=[Colors.YELLOW_ICON, Colors.GREEN_ICON])
         assert green_count > 0, 'Failed to find green color on {0}'.format(self.emu.name)
         assert yellow_count == 0, 'Found yellow color on {0}'.format(self.emu.name)
 